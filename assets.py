@@ -0,0 +1,102 @@
+"""
+Prebuilt static content for the admin web pages.
+
+Files in static/ are read once, fingerprinted with a content
+hash and served from /static/<name>.<hash>.<ext> with a one-year max-age.
+StaticPage wraps fixed HTML that used to be rebuilt inside the handlers: the
+encoded body, ETag and Last-Modified are computed once at import.
+"""
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+}
+
+
+def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class StaticPage:
+    """A fixed response body with precomputed validators"""
+
+    def __init__(self, body, media_type: str = "text/html; charset=utf-8",
+                 cache_control: str = "no-cache", last_modified: float = None):
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:16] + '"'
+        self.last_modified = last_modified or time.time()
+        self.headers = {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            "Cache-Control": cache_control,
+        }
+
+    def response(self, request: Request = None) -> Response:
+        if request is not None and _not_modified(request, self.etag, self.last_modified):
+            return Response(status_code=304, headers=self.headers)
+        return Response(content=self.body, media_type=self.media_type, headers=self.headers)
+
+
+class StaticAssets:
+    """Fingerprinted files from the static/ directory"""
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = directory
+        self._by_name = {}    # logical name -> hashed name
+        self._by_hashed = {}  # hashed name -> StaticPage
+
+    def load(self):
+        """Read and fingerprint every file; called once at startup"""
+        by_name, by_hashed = {}, {}
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if not os.path.isfile(path):
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                stem, ext = os.path.splitext(name)
+                hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+                by_name[name] = hashed
+                by_hashed[hashed] = StaticPage(
+                    data,
+                    media_type=MEDIA_TYPES.get(ext, "application/octet-stream"),
+                    cache_control=IMMUTABLE_CACHE_CONTROL,
+                    last_modified=os.path.getmtime(path),
+                )
+        self._by_name, self._by_hashed = by_name, by_hashed
+        return self
+
+    def url(self, name: str) -> str:
+        if not self._by_name:
+            self.load()
+        return "/static/" + self._by_name.get(name, name)
+
+    def get(self, hashed_name: str):
+        if not self._by_hashed:
+            self.load()
+        return self._by_hashed.get(hashed_name)
+
+
+static_assets = StaticAssets()
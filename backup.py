@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Online backups of the Notes App databases.
+
+A backup copies notes_app.db (and every shard file) with the sqlite3 backup
+API, a few pages per step. The source is only read-locked during a step, so
+writers keep going between steps. After every step the copier checks the
+foreground p99 request latency and backs off while it is over budget.
+Finished copies are integrity checked, optionally gzip compressed and kept
+in timestamped directories under NOTES_BACKUP_DIR; older sets are rotated
+out.
+
+If writers keep changing the source, SQLite restarts the copy. After
+MAX_RESTARTS restarts the remaining copy is done in one step, which holds
+the read lock for the time it takes to copy the file once.
+
+Usage:
+    python backup.py create
+    python backup.py list
+    python backup.py restore BACKUP_NAME    (stop the app first)
+"""
+import asyncio
+import gzip
+import itertools
+import os
+import shutil
+import sys
+import time
+
+import database
+import metrics
+
+BACKUP_DIR = os.environ.get("NOTES_BACKUP_DIR", "backups")
+BACKUP_INTERVAL_SECONDS = int(os.environ.get("NOTES_BACKUP_INTERVAL_SECONDS", "0"))  # 0 = only on demand
+BACKUP_KEEP = int(os.environ.get("NOTES_BACKUP_KEEP", "7"))
+BACKUP_COMPRESS = os.environ.get("NOTES_BACKUP_COMPRESS", "1") != "0"
+PAGES_PER_STEP = int(os.environ.get("NOTES_BACKUP_PAGES_PER_STEP", "64"))
+STEP_PAUSE_SECONDS = int(os.environ.get("NOTES_BACKUP_STEP_PAUSE_MS", "5")) / 1000
+P99_BUDGET_SECONDS = int(os.environ.get("NOTES_BACKUP_P99_BUDGET_MS", "250")) / 1000
+MAX_BACKOFF_SECONDS = 2.0
+MAX_RESTARTS = 20
+LATENCY_METRIC = "http.request_seconds"
+LATENCY_WINDOW_SECONDS = 10
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+class Throttle:
+    """Progress callback for Connection.backup: pauses between steps, longer while p99 is over budget"""
+
+    def __init__(self, budget: float = P99_BUDGET_SECONDS, pause: float = STEP_PAUSE_SECONDS):
+        self.budget = budget
+        self.pause = pause
+        self.backoff = pause
+        self.remaining = None
+        self.restarts = 0
+        self.steps = 0
+
+    def __call__(self, status, remaining, total):
+        self.steps += 1
+        if self.remaining is not None and remaining > self.remaining:
+            # A writer changed the source: SQLite started the copy over
+            self.restarts += 1
+            metrics.incr("backup.restarts")
+            if self.restarts > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        self.remaining = remaining
+        p99 = metrics.percentile(LATENCY_METRIC, 0.99, LATENCY_WINDOW_SECONDS)
+        if p99 is not None and p99 > self.budget:
+            self.backoff = min(MAX_BACKOFF_SECONDS, max(self.backoff, 0.01) * 2)
+            metrics.incr("backup.throttled_steps")
+        else:
+            self.backoff = self.pause
+        time.sleep(self.backoff)
+
+
+def copy_database(src_path: str, dst_path: str, throttle: Throttle = None):
+    """Copy one live database file with the backup API; returns the copied size in bytes"""
+    throttle = throttle or Throttle()
+    src = database.connect(src_path, timeout=30)
+    dst = database.connect(dst_path)
+    try:
+        try:
+            src.backup(dst, pages=PAGES_PER_STEP, progress=throttle)
+        except _TooManyRestarts:
+            metrics.incr("backup.single_step_fallbacks")
+            src.backup(dst)
+        result = dst.execute("PRAGMA quick_check").fetchone()[0]
+        if result != "ok":
+            raise RuntimeError(f"Backup of {src_path} failed its integrity check: {result}")
+        # From the pages rather than the file, so in-memory targets work too
+        size = dst.execute("PRAGMA page_count").fetchone()[0] * dst.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return size
+
+
+def _gzip_file(path: str):
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+    return path + ".gz"
+
+
+def _claim_backup_dir(backup_dir: str):
+    """Create the .partial directory for a new backup under a name no other backup uses; returns (name, target)"""
+    os.makedirs(backup_dir, exist_ok=True)
+    now = time.time()
+    base = time.strftime("notes-%Y%m%d-%H%M%S", time.gmtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+    for attempt in itertools.count():
+        name = base if attempt == 0 else f"{base}-{attempt}"
+        target = os.path.join(backup_dir, name)
+        if os.path.exists(target):
+            continue
+        try:
+            os.mkdir(target + ".partial")
+        except FileExistsError:
+            continue  # another backup started in the same millisecond
+        return name, target
+
+
+def create_backup(backup_dir: str = BACKUP_DIR, compress: bool = BACKUP_COMPRESS, progress=None):
+    """Back up every database file into a new timestamped directory; returns its name"""
+    name, target = _claim_backup_dir(backup_dir)
+    partial = target + ".partial"
+    started = time.perf_counter()
+    copied = 0
+    files = database.database_files()
+    try:
+        for index, path in enumerate(files):
+            dst_path = os.path.join(partial, database.file_name(path))
+            copied += copy_database(path, dst_path)
+            if compress:
+                _gzip_file(dst_path)
+            if progress:
+                progress(index + 1, len(files))
+        os.replace(partial, target)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        metrics.incr("backup.failed")
+        raise
+
+    seconds = time.perf_counter() - started
+    metrics.incr("backup.completed")
+    metrics.incr("backup.bytes", copied)
+    metrics.set_gauge("backup.last_duration_seconds", round(seconds, 3))
+    metrics.set_gauge("backup.last_mb_per_second", round(copied / 1048576 / max(seconds, 1e-6), 2))
+    metrics.set_gauge("backup.last_completed_at", time.time())
+    rotate_backups(backup_dir)
+    return name
+
+
+def list_backups(backup_dir: str = BACKUP_DIR):
+    """Finished backups, newest first, as (name, files, total bytes)"""
+    if not os.path.isdir(backup_dir):
+        return []
+    result = []
+    for name in sorted(os.listdir(backup_dir), reverse=True):
+        path = os.path.join(backup_dir, name)
+        if not name.startswith("notes-") or name.endswith(".partial") or not os.path.isdir(path):
+            continue
+        files = sorted(os.listdir(path))
+        result.append((name, files, sum(os.path.getsize(os.path.join(path, f)) for f in files)))
+    return result
+
+
+def rotate_backups(backup_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP):
+    for name, _, _ in list_backups(backup_dir)[keep:]:
+        shutil.rmtree(os.path.join(backup_dir, name), ignore_errors=True)
+        metrics.incr("backup.rotated")
+
+
+def restore_backup(name: str, backup_dir: str = BACKUP_DIR):
+    """Copy a backup set over the live database files (run with the app stopped)"""
+    source = os.path.join(backup_dir, name)
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"No backup named {name} in {backup_dir}")
+    targets = {database.file_name(path): path for path in database.database_files()}
+    restored = []
+    for filename in sorted(os.listdir(source)):
+        db_name = filename[:-3] if filename.endswith(".gz") else filename
+        target = targets.get(db_name, os.path.join(os.path.dirname(database.DB_NAME), db_name))
+        staged = target + ".restore"
+        if filename.endswith(".gz"):
+            with gzip.open(os.path.join(source, filename), "rb") as src, open(staged, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        else:
+            shutil.copyfile(os.path.join(source, filename), staged)
+        try:
+            # Write through SQLite rather than replacing the file so stale -journal files cannot apply
+            copy_database(staged, target, Throttle(budget=float("inf"), pause=0))
+        finally:
+            os.remove(staged)
+        restored.append(target)
+    return restored
+
+
+async def run_backup_job(job):
+    """Job body for JobManager: back up off the event loop, reporting files done"""
+    def progress(done, total):
+        job.done, job.total = done, total
+
+    loop = asyncio.get_running_loop()
+    job.result = await loop.run_in_executor(None, lambda: create_backup(progress=progress))
+
+
+async def backup_scheduler(job_manager):
+    """Start a backup job every BACKUP_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(BACKUP_INTERVAL_SECONDS)
+        job_manager.start("backup", run_backup_job)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "create":
+        name = create_backup()
+        print(f"✅ Backup {name} written to {BACKUP_DIR}")
+        print(f"   {metrics.snapshot()['gauges']['backup.last_mb_per_second']} MB/s")
+    elif command == "list":
+        for name, files, size in list_backups():
+            print(f"   {name}: {len(files)} file(s), {size // 1024} KB")
+    elif command == "restore" and len(sys.argv) == 3:
+        for path in restore_backup(sys.argv[2]):
+            print(f"   restored {path}")
+        print("✅ Restore complete")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
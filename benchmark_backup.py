@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Foreground write latency while an online backup runs.
+
+Fills a scratch database, then measures note-write latency on its own and
+again while backup.create_backup() copies the file in a background thread.
+Write latencies are fed into the same metric the backup throttle watches,
+so the second run shows the throttle holding p99 near the budget.
+
+Usage: python benchmark_backup.py [notes] [writes] [budget_ms]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import backup
+import database
+import metrics
+
+
+def timed_writes(count: int):
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        database.create_note(f"Write {i}", "payload " * 64, user_id=2)
+        elapsed = time.perf_counter() - t0
+        latencies.append(elapsed)
+        metrics.observe(backup.LATENCY_METRIC, elapsed)
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(0.99 * (len(latencies) - 1))] * 1000
+
+
+def main():
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    budget_ms = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database.configure(os.path.join(workdir, "bench.db"))
+        database.create_database()
+        for i in range(notes):
+            database.create_note(f"Note {i}", "lorem ipsum dolor " * 200, user_id=1)
+        size_mb = os.path.getsize(database.DB_NAME) / 1048576
+        print(f"📦 {notes} notes, {size_mb:.1f} MB, p99 budget {budget_ms} ms")
+
+        p50, p99 = timed_writes(writes)
+        print(f"   idle:   write p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+
+        metrics.reset()
+        backup.P99_BUDGET_SECONDS = budget_ms / 1000
+        copier = threading.Thread(target=backup.create_backup, args=(os.path.join(workdir, "backups"),))
+        copier.start()
+        p50, p99 = timed_writes(writes)
+        copier.join()
+        counters = metrics.snapshot()["counters"]
+        print(f"   backup: write p50 {p50:.2f} ms, p99 {p99:.2f} ms "
+              f"({metrics.snapshot()['gauges'].get('backup.last_mb_per_second')} MB/s, "
+              f"{counters.get('backup.throttled_steps', 0)} throttled steps, "
+              f"{counters.get('backup.restarts', 0)} restarts)")
+
+
+if __name__ == "__main__":
+    main()
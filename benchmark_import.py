@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Bulk import throughput.
+
+Builds an NDJSON upload in memory, then feeds it to importer.import_ndjson
+in 64 KB chunks (as a request body would arrive) once per batch size, and
+compares the result with creating the same notes one create_note() call at
+a time, which is what onboarding through POST /notes amounts to.
+
+Usage: python benchmark_import.py [notes] [batch sizes, comma separated]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import database
+import importer
+from jobs import Job
+
+CHUNK_BYTES = 65536
+
+
+async def chunked(data: bytes):
+    for start in range(0, len(data), CHUNK_BYTES):
+        yield data[start:start + CHUNK_BYTES]
+
+
+def upload(notes: int) -> bytes:
+    return b"".join(
+        json.dumps({"title": f"Imported {i}", "content": "lorem ipsum dolor sit amet " * 20}).encode() + b"\n"
+        for i in range(notes)
+    )
+
+
+def main():
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch_sizes = [int(b) for b in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 100, 500, 2000]
+    data = upload(notes)
+    print(f"📦 {notes} notes, {len(data) / 1048576:.1f} MB NDJSON")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database.configure(os.path.join(workdir, "bench.db"))
+        database.create_database()
+
+        sample = min(notes, 1000)
+        t0 = time.perf_counter()
+        for i in range(sample):
+            database.create_note(f"Single {i}", "lorem ipsum dolor sit amet " * 20, user_id=1)
+        elapsed = time.perf_counter() - t0
+        print(f"   create_note x{sample}: {sample / elapsed:,.0f} notes/s")
+
+        for batch_size in batch_sizes:
+            importer.BATCH_SIZE = batch_size
+            job = Job(0, "import")
+            t0 = time.perf_counter()
+            asyncio.run(importer.import_ndjson(chunked(data), 1, job))
+            elapsed = time.perf_counter() - t0
+            print(f"   import batch={batch_size}: {job.result['imported'] / elapsed:,.0f} notes/s, "
+                  f"{len(data) / 1048576 / elapsed:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
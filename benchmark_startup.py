@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Notes App.
+
+Measures, in fresh interpreters, how long `import main` and the lifespan
+startup take, and lists the slowest imports from `python -X importtime`.
+
+Usage: python benchmark_startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_SNIPPET = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+asyncio.run(run())
+t2 = time.perf_counter()
+print("RESULT " + json.dumps({"import": t1 - t0, "lifespan": t2 - t1}))
+"""
+
+
+def run_once(workdir):
+    env = dict(os.environ, PYTHONPATH=HERE)
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SNIPPET],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    line = [l for l in result.stdout.splitlines() if l.startswith("RESULT ")][-1]
+    return json.loads(line[len("RESULT "):])
+
+
+def slowest_imports(limit=10):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"⏱️  Measuring cold start over {runs} runs...")
+
+    # Run against a scratch database so the first run pays for schema creation
+    # and the following ones show the fast path.
+    with tempfile.TemporaryDirectory() as workdir:
+        os.symlink(os.path.join(HERE, "templates"), os.path.join(workdir, "templates"))
+        samples = [run_once(workdir) for _ in range(runs)]
+
+    imports = [s["import"] * 1000 for s in samples]
+    lifespans = [s["lifespan"] * 1000 for s in samples]
+    print(f"First boot lifespan (schema creation): {lifespans[0]:.1f} ms")
+    print(f"import main  - median {statistics.median(imports):.1f} ms, max {max(imports):.1f} ms")
+    if runs > 1:
+        print(f"lifespan     - median {statistics.median(lifespans[1:]):.1f} ms (warm database)")
+
+    print("\n🐢 Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports():
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
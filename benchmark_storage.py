@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Storage benchmark for note content compression.
+
+Creates a scratch database per codec, writes the same notes into each and
+reports file size, write latency, full-note read latency and title-only
+list latency.
+
+Usage: python benchmark_storage.py [notes] [content_bytes]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import database
+
+WORDS = (
+    "meeting agenda project deadline review notes idea draft follow up client "
+    "budget design release todo research summary question answer plan update"
+).split()
+
+
+def make_content(size: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def files_size() -> int:
+    """Bytes on disk for every database file, after moving any WAL content into it"""
+    total = 0
+    for path in database.database_files():
+        conn = database.connect(path)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        total += sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+    return total
+
+
+def run(codec_name: str, notes: int, content_bytes: int):
+    rng = random.Random(42)
+    contents = [make_content(content_bytes, rng) for _ in range(notes)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database.configure(os.path.join(workdir, "bench.db"))
+        database.CONTENT_CODEC = database.CODEC_NAMES[codec_name]
+        database.create_database()
+
+        write_times = []
+        ids = []
+        for i, content in enumerate(contents):
+            t0 = time.perf_counter()
+            row = database.create_note(f"Note {i}", content, user_id=1)
+            write_times.append(time.perf_counter() - t0)
+            ids.append(row[0])
+
+        read_times = []
+        for note_id in rng.sample(ids, min(len(ids), 200)):
+            t0 = time.perf_counter()
+            database.get_note(note_id)
+            read_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        database.get_notes(1, include_content=False)
+        titles_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        database.get_notes(1)
+        full_list_time = time.perf_counter() - t0
+
+        size = files_size()
+
+    return {
+        "codec": codec_name,
+        "db_kb": size / 1024,
+        "write_ms": statistics.median(write_times) * 1000,
+        "read_ms": statistics.median(read_times) * 1000,
+        "titles_ms": titles_time * 1000,
+        "full_list_ms": full_list_time * 1000,
+    }
+
+
+def main():
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    content_bytes = int(sys.argv[2]) if len(sys.argv) > 2 else 8192
+    codecs = ["none", "zlib"] + (["zstd"] if database.zstandard is not None else [])
+
+    print(f"📦 {notes} notes of {content_bytes} bytes each")
+    print(f"{'codec':<6} {'db size':>10} {'write p50':>10} {'read p50':>10} {'titles':>10} {'full list':>10}")
+    for codec in codecs:
+        r = run(codec, notes, content_bytes)
+        print(f"{r['codec']:<6} {r['db_kb']:>8.0f}KB {r['write_ms']:>8.2f}ms {r['read_ms']:>8.3f}ms "
+              f"{r['titles_ms']:>8.2f}ms {r['full_list_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
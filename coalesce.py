@@ -0,0 +1,79 @@
+"""
+Single-flight request coalescing.
+
+    @single_flight(ttl=1.0)
+    async def admin_stats():
+        ...
+
+Concurrent calls with the same arguments share one execution: the first
+caller starts it and everyone arriving before it finishes awaits the same
+result (or exception). With a ttl the result is also served to callers for
+that many seconds afterwards, for at most max_entries distinct arguments
+(oldest dropped first). The shared execution runs as its own task, so
+a caller that disconnects does not cancel it for the others.
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+
+import metrics
+
+
+def single_flight(ttl: float = 0, name: str = None, max_entries: int = 256):
+    def decorator(func):
+        label = name or func.__name__
+        inflight = {}  # key -> asyncio.Future
+        results = OrderedDict()  # key -> (expires_at, value), oldest first
+
+        def store(key, value):
+            now = time.monotonic()
+            results.pop(key, None)
+            results[key] = (now + ttl, value)
+            # Every entry has the same ttl, so the expired ones are at the front
+            while results and (next(iter(results.values()))[0] <= now or len(results) > max_entries):
+                results.popitem(last=False)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            cached = results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    metrics.incr(f"coalesce.{label}.cache_hits")
+                    return cached[1]
+                del results[key]
+
+            future = inflight.get(key)
+            if future is not None:
+                metrics.incr(f"coalesce.{label}.shared")
+                return await asyncio.shield(future)
+
+            metrics.incr(f"coalesce.{label}.executions")
+            generation = wrapper.generation
+
+            async def run():
+                try:
+                    value = await func(*args, **kwargs)
+                    # Don't cache a result computed before the last invalidate()
+                    if ttl > 0 and generation == wrapper.generation:
+                        store(key, value)
+                    return value
+                finally:
+                    if inflight.get(key) is future:
+                        del inflight[key]
+
+            future = inflight[key] = asyncio.ensure_future(run())
+            return await asyncio.shield(future)
+
+        def invalidate():
+            """Drop cached results; later callers don't join executions started before this"""
+            wrapper.generation += 1
+            results.clear()
+            inflight.clear()
+
+        wrapper.generation = 0
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
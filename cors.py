@@ -0,0 +1,123 @@
+"""
+CORS handling for the Notes App.
+
+Allowed origins are an exact-match set plus optional wildcard patterns such
+as "https://*.github.io". Preflight requests are answered directly by the
+middleware, before routing, from header lists prebuilt per origin, and carry
+Access-Control-Max-Age so browsers stop re-preflighting every API call.
+"""
+import re
+
+import metrics
+
+MAX_CACHED_ORIGINS = 1024
+
+
+def _pattern_to_regex(pattern: str):
+    """Compile "https://*.example.com" style patterns; "*" matches one or more host labels"""
+    escaped = re.escape(pattern).replace(r"\*", r"[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*")
+    return re.compile(f"^{escaped}$")
+
+
+class CORSEngine:
+    def __init__(self, app, allow_origins=(), origin_patterns=(), allow_methods=("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"),
+                 allow_headers=("*",), expose_headers=(), allow_credentials: bool = True, max_age: int = 7200):
+        self.app = app
+        self.origins = frozenset(o.rstrip("/") for o in allow_origins)
+        self.patterns = [_pattern_to_regex(p) for p in origin_patterns]
+        self.mirror_request_headers = "*" in allow_headers
+        self.allow_credentials = allow_credentials
+
+        self._allowed_cache = {}   # origin -> bool, for pattern matches
+        self._preflight_cache = {}  # origin -> list of header tuples
+        self._simple_cache = {}     # origin -> list of header tuples
+
+        common = []
+        if allow_credentials:
+            common.append((b"access-control-allow-credentials", b"true"))
+        self._preflight_base = common + [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode()),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"vary", b"Origin"),
+            (b"content-length", b"0"),
+        ]
+        if not self.mirror_request_headers:
+            self._preflight_base.append((b"access-control-allow-headers", ", ".join(allow_headers).encode()))
+        self._simple_base = list(common)
+        if expose_headers:
+            self._simple_base.append((b"access-control-expose-headers", ", ".join(expose_headers).encode()))
+
+    def is_allowed(self, origin: str) -> bool:
+        if origin in self.origins:
+            return True
+        allowed = self._allowed_cache.get(origin)
+        if allowed is None:
+            allowed = any(p.match(origin) for p in self.patterns)
+            if len(self._allowed_cache) >= MAX_CACHED_ORIGINS:
+                self._allowed_cache.clear()
+            self._allowed_cache[origin] = allowed
+        return allowed
+
+    def _preflight_headers(self, origin: str):
+        headers = self._preflight_cache.get(origin)
+        if headers is None:
+            headers = [(b"access-control-allow-origin", origin.encode())] + self._preflight_base
+            if len(self._preflight_cache) >= MAX_CACHED_ORIGINS:
+                self._preflight_cache.clear()
+            self._preflight_cache[origin] = headers
+        return headers
+
+    def _simple_headers(self, origin: str):
+        headers = self._simple_cache.get(origin)
+        if headers is None:
+            headers = [(b"access-control-allow-origin", origin.encode())] + self._simple_base
+            if len(self._simple_cache) >= MAX_CACHED_ORIGINS:
+                self._simple_cache.clear()
+            self._simple_cache[origin] = headers
+        return headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(scope.get("headers") or [])
+        origin_raw = request_headers.get(b"origin")
+        if origin_raw is None:
+            await self.app(scope, receive, send)
+            return
+        origin = origin_raw.decode("latin-1")
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in request_headers:
+            metrics.incr("cors.preflight")
+            if not self.is_allowed(origin):
+                metrics.incr("cors.preflight_rejected")
+                body = b"Disallowed CORS origin"
+                await send({"type": "http.response.start", "status": 400, "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"vary", b"Origin"),
+                ]})
+                await send({"type": "http.response.body", "body": body})
+                return
+            headers = self._preflight_headers(origin)
+            requested = request_headers.get(b"access-control-request-headers")
+            if self.mirror_request_headers and requested:
+                headers = headers + [(b"access-control-allow-headers", requested)]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if not self.is_allowed(origin):
+            await self.app(scope, receive, send)
+            return
+        cors_headers = self._simple_headers(origin)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers") or [] if k != b"vary"]
+                vary = dict(message.get("headers") or []).get(b"vary")
+                headers.append((b"vary", vary + b", Origin" if vary else b"Origin"))
+                message = {**message, "headers": headers + cors_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
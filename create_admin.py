@@ -3,15 +3,14 @@
 Admin User Management Script
 Creates or checks admin users for the Notes App
 """
-import sqlite3
+import database
 from passlib.context import CryptContext
 
-DB_NAME = "notes_app.db"
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def create_admin_user(username, password):
     """Create a new admin user"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = database.connect()
     cursor = conn.cursor()
     
     # Check if user already exists
@@ -34,7 +33,7 @@ def create_admin_user(username, password):
 
 def list_users():
     """List all users in the database"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = database.connect()
     cursor = conn.cursor()
     cursor.execute("SELECT id, username, is_admin FROM users")
     users = cursor.fetchall()
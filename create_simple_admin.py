@@ -2,10 +2,9 @@
 """
 Quick Admin User Creator - Compatible with new hashing system
 """
-import sqlite3
+import database
 import hashlib
 
-DB_NAME = "notes_app.db"
 
 def hash_password_simple(password: str) -> str:
     """Simple SHA-256 hash for demo purposes"""
@@ -16,7 +15,7 @@ def create_simple_admin():
     username = "admin"
     password = "admin123"
     
-    conn = sqlite3.connect(DB_NAME)
+    conn = database.connect()
     cursor = conn.cursor()
     
     # Delete existing admin user if exists
@@ -1,12 +1,212 @@
+import atexit
+import heapq
+import itertools
+import json
+import os
+import time
+import shutil
 import sqlite3
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
+from revisions import apply_delta, apply_edits, is_snapshot_revision, make_delta, utf16_length
 
-DB_NAME = "notes_app.db"
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
 
 
-def create_database():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+DB_NAME = "notes_app.db"  # replaced by configure() from NOTES_DB_PATH at import
+# Bump whenever create_database() gains a new table or migration
+SCHEMA_VERSION = 11
+
+# --- Content storage codec ---
+# notes.content_codec records how each row's content is stored, so rows
+# written before compression was enabled (or below the threshold) stay TEXT.
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+CONTENT_CODEC = CODEC_NAMES.get(os.environ.get("NOTES_CONTENT_CODEC", "none").lower(), CODEC_NONE)
+CONTENT_COMPRESS_MIN_BYTES = int(os.environ.get("NOTES_CONTENT_COMPRESS_MIN_BYTES", "1024"))
+if CONTENT_CODEC == CODEC_ZSTD and zstandard is None:
+    print("Warning: zstandard not installed, compressing note content with zlib")
+    CONTENT_CODEC = CODEC_ZLIB
+
+def encode_content(content: str):
+    """Return (stored value, codec) for note content"""
+    raw = content.encode("utf-8")
+    if CONTENT_CODEC == CODEC_NONE or len(raw) < CONTENT_COMPRESS_MIN_BYTES:
+        return content, CODEC_NONE
+    if CONTENT_CODEC == CODEC_ZSTD:
+        packed = zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        packed = zlib.compress(raw, 6)
+    if len(packed) >= len(raw):
+        return content, CODEC_NONE
+    return packed, CONTENT_CODEC
+
+def decode_content(value, codec: int):
+    """Inverse of encode_content"""
+    if value is None or codec == CODEC_NONE:
+        return value
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("note content is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(value).decode("utf-8")
+    return zlib.decompress(value).decode("utf-8")
+
+class VersionConflict(Exception):
+    """The note changed since the version the client based its edit on"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"note is at version {current_version}")
+        self.current_version = current_version
+
+def _decode_note_row(row, preview: int = None):
+    """Decode a note row whose last column is content_codec and whose content is at index 2"""
+    if row is None:
+        return None
+    content = decode_content(row[2], row[-1])
+    if preview and content is not None:
+        content = content[:preview]
+    return (row[0], row[1], content) + tuple(row[3:-1])
+
+
+# --- Sharding ---
+# With NOTES_SHARDS > 1 each user's notes and their revisions live in one of
+# N SQLite files picked by a hash of user_id, so writers for different users
+# don't share a database lock. Users and the note_id -> user_id directory stay
+# in DB_NAME. Use `python shard_tool.py rebalance OLD NEW` to change N.
+NOTE_SHARDS = max(1, int(os.environ.get("NOTES_SHARDS", "1")))
+_scatter_pool = None
+
+def shard_path(index: int, shards: int = None) -> str:
+    shards = shards or NOTE_SHARDS
+    if shards == 1:
+        return DB_NAME
+    name, query = DB_NAME.split("?", 1) if DB_NAME.startswith("file:") else (DB_NAME, None)
+    base, ext = os.path.splitext(name)
+    path = f"{base}.shard{index}{ext if ext or query else '.db'}"
+    return f"{path}?{query}" if query else path
+
+def shard_for_user(user_id: int, shards: int = None) -> int:
+    shards = shards or NOTE_SHARDS
+    return zlib.crc32(str(user_id).encode()) % shards
+
+def _connect_user_notes(user_id: int):
+    return connect(shard_path(shard_for_user(user_id)))
+
+def _note_shard(note_id: int):
+    """Index of the shard holding a note, or None if the note does not exist"""
+    if NOTE_SHARDS == 1:
+        return 0
+    conn = connect(DB_NAME)
+    row = conn.execute("SELECT user_id FROM note_directory WHERE id = ?", (note_id,)).fetchone()
+    conn.close()
+    return shard_for_user(row[0]) if row else None
+
+def _connect_note(note_id: int):
+    index = _note_shard(note_id)
+    return connect(shard_path(index)) if index is not None else None
+
+def _scatter(query):
+    """Run query(path) against every shard in parallel; returns one result per shard"""
+    global _scatter_pool
+    paths = [shard_path(i) for i in range(NOTE_SHARDS)]
+    if len(paths) == 1:
+        return [query(paths[0])]
+    if _scatter_pool is None:
+        _scatter_pool = ThreadPoolExecutor(max_workers=NOTE_SHARDS, thread_name_prefix="shard")
+    return list(_scatter_pool.map(query, paths))
+
+def database_files():
+    """Every SQLite file the app writes: the main database followed by the shards"""
+    if NOTE_SHARDS > 1:
+        return [DB_NAME] + [shard_path(i) for i in range(NOTE_SHARDS)]
+    return [DB_NAME]
+
+
+# --- Database location ---
+# NOTES_DB_PATH (or configure() at runtime) picks where the data lives:
+#   a file path   notes_app.db by default; shards sit next to it
+#   :memory:      in-memory databases shared by every connection in this
+#                 process, gone when it exits (preview deployments, tests)
+#   :temp:        files in a fresh temporary directory removed at exit
+# Each :memory: or :temp: configuration is private, so test and benchmark
+# runs never touch or queue behind the real file and can run in parallel.
+# In-memory databases use SQLite's memdb VFS rather than cache=shared, which
+# fails concurrent readers and writers with "table is locked" instead of
+# waiting on the busy timeout. Every connection goes through connect().
+MEMORY = ":memory:"
+TEMP = ":temp:"
+_keepalive = []  # one open connection per in-memory database keeps it alive
+_memory_ids = itertools.count(1)
+
+def connect(path: str = None, **kwargs):
+    """sqlite3.connect for a database path or URI (defaults to DB_NAME)"""
+    return sqlite3.connect(path or DB_NAME, uri=True, **kwargs)
+
+def is_memory(path: str = None) -> bool:
+    return "vfs=memdb" in (path or DB_NAME)
+
+def file_name(path: str) -> str:
+    """Bare file name for a database path or in-memory URI, e.g. inside a backup set"""
+    if path.startswith("file:"):
+        path = path[len("file:"):].split("?")[0] + ".db"
+    return os.path.basename(path)
+
+def configure(path: str = None) -> str:
+    """Point the module at a file path, MEMORY or TEMP (default: NOTES_DB_PATH); returns DB_NAME"""
+    global DB_NAME
+    for conn in _keepalive:
+        conn.close()
+    _keepalive.clear()
+    path = path or os.environ.get("NOTES_DB_PATH") or "notes_app.db"
+    if path == MEMORY:
+        DB_NAME = f"file:/notes-{os.getpid()}-{next(_memory_ids)}?vfs=memdb"
+        _keepalive.extend(connect(p, check_same_thread=False) for p in database_files())
+    elif path == TEMP:
+        directory = tempfile.mkdtemp(prefix="notes-")
+        atexit.register(shutil.rmtree, directory, True)
+        DB_NAME = os.path.join(directory, "notes_app.db")
+    else:
+        if not path.startswith("file:") and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        DB_NAME = path
+    return DB_NAME
+
+configure()
+
+def _merge_newest_first(results, created_at_index: int = 3):
+    """Merge per-shard lists already sorted by created_at DESC"""
+    if len(results) == 1:
+        return results[0]
+    return list(heapq.merge(*results, key=lambda row: row[created_at_index] or "", reverse=True))
+
+
+# --- File settings ---
+# Rollback journal by default: WAL needs shared memory between connections,
+# which network filesystems such as Azure App Service's /home do not provide.
+# With NOTES_REPLICA_DIR set the live files are on local disk (replication.py),
+# so WAL is the default there. NOTES_JOURNAL_MODE overrides either way.
+JOURNAL_MODE = (
+    os.environ.get("NOTES_JOURNAL_MODE") or ("wal" if os.environ.get("NOTES_REPLICA_DIR") else "delete")
+).lower()
+
+def _configure_file(conn):
+    """Persistent per-file settings, applied before any table is created"""
+    if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        # Only takes effect on an empty file; maintenance.py VACUUMs older files over
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+
+
+def _create_notes_schema(cursor):
+    """notes and note_revisions tables, shared by the main database and every shard"""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS notes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -17,6 +217,133 @@ def create_database():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS note_revisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id INTEGER NOT NULL,
+            revision INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            is_snapshot INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            data_codec INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (note_id, revision)
+        )
+    """)
+    # Migration: add user_id column to notes if missing
+    cursor.execute("PRAGMA table_info(notes)")
+    notes_columns = [col[1] for col in cursor.fetchall()]
+    if "user_id" not in notes_columns:
+        cursor.execute("ALTER TABLE notes ADD COLUMN user_id INTEGER")
+        # For existing notes without user_id, you might want to assign them to a default user
+        # or handle this migration differently based on your needs
+    
+    # Migration: add content_codec column to notes if missing
+    if "content_codec" not in notes_columns:
+        cursor.execute("ALTER TABLE notes ADD COLUMN content_codec INTEGER NOT NULL DEFAULT 0")
+    
+    # Migration: add version column (optimistic concurrency for PATCH) if missing
+    if "version" not in notes_columns:
+        cursor.execute("ALTER TABLE notes ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    # Migration: UTF-8 length of the content before compression, for user_stats
+    recount = "content_bytes" not in notes_columns
+    if recount:
+        cursor.execute("ALTER TABLE notes ADD COLUMN content_bytes INTEGER")
+        _backfill_content_bytes(cursor)
+
+    # Per-user listings and batched purges of deleted users both walk this index
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_user ON notes (user_id, created_at)")
+    # Sort keys offered by the admin notes listing (rowid breaks ties inside each index)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_created ON notes (created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_title ON notes (title)")
+
+    _create_user_stats(cursor, recount)
+
+def _backfill_content_bytes(cursor):
+    cursor.execute(
+        "UPDATE notes SET content_bytes = length(CAST(content AS BLOB)) WHERE content_codec = ?", (CODEC_NONE,)
+    )
+    rows = cursor.execute(
+        "SELECT id, content, content_codec FROM notes WHERE content_bytes IS NULL"
+    ).fetchall()
+    cursor.executemany(
+        "UPDATE notes SET content_bytes = ? WHERE id = ?",
+        [(len(decode_content(content, codec).encode("utf-8")), note_id) for note_id, content, codec in rows],
+    )
+
+
+# Per-user counters kept by triggers so summaries never scan notes.
+# total_content_bytes is the UTF-8 size of the content as written, before
+# compression; rows inserted without content_bytes fall back to stored size.
+_CONTENT_BYTES = "COALESCE({row}.content_bytes, length(CAST({row}.content AS BLOB)))"
+_USER_STATS_TRIGGERS = {
+    "notes_stats_insert": f"""
+        AFTER INSERT ON notes BEGIN
+            INSERT INTO user_stats (user_id, note_count, total_content_bytes, last_note_at)
+            VALUES (NEW.user_id, 1, {_CONTENT_BYTES.format(row="NEW")}, NEW.created_at)
+            ON CONFLICT (user_id) DO UPDATE SET
+                note_count = note_count + 1,
+                total_content_bytes = total_content_bytes + excluded.total_content_bytes,
+                last_note_at = MAX(COALESCE(last_note_at, ''), excluded.last_note_at);
+        END""",
+    "notes_stats_delete": f"""
+        AFTER DELETE ON notes BEGIN
+            UPDATE user_stats SET
+                note_count = note_count - 1,
+                total_content_bytes = total_content_bytes - {_CONTENT_BYTES.format(row="OLD")},
+                last_note_at = (SELECT MAX(created_at) FROM notes WHERE user_id = OLD.user_id)
+            WHERE user_id = OLD.user_id;
+        END""",
+    "notes_stats_update": f"""
+        AFTER UPDATE OF content, content_bytes, user_id ON notes BEGIN
+            UPDATE user_stats SET
+                note_count = note_count - 1,
+                total_content_bytes = total_content_bytes - {_CONTENT_BYTES.format(row="OLD")},
+                last_note_at = (SELECT MAX(created_at) FROM notes WHERE user_id = OLD.user_id)
+            WHERE user_id = OLD.user_id;
+            INSERT INTO user_stats (user_id, note_count, total_content_bytes, last_note_at)
+            VALUES (NEW.user_id, 1, {_CONTENT_BYTES.format(row="NEW")}, NEW.created_at)
+            ON CONFLICT (user_id) DO UPDATE SET
+                note_count = note_count + 1,
+                total_content_bytes = total_content_bytes + excluded.total_content_bytes,
+                last_note_at = MAX(COALESCE(last_note_at, ''), excluded.last_note_at);
+        END""",
+}
+
+def _create_user_stats(cursor, recount: bool = False):
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'").fetchone()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            note_count INTEGER NOT NULL DEFAULT 0,
+            total_content_bytes INTEGER NOT NULL DEFAULT 0,
+            last_note_at TIMESTAMP
+        )
+    """)
+    for name, body in _USER_STATS_TRIGGERS.items():
+        # Recreated on every migration so changed trigger bodies take effect
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"CREATE TRIGGER {name} {body}")
+    if not exists or recount:
+        rebuild_user_stats(cursor)
+
+def rebuild_user_stats(cursor, user_id: int = None):
+    """Recount user_stats from the notes table, for one user or all of them"""
+    where, params = ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+    cursor.execute(f"DELETE FROM user_stats {where}", params)
+    cursor.execute(f"""
+        INSERT INTO user_stats (user_id, note_count, total_content_bytes, last_note_at)
+        SELECT user_id, COUNT(*), COALESCE(SUM({_CONTENT_BYTES.format(row="notes")}), 0), MAX(created_at)
+        FROM notes {where} GROUP BY user_id
+    """, params)
+
+def create_database():
+    conn = connect(DB_NAME)
+    _configure_file(conn)
+    cursor = conn.cursor()
+    # The main database keeps a notes table too: it is the only shard when NOTES_SHARDS=1
+    _create_notes_schema(cursor)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -24,36 +351,149 @@ def create_database():
             password TEXT NOT NULL
         )
     """)
+    # Allocates globally unique note ids and maps them to their owner's shard
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS note_directory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_note_directory_user ON note_directory (user_id)")
+    # Bulk imports outlive the worker that created them, so an upload id stays valid across restarts
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            total INTEGER,
+            done INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            result TEXT,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_user ON import_jobs (user_id, status)")
     # Migration: add is_admin column if missing
     cursor.execute("PRAGMA table_info(users)")
     columns = [col[1] for col in cursor.fetchall()]
     if "is_admin" not in columns:
         cursor.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0")
     
-    # Migration: add user_id column to notes if missing
-    cursor.execute("PRAGMA table_info(notes)")
-    notes_columns = [col[1] for col in cursor.fetchall()]
-    if "user_id" not in notes_columns:
-        cursor.execute("ALTER TABLE notes ADD COLUMN user_id INTEGER")
-        # For existing notes without user_id, you might want to assign them to a default user
-        # or handle this migration differently based on your needs
+    # Migration: soft-delete marker; the row is removed once the purge job finishes
+    if "deleted_at" not in columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN deleted_at TIMESTAMP")
     
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
 
-def create_note(title: str, content: str, user_id: int):
-    conn = sqlite3.connect(DB_NAME)
+    if NOTE_SHARDS > 1:
+        for index in range(NOTE_SHARDS):
+            shard = connect(shard_path(index))
+            _configure_file(shard)
+            _create_notes_schema(shard.cursor())
+            shard.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            shard.commit()
+            shard.close()
+
+def init_db():
+    """Create or migrate the schema; returns False without doing any work if it is current"""
+    for path in database_files():
+        conn = connect(path)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        # Every start, so a file left in WAL by an earlier default goes back to the configured mode
+        conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+        conn.close()
+        if version < SCHEMA_VERSION:
+            create_database()
+            return True
+    return False
+
+def ensure_admin_user(username: str, password_hash: str):
+    """Create the default admin account unless a user with that name already exists"""
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("INSERT INTO notes (title, content, user_id) VALUES (?, ?, ?)", (title, content, user_id))
+    cursor.execute(
+        "INSERT OR IGNORE INTO users (username, password, is_admin) VALUES (?, ?, 1)",
+        (username, password_hash),
+    )
     conn.commit()
-    note_id = cursor.lastrowid
-    cursor.execute("SELECT id, title, content, created_at FROM notes WHERE id = ?", (note_id,))
-    row = cursor.fetchone()
+    created = cursor.rowcount > 0
+    conn.close()
+    return created
+
+def _allocate_note_ids(user_id: int, count: int):
+    """Reserve note ids in the directory before the notes are written to their shard"""
+    if NOTE_SHARDS == 1:
+        return [None] * count
+    directory = connect(DB_NAME)
+    ids = [
+        directory.execute("INSERT INTO note_directory (user_id) VALUES (?)", (user_id,)).lastrowid
+        for _ in range(count)
+    ]
+    directory.commit()
+    directory.close()
+    return ids
+
+def _release_note_ids(ids):
+    """Undo _allocate_note_ids when the shard write failed, so no directory row points at nothing"""
+    if NOTE_SHARDS == 1:
+        return
+    directory = connect(DB_NAME)
+    directory.executemany("DELETE FROM note_directory WHERE id = ?", [(note_id,) for note_id in ids])
+    directory.commit()
+    directory.close()
+
+def create_note(title: str, content: str, user_id: int):
+    ids = _allocate_note_ids(user_id, 1)
+    conn = _connect_user_notes(user_id)
+    cursor = conn.cursor()
+    try:
+        stored, codec = encode_content(content)
+        cursor.execute(
+            "INSERT INTO notes (id, title, content, content_codec, content_bytes, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (ids[0], title, stored, codec, len(content.encode("utf-8")), user_id),
+        )
+        note_id = cursor.lastrowid
+        _record_revision(cursor, note_id, title, content)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.close()
+        _release_note_ids(ids)
+        raise
+    cursor.execute("SELECT id, title, content, created_at, user_id, version, content_codec FROM notes WHERE id = ?", (note_id,))
+    row = _decode_note_row(cursor.fetchone())
     conn.close()
     return row
 
+def create_notes_batch(user_id: int, notes: list):
+    """Insert (title, content) pairs for one user in a single transaction; returns the new ids"""
+    ids = _allocate_note_ids(user_id, len(notes))
+    conn = _connect_user_notes(user_id)
+    cursor = conn.cursor()
+    created = []
+    try:
+        for note_id, (title, content) in zip(ids, notes):
+            stored, codec = encode_content(content)
+            cursor.execute(
+                "INSERT INTO notes (id, title, content, content_codec, content_bytes, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (note_id, title, stored, codec, len(content.encode("utf-8")), user_id),
+            )
+            created.append(cursor.lastrowid)
+            _insert_revision(cursor, created[-1], 1, title, content)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        _release_note_ids(ids)
+        raise
+    finally:
+        conn.close()
+    return created
+
 def create_user(username: str, password: str, is_admin: int = 0):
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
     try:
         cursor.execute("INSERT INTO users (username, password, is_admin) VALUES (?, ?, ?)", (username, password, is_admin))
@@ -66,23 +506,23 @@ def create_user(username: str, password: str, is_admin: int = 0):
     return user_id
 
 def list_users():
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, username, is_admin FROM users")
+    cursor.execute("SELECT id, username, is_admin FROM users WHERE deleted_at IS NULL")
     users = cursor.fetchall()
     conn.close()
     return users
 
 def get_user_by_id(user_id: int):
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, username, is_admin FROM users WHERE id = ?", (user_id,))
+    cursor.execute("SELECT id, username, is_admin FROM users WHERE id = ? AND deleted_at IS NULL", (user_id,))
     user = cursor.fetchone()
     conn.close()
     return user
 
 def delete_user(user_id: int):
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
     cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
     conn.commit()
@@ -91,63 +531,224 @@ def delete_user(user_id: int):
     return deleted
 
 def get_user(username: str):
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, username, password, is_admin FROM users WHERE username = ?", (username,))
+    cursor.execute("SELECT id, username, password, is_admin FROM users WHERE username = ? AND deleted_at IS NULL", (username,))
     user = cursor.fetchone()
     conn.close()
     return user
 
-def get_notes(user_id: int = None):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+def _content_column(preview: int = None, include_content: bool = True, table: str = ""):
+    """SQL expression and params for the content column of note listings"""
+    prefix = f"{table}." if table else ""
+    if not include_content:
+        return "NULL", ()
+    if preview:
+        # Compressed rows are truncated after decoding
+        return (f"CASE WHEN {prefix}content_codec = 0 THEN substr({prefix}content, 1, ?) ELSE {prefix}content END",
+                (preview,))
+    return f"{prefix}content", ()
+
+def get_notes(user_id: int = None, preview: int = None, include_content: bool = True):
+    """Get notes, optionally with content truncated to `preview` characters or left out"""
+    content_sql, params = _content_column(preview, include_content)
     if user_id:
-        cursor.execute("SELECT id, title, content, created_at FROM notes WHERE user_id = ? ORDER BY created_at DESC", (user_id,))
-    else:
-        cursor.execute("SELECT id, title, content, created_at FROM notes ORDER BY created_at DESC")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+        conn = _connect_user_notes(user_id)
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, title, {content_sql}, created_at, content_codec FROM notes WHERE user_id = ? ORDER BY created_at DESC", params + (user_id,))
+        rows = [_decode_note_row(row, preview) for row in cursor.fetchall()]
+        conn.close()
+        return rows
+
+    def query(path):
+        conn = connect(path)
+        rows = conn.execute(f"SELECT id, title, {content_sql}, created_at, content_codec FROM notes ORDER BY created_at DESC", params).fetchall()
+        conn.close()
+        return [_decode_note_row(row, preview) for row in rows]
+
+    return _merge_newest_first(_scatter(query))
 
 def get_note(note_id: int):
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect_note(note_id)
+    if conn is None:
+        return None
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, content, created_at, user_id FROM notes WHERE id = ?", (note_id,))
-    row = cursor.fetchone()
+    cursor.execute("SELECT id, title, content, created_at, user_id, version, content_codec FROM notes WHERE id = ?", (note_id,))
+    row = _decode_note_row(cursor.fetchone())
     conn.close()
     return row
 
 def update_note(note_id: int, title: str, content: str):
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect_note(note_id)
+    if conn is None:
+        return None
+    conn.isolation_level = None
     cursor = conn.cursor()
-    cursor.execute("UPDATE notes SET title = ?, content = ? WHERE id = ?", (title, content, note_id))
-    conn.commit()
-    cursor.execute("SELECT id, title, content, created_at, user_id FROM notes WHERE id = ?", (note_id,))
-    row = cursor.fetchone()
-    conn.close()
+    try:
+        # Read the content being replaced under the write lock, so a concurrent
+        # update cannot slip in between and leave a revision delta on the wrong base
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT title, content, content_codec FROM notes WHERE id = ?", (note_id,))
+        previous = cursor.fetchone()
+        if not previous:
+            cursor.execute("ROLLBACK")
+            return None
+        stored, codec = encode_content(content)
+        cursor.execute(
+            "UPDATE notes SET title = ?, content = ?, content_codec = ?, content_bytes = ?, version = version + 1 WHERE id = ?",
+            (title, stored, codec, len(content.encode("utf-8")), note_id),
+        )
+        _record_revision(cursor, note_id, title, content, (previous[0], decode_content(previous[1], previous[2])))
+        cursor.execute("COMMIT")
+        cursor.execute("SELECT id, title, content, created_at, user_id, version, content_codec FROM notes WHERE id = ?", (note_id,))
+        row = _decode_note_row(cursor.fetchone())
+    except Exception:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
     return row
 
+def patch_note(note_id: int, expected_version: int, edits, title: str = None):
+    """Apply text edits to a note if it is still at expected_version.
+
+    Edit offsets and the returned content_length count UTF-16 code units.
+    Returns (id, title, created_at, user_id, version, content_length), None if the
+    note does not exist, or raises VersionConflict / ValueError.
+    """
+    conn = _connect_note(note_id)
+    if conn is None:
+        return None
+    conn.isolation_level = None
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT title, content, content_codec, version FROM notes WHERE id = ?", (note_id,))
+        current = cursor.fetchone()
+        if not current:
+            cursor.execute("ROLLBACK")
+            return None
+        if current[3] != expected_version:
+            raise VersionConflict(current[3])
+        old_content = decode_content(current[1], current[2])
+        content = apply_edits(old_content, edits)
+        new_title = current[0] if title is None else title
+        stored, codec = encode_content(content)
+        cursor.execute(
+            "UPDATE notes SET title = ?, content = ?, content_codec = ?, content_bytes = ?, version = version + 1 WHERE id = ?",
+            (new_title, stored, codec, len(content.encode("utf-8")), note_id),
+        )
+        _record_revision(cursor, note_id, new_title, content, (current[0], old_content))
+        cursor.execute("COMMIT")
+        cursor.execute("SELECT id, title, created_at, user_id, version FROM notes WHERE id = ?", (note_id,))
+        row = cursor.fetchone()
+    except Exception:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return row + (utf16_length(content),)
+
 def delete_note(note_id: int):
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect_note(note_id)
+    if conn is None:
+        return 0
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+    deleted = cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,)).rowcount
+    # Notes written before revision history have no revisions, so only the notes row counts
+    cursor.execute("DELETE FROM note_revisions WHERE note_id = ?", (note_id,))
     conn.commit()
-    deleted = cursor.rowcount
     conn.close()
+    if deleted and NOTE_SHARDS > 1:
+        directory = connect(DB_NAME)
+        directory.execute("DELETE FROM note_directory WHERE id = ?", (note_id,))
+        directory.commit()
+        directory.close()
     return deleted
 
+# --- Note revisions ---
+def _insert_revision(cursor, note_id: int, revision: int, title: str, content: str, base: str = None):
+    if base is None or is_snapshot_revision(revision):
+        data, codec = encode_content(content)
+        is_snapshot = 1
+    else:
+        data, codec = encode_content(make_delta(base, content))
+        is_snapshot = 0
+    cursor.execute(
+        "INSERT INTO note_revisions (note_id, revision, title, is_snapshot, data, data_codec) VALUES (?, ?, ?, ?, ?, ?)",
+        (note_id, revision, title, is_snapshot, data, codec),
+    )
+
+def _record_revision(cursor, note_id: int, title: str, content: str, previous: tuple = None):
+    """Append a revision inside the caller's transaction; previous is the (title, content) being replaced"""
+    cursor.execute("SELECT MAX(revision) FROM note_revisions WHERE note_id = ?", (note_id,))
+    last = cursor.fetchone()[0] or 0
+    if last == 0 and previous is not None:
+        # The note predates revision history: keep what is being overwritten as revision 1
+        _insert_revision(cursor, note_id, 1, previous[0], previous[1])
+        last = 1
+    _insert_revision(cursor, note_id, last + 1, title, content, previous[1] if previous else None)
+    return last + 1
+
+def list_note_revisions(note_id: int):
+    """Revision metadata for a note, newest first: (id, revision, title, is_snapshot, stored_bytes, created_at)"""
+    conn = _connect_note(note_id)
+    if conn is None:
+        return []
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, revision, title, is_snapshot, length(data), created_at
+        FROM note_revisions WHERE note_id = ? ORDER BY revision DESC
+    """, (note_id,))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def get_note_revision(note_id: int, revision_id: int):
+    """Rebuild one revision: (id, revision, title, content, created_at), or None"""
+    conn = _connect_note(note_id)
+    if conn is None:
+        return None
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, revision, title, created_at FROM note_revisions WHERE id = ? AND note_id = ?",
+        (revision_id, note_id),
+    )
+    target = cursor.fetchone()
+    if not target:
+        conn.close()
+        return None
+    # Nearest snapshot at or before the target, then at most SNAPSHOT_INTERVAL - 1 deltas
+    cursor.execute("""
+        SELECT revision, is_snapshot, data, data_codec FROM note_revisions
+        WHERE note_id = ? AND revision <= ? AND revision >= (
+            SELECT MAX(revision) FROM note_revisions
+            WHERE note_id = ? AND revision <= ? AND is_snapshot = 1
+        )
+        ORDER BY revision
+    """, (note_id, target[1], note_id, target[1]))
+    chain = cursor.fetchall()
+    conn.close()
+    content = None
+    for _, is_snapshot, data, codec in chain:
+        data = decode_content(data, codec)
+        content = data if is_snapshot else apply_delta(content, data)
+    return (target[0], target[1], target[2], content, target[3])
+
 def get_users():
     """Get all users from the database"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, username, password, is_admin FROM users ORDER BY username")
+    cursor.execute("SELECT id, username, password, is_admin FROM users WHERE deleted_at IS NULL ORDER BY username")
     rows = cursor.fetchall()
     conn.close()
     return rows
 
 def delete_user(user_id: int):
     """Delete a user by ID"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
     cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
     conn.commit()
@@ -157,27 +758,350 @@ def delete_user(user_id: int):
 
 def delete_user_notes(user_id: int):
     """Delete all notes belonging to a user"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = _connect_user_notes(user_id)
     cursor = conn.cursor()
+    cursor.execute("DELETE FROM note_revisions WHERE note_id IN (SELECT id FROM notes WHERE user_id = ?)", (user_id,))
     cursor.execute("DELETE FROM notes WHERE user_id = ?", (user_id,))
     conn.commit()
     deleted_count = cursor.rowcount
     conn.close()
+    if NOTE_SHARDS > 1:
+        directory = connect(DB_NAME)
+        directory.execute("DELETE FROM note_directory WHERE user_id = ?", (user_id,))
+        directory.commit()
+        directory.close()
     return deleted_count
 
-def get_all_notes():
-    """Get all notes from all users (admin function)"""
-    conn = sqlite3.connect(DB_NAME)
+def mark_user_deleted(user_id: int):
+    """Hide a user from logins and listings until their notes are purged"""
+    conn = connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT n.id, n.title, n.content, n.created_at, n.user_id 
-        FROM notes n 
-        ORDER BY n.created_at DESC
-    """)
-    rows = cursor.fetchall()
+    cursor.execute("UPDATE users SET deleted_at = CURRENT_TIMESTAMP WHERE id = ? AND deleted_at IS NULL", (user_id,))
+    conn.commit()
+    marked = cursor.rowcount > 0
+    conn.close()
+    return marked
+
+def list_deleted_users():
+    """Ids of users marked deleted whose purge has not finished"""
+    conn = connect(DB_NAME)
+    rows = conn.execute("SELECT id FROM users WHERE deleted_at IS NOT NULL ORDER BY id").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+def count_user_notes(user_id: int):
+    conn = _connect_user_notes(user_id)
+    count = conn.execute("SELECT COUNT(*) FROM notes WHERE user_id = ?", (user_id,)).fetchone()[0]
+    conn.close()
+    return count
+
+def delete_user_notes_batch(user_id: int, limit: int):
+    """Delete up to `limit` of a user's notes in one short transaction; returns how many went"""
+    conn = _connect_user_notes(user_id)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM notes WHERE user_id = ? LIMIT ?", (user_id, limit))
+    note_ids = [row[0] for row in cursor.fetchall()]
+    if not note_ids:
+        cursor.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,))
+        conn.commit()
+        conn.close()
+        return 0
+    marks = ", ".join("?" for _ in note_ids)
+    cursor.execute(f"DELETE FROM note_revisions WHERE note_id IN ({marks})", note_ids)
+    cursor.execute(f"DELETE FROM notes WHERE id IN ({marks})", note_ids)
+    conn.commit()
+    conn.close()
+    if NOTE_SHARDS > 1:
+        directory = connect(DB_NAME)
+        directory.execute(f"DELETE FROM note_directory WHERE id IN ({marks})", note_ids)
+        directory.commit()
+        directory.close()
+    return len(note_ids)
+
+def get_user_stats(user_id: int):
+    """(note_count, total_content_bytes, last_note_at) for one user"""
+    conn = _connect_user_notes(user_id)
+    row = conn.execute(
+        "SELECT note_count, total_content_bytes, last_note_at FROM user_stats WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    conn.close()
+    return row or (0, 0, None)
+
+def get_all_user_stats():
+    """user_id -> (note_count, total_content_bytes, last_note_at) for every user with notes"""
+    def query(path):
+        conn = connect(path)
+        rows = conn.execute("SELECT user_id, note_count, total_content_bytes, last_note_at FROM user_stats").fetchall()
+        conn.close()
+        return rows
+
+    return {row[0]: row[1:] for rows in _scatter(query) for row in rows}
+
+# --- Admin listings: filtered, keyset-paginated ---
+# Pages are ordered by an indexed sort column with id as the tie breaker and
+# continue after the (sort value, id) of the previous page's last row.
+USER_SORT_KEYS = ("id", "username")
+NOTE_SORT_KEYS = ("created_at", "id", "title")
+
+def _like_pattern(text: str) -> str:
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def _keyset(sort: str, descending: bool, after, table: str = ""):
+    """ORDER BY clause plus the WHERE condition and params that continue after a row"""
+    prefix = f"{table}." if table else ""
+    direction = "DESC" if descending else "ASC"
+    order = f"ORDER BY {prefix}{sort} {direction}" + (f", {prefix}id {direction}" if sort != "id" else "")
+    if after is None:
+        return order, None, ()
+    op = "<" if descending else ">"
+    if sort == "id":
+        return order, f"{prefix}id {op} ?", (after[1],)
+    return order, f"({prefix}{sort}, {prefix}id) {op} (?, ?)", tuple(after)
+
+def _user_filters(q: str = None, is_admin: bool = None):
+    where, params = ["deleted_at IS NULL"], []
+    if q:
+        # Prefix match on the UNIQUE(username) index
+        where.append("username >= ? AND username < ?")
+        params += [q, q + "\U0010ffff"]
+    if is_admin is not None:
+        where.append("COALESCE(is_admin, 0) = ?")
+        params.append(1 if is_admin else 0)
+    return where, params
+
+def list_users_page(q: str = None, is_admin: bool = None, sort: str = "id", descending: bool = False,
+                    after=None, limit: int = 100):
+    """One page of (id, username, is_admin) rows; `after` is the (sort value, id) of the last row seen"""
+    where, params = _user_filters(q, is_admin)
+    order, condition, keyset_params = _keyset(sort, descending, after)
+    if condition:
+        where.append(condition)
+        params += keyset_params
+    conn = connect(DB_NAME)
+    rows = conn.execute(
+        f"SELECT id, username, is_admin FROM users WHERE {' AND '.join(where)} {order} LIMIT ?",
+        params + [limit],
+    ).fetchall()
     conn.close()
     return rows
 
+def count_users(q: str = None, is_admin: bool = None):
+    where, params = _user_filters(q, is_admin)
+    conn = connect(DB_NAME)
+    count = conn.execute(f"SELECT COUNT(*) FROM users WHERE {' AND '.join(where)}", params).fetchone()[0]
+    conn.close()
+    return count
+
+def get_user_ids(username: str):
+    """Ids of users with exactly this username (empty when there is none)"""
+    conn = connect(DB_NAME)
+    rows = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+def get_user_stats_many(user_ids):
+    """user_id -> (note_count, total_content_bytes, last_note_at), reading only the shards involved"""
+    by_path = {}
+    for user_id in set(user_ids):
+        by_path.setdefault(shard_path(shard_for_user(user_id)), []).append(user_id)
+    result = {}
+    for path, ids in by_path.items():
+        conn = connect(path)
+        rows = conn.execute(
+            f"SELECT user_id, note_count, total_content_bytes, last_note_at FROM user_stats "
+            f"WHERE user_id IN ({', '.join('?' for _ in ids)})", ids
+        ).fetchall()
+        conn.close()
+        result.update({row[0]: row[1:] for row in rows})
+    return result
+
+def _note_filters(user_id: int = None, q: str = None, created_from: str = None, created_to: str = None):
+    """WHERE conditions on the notes table aliased as n"""
+    where, params = [], []
+    if user_id is not None:
+        where.append("n.user_id = ?")
+        params.append(user_id)
+    if q:
+        # Titles only: content may be stored compressed
+        where.append("n.title LIKE ? ESCAPE '\\'")
+        params.append(_like_pattern(q))
+    if created_from:
+        where.append("n.created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        where.append("n.created_at < ?")
+        params.append(created_to)
+    return where, params
+
+def _users_table(conn, path: str) -> str:
+    """Name to join users by: shards reach it by attaching the main database"""
+    if path == DB_NAME:
+        return "users"
+    conn.execute("ATTACH DATABASE ? AS accounts", (DB_NAME,))
+    return "accounts.users"
+
+def _iter_shard_notes(path: str, sql: str, params: tuple, preview: int, batch_size: int):
+    # check_same_thread=False: streaming responses may resume the generator on another thread
+    conn = connect(path, check_same_thread=False)
+    try:
+        cursor = conn.execute(sql.format(users=_users_table(conn, path)), params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield _decode_note_row(row, preview)
+    finally:
+        conn.close()
+
+def iter_notes_with_usernames(user_id: int = None, q: str = None, created_from: str = None, created_to: str = None,
+                              sort: str = "created_at", descending: bool = True, after=None, limit: int = None,
+                              preview: int = None, include_content: bool = False, batch_size: int = 500):
+    """Yield (id, title, content, created_at, user_id, username) rows in sort order.
+
+    Usernames come from a JOIN, so password hashes are never read, and rows
+    are fetched `batch_size` at a time from each shard involved.
+    """
+    content_sql, content_params = _content_column(preview, include_content, table="n")
+    where, params = _note_filters(user_id, q, created_from, created_to)
+    order, condition, keyset_params = _keyset(sort, descending, after, table="n")
+    if condition:
+        where.append(condition)
+        params += keyset_params
+    sql = (f"SELECT n.id, n.title, {content_sql}, n.created_at, n.user_id, u.username, n.content_codec "
+           f"FROM notes n LEFT JOIN {{users}} u ON u.id = n.user_id "
+           f"{'WHERE ' + ' AND '.join(where) if where else ''} {order}"
+           + (" LIMIT ?" if limit is not None else ""))
+    params = content_params + tuple(params) + ((limit,) if limit is not None else ())
+
+    if user_id is not None:
+        paths = [shard_path(shard_for_user(user_id))]
+    else:
+        paths = [shard_path(i) for i in range(NOTE_SHARDS)]
+    streams = [_iter_shard_notes(path, sql, params, preview, batch_size) for path in paths]
+    if len(streams) == 1:
+        rows = streams[0]
+    else:
+        sort_index = {"id": 0, "title": 1, "created_at": 3}[sort]
+        rows = heapq.merge(*streams, key=lambda row: (row[sort_index] or "", row[0]) if sort != "id" else row[0],
+                           reverse=descending)
+    yield from itertools.islice(rows, limit)
+
+def list_notes_page(limit: int = 100, **filters):
+    """One page of (id, title, content, created_at, user_id, username) rows"""
+    return list(iter_notes_with_usernames(limit=limit, batch_size=limit, **filters))
+
+def count_notes(user_id: int = None, q: str = None, created_from: str = None, created_to: str = None):
+    where, params = _note_filters(user_id, q, created_from, created_to)
+    sql = f"SELECT COUNT(*) FROM notes n {'WHERE ' + ' AND '.join(where) if where else ''}"
+
+    def query(path):
+        conn = connect(path)
+        count = conn.execute(sql, params).fetchone()[0]
+        conn.close()
+        return count
+
+    if user_id is not None:
+        return query(shard_path(shard_for_user(user_id)))
+    return sum(_scatter(query))
+
+def get_all_notes(preview: int = None, include_content: bool = True):
+    """Get all notes from all users (admin function), reading every shard in parallel"""
+    content_sql, params = _content_column(preview, include_content)
+
+    def query(path):
+        conn = connect(path)
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT n.id, n.title, {content_sql}, n.created_at, n.user_id, n.content_codec
+            FROM notes n 
+            ORDER BY n.created_at DESC
+        """, params)
+        rows = [_decode_note_row(row, preview) for row in cursor.fetchall()]
+        conn.close()
+        return rows
+
+    return _merge_newest_first(_scatter(query))
+
+# --- Import jobs ---
+# queued -> running -> done | failed; a queued job nobody uploads to becomes
+# expired, and one running when its worker stopped becomes interrupted.
+_IMPORT_JOB_COLUMNS = ("id", "user_id", "status", "total", "done", "error", "result", "created_at", "finished_at")
+
+def _import_job(row):
+    if row is None:
+        return None
+    job = dict(zip(_IMPORT_JOB_COLUMNS, row))
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+def create_import_job(user_id: int, expire_before: float):
+    """Queue an import for the user; returns (new job id, None) or (None, id of the import already open)"""
+    conn = connect(DB_NAME, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        conn.execute(
+            "UPDATE import_jobs SET status = 'expired', error = 'no upload received', finished_at = ? "
+            "WHERE user_id = ? AND status = 'queued' AND created_at < ?",
+            (now, user_id, expire_before),
+        )
+        row = conn.execute(
+            "SELECT id FROM import_jobs WHERE user_id = ? AND status IN ('queued', 'running')", (user_id,)
+        ).fetchone()
+        if row:
+            conn.execute("COMMIT")
+            return None, row[0]
+        job_id = conn.execute("INSERT INTO import_jobs (user_id, created_at) VALUES (?, ?)", (user_id, now)).lastrowid
+        conn.execute("COMMIT")
+        return job_id, None
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        conn.close()
+
+def get_import_job(job_id: int):
+    conn = connect(DB_NAME)
+    row = conn.execute(f"SELECT {', '.join(_IMPORT_JOB_COLUMNS)} FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return _import_job(row)
+
+def claim_import_job(job_id: int, user_id: int) -> bool:
+    """Move a queued import to running; False if it is not the user's or no longer queued"""
+    conn = connect(DB_NAME)
+    cursor = conn.execute(
+        "UPDATE import_jobs SET status = 'running' WHERE id = ? AND user_id = ? AND status = 'queued'",
+        (job_id, user_id),
+    )
+    conn.commit()
+    claimed = cursor.rowcount > 0
+    conn.close()
+    return claimed
+
+def save_import_job(job: dict):
+    """Store the progress and outcome of a job dict (jobs.Job.as_dict())"""
+    conn = connect(DB_NAME)
+    conn.execute(
+        "UPDATE import_jobs SET status = ?, total = ?, done = ?, error = ?, result = ?, finished_at = ? WHERE id = ?",
+        (job["status"], job["total"], job["done"], job["error"],
+         json.dumps(job["result"]) if job["result"] is not None else None, job["finished_at"], job["id"]),
+    )
+    conn.commit()
+    conn.close()
+
+def interrupt_import_jobs():
+    """At startup: imports still running belonged to a worker that has stopped"""
+    conn = connect(DB_NAME)
+    cursor = conn.execute(
+        "UPDATE import_jobs SET status = 'interrupted', error = 'the server restarted during the upload', "
+        "finished_at = ? WHERE status = 'running'",
+        (time.time(),),
+    )
+    conn.commit()
+    interrupted = cursor.rowcount
+    conn.close()
+    return interrupted
+
 if __name__ == "__main__":
     create_database()
     print("Database and table created successfully.")
\ No newline at end of file
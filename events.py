@@ -0,0 +1,326 @@
+"""
+Publish/subscribe bus for note and user mutation events.
+
+CRUD handlers publish events; caches and push endpoints subscribe. Local
+subscribers are called synchronously on publish, and the transport carries
+the event to the other workers, whose subscribers run when it arrives.
+
+Transports (NOTES_EVENT_BUS):
+  inprocess            single worker, nothing leaves the process (default)
+  unix:<directory>     one datagram socket per worker in a shared directory
+  sqlite:<path>        shared table polled by every worker
+  redis://host:port/0  Redis PUBLISH/SUBSCRIBE (any RESP-speaking server);
+                       unix: or sqlite: stand in for it on a single machine
+"""
+import asyncio
+import glob
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import metrics
+from resp import encode_command, read_reply
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+CHANNEL = "notes-app-events"
+
+
+class InProcessTransport:
+    async def start(self, deliver):
+        pass
+
+    def send(self, data: bytes):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class UnixSocketTransport:
+    """Datagram sockets in a shared directory; each worker sends to all the others"""
+
+    MAX_DATAGRAM = 200_000
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = None
+        self.sock = None
+
+    async def start(self, deliver):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"worker-{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.sock.setblocking(False)
+
+        def on_readable():
+            while True:
+                try:
+                    data = self.sock.recv(self.MAX_DATAGRAM)
+                except BlockingIOError:
+                    return
+                deliver(data)
+
+        asyncio.get_running_loop().add_reader(self.sock.fileno(), on_readable)
+
+    def send(self, data: bytes):
+        if self.sock is None:
+            return
+        for peer in glob.glob(os.path.join(self.directory, "worker-*.sock")):
+            if peer == self.path:
+                continue
+            try:
+                self.sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker exited without cleaning up its socket
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except (BlockingIOError, OSError):
+                metrics.incr("events.send_failed")
+
+    async def stop(self):
+        if self.sock is not None:
+            asyncio.get_running_loop().remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class SQLiteTransport:
+    """Events appended to a shared table and polled by every worker.
+
+    send() only queues the event; a writer task inserts queued events in
+    batches on the default executor, so publishing never waits on the file.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.2, retention_seconds: float = 60):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.last_id = 0
+        self._local = threading.local()
+        self._queue = None
+        self._tasks = []
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+        return conn
+
+    async def start(self, deliver):
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bus_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                body BLOB NOT NULL
+            )
+        """)
+        conn.commit()
+        self.last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bus_events").fetchone()[0]
+        self._queue = asyncio.Queue(maxsize=10000)
+        self._tasks = [
+            asyncio.create_task(self._poll(deliver)),
+            asyncio.create_task(self._writer()),
+        ]
+
+    def _fetch(self):
+        return self._connection().execute(
+            "SELECT id, body FROM bus_events WHERE id > ? ORDER BY id", (self.last_id,)
+        ).fetchall()
+
+    def _insert(self, batch):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.executemany("INSERT INTO bus_events (created_at, body) VALUES (?, ?)", [(now, data) for data in batch])
+            conn.execute("DELETE FROM bus_events WHERE created_at < ?", (now - self.retention_seconds,))
+
+    async def _poll(self, deliver):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                rows = await loop.run_in_executor(None, self._fetch)
+            except sqlite3.Error:
+                metrics.incr("events.poll_failed")
+                continue
+            for event_id, body in rows:
+                self.last_id = event_id
+                deliver(body)
+
+    def _take_queued(self):
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()] + self._take_queued()
+            try:
+                await loop.run_in_executor(None, self._insert, batch)
+            except sqlite3.Error:
+                metrics.incr("events.send_failed", len(batch))
+
+    def send(self, data: bytes):
+        if self._queue is None:
+            self._insert([data])  # not started (scripts): no event loop to hold up
+            return
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            metrics.incr("events.send_failed")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._queue is not None:
+            # Events published during shutdown still reach the other workers
+            batch = self._take_queued()
+            if batch:
+                await asyncio.get_running_loop().run_in_executor(None, self._insert, batch)
+            self._queue = None
+
+
+class RedisTransport:
+    """PUBLISH/SUBSCRIBE over a minimal RESP client"""
+
+    def __init__(self, url: str, channel: str = CHANNEL):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.channel = channel
+        self._queue = None
+        self._tasks = []
+
+    async def start(self, deliver):
+        self._queue = asyncio.Queue(maxsize=10000)
+        self._tasks = [
+            asyncio.create_task(self._subscriber(deliver)),
+            asyncio.create_task(self._publisher()),
+        ]
+
+    async def _subscriber(self, deliver):
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                writer.write(encode_command("SUBSCRIBE", self.channel))
+                await writer.drain()
+                while True:
+                    message = await read_reply(reader)
+                    if isinstance(message, list) and message[0] == b"message":
+                        deliver(message[2])
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                metrics.incr("events.reconnects")
+                await asyncio.sleep(1)
+            finally:
+                # Close the dropped connection before opening the next one
+                if writer is not None:
+                    writer.close()
+
+    async def _publisher(self):
+        writer = None
+        while True:
+            data = await self._queue.get()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                writer.write(encode_command("PUBLISH", self.channel, data))
+                await writer.drain()
+                await read_reply(reader)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                metrics.incr("events.send_failed")
+                if writer is not None:
+                    writer.close()
+                writer = None
+
+    def send(self, data: bytes):
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            metrics.incr("events.send_failed")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+
+def transport_from_env():
+    spec = os.environ.get("NOTES_EVENT_BUS", "inprocess")
+    if spec.startswith("unix:"):
+        return UnixSocketTransport(spec[len("unix:"):])
+    if spec.startswith("sqlite:"):
+        return SQLiteTransport(spec[len("sqlite:"):])
+    if spec.startswith("redis://"):
+        return RedisTransport(spec)
+    return InProcessTransport()
+
+
+class EventBus:
+    def __init__(self, transport=None):
+        self.transport = transport or InProcessTransport()
+        self._handlers = {}  # topic prefix -> list of callables
+
+    def subscribe(self, topic: str, handler):
+        """Call handler(topic, payload) for events whose topic starts with `topic`"""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def _dispatch(self, topic: str, payload: dict):
+        for prefix, handlers in self._handlers.items():
+            if topic.startswith(prefix):
+                for handler in handlers:
+                    try:
+                        handler(topic, payload)
+                    except Exception as e:
+                        metrics.incr("events.handler_errors")
+                        print(f"Event handler error for {topic}: {e}")
+
+    def publish(self, topic: str, payload: dict):
+        """Deliver to local subscribers now and to other workers through the transport"""
+        metrics.incr("events.published")
+        self._dispatch(topic, payload)
+        data = json.dumps({"origin": WORKER_ID, "topic": topic, "payload": payload}).encode()
+        try:
+            self.transport.send(data)
+        except Exception as e:
+            metrics.incr("events.send_failed")
+            print(f"Event bus send error: {e}")
+
+    def _deliver(self, data: bytes):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        if event.get("origin") == WORKER_ID:
+            return
+        metrics.incr("events.received")
+        self._dispatch(event["topic"], event["payload"])
+
+    async def start(self):
+        await self.transport.start(self._deliver)
+
+    async def stop(self):
+        await self.transport.stop()
+
+
+event_bus = EventBus(transport_from_env())
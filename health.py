@@ -0,0 +1,98 @@
+"""
+Liveness and readiness.
+
+/livez only shows the process is serving requests. /readyz checks what a
+load balancer should route on:
+
+  database    a round trip to every database file, timed from the event
+              loop (so it includes waiting for a free executor thread);
+              over NOTES_READY_DB_MS, or failing, is not ready
+  pools       queued work in the default and hash pools (pools.py); more
+              than NOTES_READY_MAX_QUEUE / NOTES_READY_MAX_HASH_QUEUE is
+              not ready
+  event loop  lag measured by monitor_loop_lag(); over
+              NOTES_READY_LOOP_LAG_MS is not ready
+  shutdown    not ready as soon as shutdown starts, so traffic drains
+
+The report is computed at most once per NOTES_READY_CACHE_MS however many
+probes arrive, and probe requests are left out of request metrics, so
+probing adds no load and does not count as traffic.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+import database
+import metrics
+import pools
+from coalesce import single_flight
+
+CACHE_SECONDS = int(os.environ.get("NOTES_READY_CACHE_MS", "1000")) / 1000
+DB_BUDGET_SECONDS = int(os.environ.get("NOTES_READY_DB_MS", "500")) / 1000
+LOOP_LAG_BUDGET_SECONDS = int(os.environ.get("NOTES_READY_LOOP_LAG_MS", "500")) / 1000
+MAX_QUEUE = int(os.environ.get("NOTES_READY_MAX_QUEUE", "64"))
+MAX_HASH_QUEUE = int(os.environ.get("NOTES_READY_MAX_HASH_QUEUE", "16"))
+DB_TIMEOUT_SECONDS = 2.0
+LOOP_LAG_INTERVAL = 0.25
+PROBE_PATHS = ("/livez", "/readyz", "/health")
+
+draining = False
+_loop_lag = deque(maxlen=8)  # recent samples, about two seconds
+
+
+async def monitor_loop_lag():
+    """Lifespan task: how late the loop wakes a sleeper, i.e. how long callbacks wait to run"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL)
+        _loop_lag.append(lag)
+        metrics.set_gauge("loop.lag_seconds", round(lag, 4))
+
+
+def _ping_databases():
+    for path in database.database_files():
+        conn = database.connect(path, timeout=DB_TIMEOUT_SECONDS)
+        try:
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        finally:
+            conn.close()
+
+
+async def _check_database() -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(None, _ping_databases), DB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"no answer within {DB_TIMEOUT_SECONDS:.0f}s"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    seconds = time.perf_counter() - started
+    return {"ok": seconds <= DB_BUDGET_SECONDS, "latency_ms": round(seconds * 1000, 2)}
+
+
+@single_flight(ttl=CACHE_SECONDS)
+async def readiness():
+    """(ready, report)"""
+    checks = {"database": await _check_database()}
+
+    pool_stats = pools.stats()
+    for name, limit in (("default", MAX_QUEUE), ("hash", MAX_HASH_QUEUE)):
+        if name in pool_stats:
+            checks[f"{name}_pool"] = {"ok": pool_stats[name]["queued"] <= limit, **pool_stats[name]}
+
+    lag = max(_loop_lag, default=0.0)
+    checks["event_loop"] = {"ok": lag <= LOOP_LAG_BUDGET_SECONDS, "lag_ms": round(lag * 1000, 2)}
+    checks["shutdown"] = {"ok": not draining}
+
+    failing = [name for name, check in checks.items() if not check["ok"]]
+    metrics.set_gauge("ready", 0 if failing else 1)
+    report = {
+        "status": "not ready" if failing else "ready",
+        "failing": failing,
+        "checked_at": time.time(),
+        "checks": checks,
+    }
+    return not failing, report
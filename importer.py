@@ -0,0 +1,163 @@
+"""
+Bulk note import from a streamed upload.
+
+  ndjson   one {"title": ..., "content": ...} object per line
+  zip      Markdown files (.md, .markdown); the title is the first "# "
+           heading, or the file name when there is none
+
+The body is consumed as it arrives. NDJSON lines are parsed chunk by
+chunk; a zip keeps its index at the end, so it is spooled to a temporary
+file and then read one member at a time. Valid records are inserted
+NOTES_IMPORT_BATCH_SIZE at a time, one transaction per batch. Database
+and file work runs in the default executor. Memory holds one batch and one record (records over
+NOTES_IMPORT_MAX_RECORD_KB are rejected) no matter how large the upload.
+
+Progress is kept on the job: done/total count bytes received, and result
+has imported/failed counts and the first MAX_ERRORS per-record errors.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import zipfile
+
+import database
+import metrics
+
+BATCH_SIZE = int(os.environ.get("NOTES_IMPORT_BATCH_SIZE", "500"))
+MAX_RECORD_BYTES = int(os.environ.get("NOTES_IMPORT_MAX_RECORD_KB", "1024")) * 1024
+MAX_ERRORS = 100
+
+CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/zip": "zip",
+    "application/x-zip-compressed": "zip",
+}
+
+
+def format_for(content_type: str):
+    """Import format for a Content-Type header, or None if it isn't one we read"""
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+def _ndjson_record(raw: bytes):
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    title, content = data.get("title"), data.get("content")
+    if not isinstance(title, str) or not isinstance(content, str):
+        raise ValueError('"title" and "content" must be strings')
+    return title, content
+
+
+def _markdown_record(name: str, raw: bytes):
+    text = raw.decode("utf-8-sig")
+    first, _, rest = text.partition("\n")
+    if first.startswith("# "):
+        return first[2:].strip(), rest.lstrip("\n")
+    stem = os.path.basename(name).rsplit(".", 1)[0]
+    return stem, text
+
+
+class _Batch:
+    def __init__(self, user_id: int, job, on_batch=None):
+        self.user_id = user_id
+        self.job = job
+        self.on_batch = on_batch
+        self.notes = []
+        job.result = {"imported": 0, "failed": 0, "errors": []}
+
+    def fail(self, record, error: str):
+        result = self.job.result
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_ERRORS:
+            result["errors"].append({"record": record, "error": error})
+
+    async def add(self, record, parse, *raw):
+        try:
+            note = parse(*raw)
+        except ValueError as e:  # includes JSON and UTF-8 decoding errors
+            self.fail(record, str(e))
+            return
+        self.notes.append(note)
+        if len(self.notes) >= BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        if not self.notes:
+            return
+        notes, self.notes = self.notes, []
+        ids = await asyncio.get_running_loop().run_in_executor(
+            None, database.create_notes_batch, self.user_id, notes
+        )
+        self.job.result["imported"] += len(ids)
+        metrics.incr("import.notes", len(ids))
+        if self.on_batch:
+            self.on_batch(ids)
+
+
+async def import_ndjson(chunks, user_id: int, job, on_batch=None):
+    batch = _Batch(user_id, job, on_batch)
+    buffer = bytearray()
+    line = 0
+    skipping = False  # inside a line already rejected as too large
+    async for chunk in chunks:
+        job.done += len(chunk)
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line += 1
+            raw = bytes(buffer[start:end])
+            start = end + 1
+            if skipping:
+                skipping = False
+            elif raw.strip():
+                await batch.add(line, _ndjson_record, raw)
+        del buffer[:start]
+        if len(buffer) > MAX_RECORD_BYTES:
+            if not skipping:
+                batch.fail(line + 1, f"record larger than {MAX_RECORD_BYTES} bytes")
+            skipping = True
+            buffer.clear()
+    if buffer.strip() and not skipping:
+        await batch.add(line + 1, _ndjson_record, bytes(buffer))
+    await batch.flush()
+
+
+async def import_zip(chunks, user_id: int, job, on_batch=None):
+    batch = _Batch(user_id, job, on_batch)
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryFile() as spool:
+        # Disk writes and decompression run in the default executor, off the event loop
+        async for chunk in chunks:
+            job.done += len(chunk)
+            await loop.run_in_executor(None, spool.write, chunk)
+        try:
+            archive = await loop.run_in_executor(None, zipfile.ZipFile, spool)
+        except zipfile.BadZipFile:
+            raise ValueError("upload is not a zip archive")
+        with archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue
+                if not name.lower().endswith((".md", ".markdown")):
+                    batch.fail(name, "not a Markdown file")
+                elif info.file_size > MAX_RECORD_BYTES:
+                    batch.fail(name, f"record larger than {MAX_RECORD_BYTES} bytes")
+                else:
+                    raw = await loop.run_in_executor(None, archive.read, info)
+                    await batch.add(name, _markdown_record, name, raw)
+    await batch.flush()
+
+
+async def run_import(fmt: str, chunks, user_id: int, job, on_batch=None):
+    """Job body: import one upload; `chunks` is an async iterator of bytes"""
+    importer = import_zip if fmt == "zip" else import_ndjson
+    await importer(chunks, user_id, job, on_batch)
+    metrics.incr(f"import.{fmt}.uploads")
+    print(f"Import for user {user_id}: {job.result['imported']} notes, {job.result['failed']} rejected")
@@ -0,0 +1,119 @@
+"""
+Background jobs for work too large to finish inside a request.
+
+A job is an asyncio task plus a small status record (queued, running,
+done, failed) with done/total progress that admin endpoints can poll.
+Blocking database work runs in the default executor in short steps, with
+a pause between steps so other writers get the lock.
+"""
+import asyncio
+import itertools
+import time
+
+import metrics
+
+
+class Job:
+    __slots__ = ("id", "kind", "target", "status", "total", "done", "error", "result", "created_at", "finished_at", "task")
+
+    def __init__(self, job_id: int, kind: str, target=None):
+        self.id = job_id
+        self.kind = kind
+        self.target = target
+        self.status = "queued"
+        self.total = None
+        self.done = 0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self, keep_finished: int = 100):
+        self.keep_finished = keep_finished
+        self._jobs = {}  # id -> Job, oldest first
+        self._ids = itertools.count(1)
+
+    def create(self, kind: str, target=None, job_id: int = None) -> Job:
+        """Register a queued job whose work is run later, with run(), by whoever holds it.
+
+        Pass job_id when ids come from elsewhere (a database table); keep such
+        jobs in a JobManager of their own so the two kinds of id cannot clash.
+        """
+        job = Job(job_id if job_id is not None else next(self._ids), kind, target)
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    async def run(self, job: Job, work):
+        """Run a created job's work in the calling task, so it is cancelled along with the caller"""
+        job.task = asyncio.current_task()
+        await self._run(job, work)
+
+    def start(self, kind: str, work, target=None) -> Job:
+        """Run `await work(job)` in the background and track it.
+
+        A job of the same kind and target that is still running is returned
+        instead of starting a second one.
+        """
+        for job in self._jobs.values():
+            if job.kind == kind and job.target == target and job.status in ("queued", "running"):
+                return job
+        job = self.create(kind, target)
+        job.task = asyncio.create_task(self._run(job, work))
+        return job
+
+    async def _run(self, job: Job, work):
+        job.status = "running"
+        metrics.incr(f"jobs.{job.kind}.started")
+        try:
+            await work(job)
+            job.status = "done"
+            metrics.incr(f"jobs.{job.kind}.done")
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            metrics.incr(f"jobs.{job.kind}.failed")
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished_at is not None]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: int):
+        return self._jobs.get(job_id)
+
+    def list(self, kind: str = None):
+        return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+    async def stop(self):
+        """Cancel unfinished jobs; resumable work is picked up again on the next start"""
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_manager = JobManager()
@@ -1,38 +1,111 @@
 # Realtime Notes App - Azure Deployment Ready
+import time
+_import_started = time.perf_counter()
+import asyncio
 import os
-from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import HTMLResponse, RedirectResponse, Response
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, HTTPException, Depends, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from cors import CORSEngine
+from compression import CompressionMiddleware
+from assets import StaticPage, static_assets
+from realtime import note_hub
+from events import event_bus
+from coalesce import single_flight
+from snapshots import Snapshot, refresh_loop
+from response_cache import cached, response_cache
+from jobs import JobManager, job_manager
+import backup
+import health
+import importer
+import maintenance
+import metrics
+import pools
+import replication
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from pydantic import BaseModel
-from passlib.context import CryptContext
-from jose import jwt, JWTError
+from pydantic import BaseModel, Field
+from typing import Optional
 from datetime import datetime, timedelta
-import uvicorn
+import base64
 import hashlib
+import json
+from collections import OrderedDict
 
 # --- Initialize database on startup ---
 from contextlib import asynccontextmanager
 
+# Default admin account, created once if missing (replaces running
+# create_simple_admin.py from start.sh on every boot)
+DEFAULT_ADMIN_USERNAME = os.environ.get("NOTES_ADMIN_USERNAME", "admin")
+DEFAULT_ADMIN_PASSWORD = os.environ.get("NOTES_ADMIN_PASSWORD", "admin123")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: one-shot schema check and admin seeding inside the app process
+    started = time.perf_counter()
+    # Same size as asyncio's own default executor, but counted for /readyz
+    pools.install_default_pool(asyncio.get_running_loop())
+    health.draining = False
+    replicating = False
+    if replication.REPLICA_DIR:
+        # Before the schema check, so a fresh local disk starts from the replica
+        try:
+            replication.restore()
+            replicating = True
+        except Exception as e:
+            # Don't let an empty local database overwrite a replica we couldn't read
+            print(f"Replica restore failed, replication disabled: {e}")
     print("Initializing database...")
     try:
-        from database import create_database
-        create_database()
+        from database import init_db, ensure_admin_user
+        if init_db():
+            print("Database schema created/migrated")
+        if ensure_admin_user(DEFAULT_ADMIN_USERNAME, hash_password(DEFAULT_ADMIN_PASSWORD)):
+            print(f"Default admin user '{DEFAULT_ADMIN_USERNAME}' created")
         print("Database initialized successfully")
-        print("App started successfully.")
     except Exception as e:
         print(f"Database initialization error: {e}")
+    await event_bus.start()
+    resume_user_purges()
+    interrupt_imports()
+    backup_task = None
+    if backup.BACKUP_INTERVAL_SECONDS > 0:
+        backup_task = asyncio.create_task(backup.backup_scheduler(job_manager))
+    maintenance_task = None
+    if maintenance.INTERVAL_SECONDS > 0:
+        maintenance_task = asyncio.create_task(maintenance.maintenance_scheduler())
+    # Dashboard stats and chart data are computed here, not on the admin's request
+    snapshot_task = asyncio.create_task(refresh_loop())
+    replication_task = asyncio.create_task(replication.replicator()) if replicating else None
+    loop_lag_task = asyncio.create_task(health.monitor_loop_lag())
+    # Compile templates and fingerprint static assets off the startup path
+    asyncio.get_running_loop().run_in_executor(None, warm_admin_pages)
+    startup_seconds = time.perf_counter() - started
+    metrics.set_gauge("startup.lifespan_seconds", round(startup_seconds, 4))
+    print(f"App started successfully in {startup_seconds * 1000:.1f} ms.")
     yield
-    # Shutdown
+    # Shutdown: /readyz fails from here on so the load balancer drains this instance
+    health.draining = True
+    for task in (backup_task, maintenance_task, snapshot_task, replication_task, loop_lag_task):
+        if task:
+            task.cancel()
+    if replicating:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, replication.sync)
+        except Exception as e:
+            print(f"Final replication failed: {e}")
+    await job_manager.stop()
+    await event_bus.stop()
     print("App shutting down...")
 
 # --- FastAPI app ---
 app = FastAPI(lifespan=lifespan)
 
+# --- Response compression ---
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("NOTES_COMPRESS_MIN_BYTES", "1024")),
+)
+
 # --- CORS configuration ---
 origins = [
     "http://localhost:8080",
@@ -46,28 +119,112 @@ origins = [
     "https://ownnoteapp-hedxcahwcrhwb8hb.canadacentral-01.azurewebsites.net",
 ]
 
+# Extra exact origins and wildcard patterns (comma separated), e.g.
+# NOTES_CORS_ORIGIN_PATTERNS="https://*.azurewebsites.net"
+origins += [o.strip() for o in os.environ.get("NOTES_CORS_ORIGINS", "").split(",") if o.strip()]
+origin_patterns = [p.strip() for p in os.environ.get("NOTES_CORS_ORIGIN_PATTERNS", "").split(",") if p.strip()]
+
+# Preflights are answered inside the middleware, before routing
 app.add_middleware(
-    CORSMiddleware,
+    CORSEngine,
     allow_origins=origins,
+    origin_patterns=origin_patterns,
     allow_credentials=True,
-    allow_methods=["*"],  # allow all HTTP methods
-    allow_headers=["*"],  # allow all headers
+    allow_headers=["*"],  # echo whatever headers the browser asks for
+    expose_headers=["ETag", "Retry-After"],
+    max_age=int(os.environ.get("NOTES_CORS_MAX_AGE", "7200")),
 )
 
-# --- Optional fallback for OPTIONS preflight ---
-@app.options("/{full_path:path}")
-async def preflight_handler(request: Request, full_path: str):
-    origin = request.headers.get("origin", "")
-    response = Response(status_code=200)
-    if origin in origins:
-        response.headers["Access-Control-Allow-Origin"] = origin
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
-    response.headers["Access-Control-Allow-Credentials"] = "true"
-    return response
+# --- Request latency (feeds /admin/api/metrics and the backup throttle) ---
+# Probes are left out so they never count as traffic
+app.add_middleware(metrics.RequestTimingMiddleware, exclude=health.PROBE_PATHS)
 
 # --- Templates ---
-templates = Jinja2Templates(directory="templates")
+# Jinja2 is only needed by the admin dashboard, so it is loaded on first use
+# (or warmed in a background thread right after startup)
+_templates = None
+_dashboard_page = None
+
+def get_templates():
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+        _templates = Jinja2Templates(directory="templates")
+        _templates.env.auto_reload = False
+        _templates.env.globals["asset_url"] = static_assets.url
+    return _templates
+
+def get_dashboard_page():
+    """The rendered admin dashboard; it does not depend on the user, so it is rendered once"""
+    global _dashboard_page
+    if _dashboard_page is None:
+        html = get_templates().get_template("admin_dashboard.html").render()
+        _dashboard_page = StaticPage(html, cache_control="private, no-cache")
+    return _dashboard_page
+
+def warm_admin_pages():
+    static_assets.load()
+    get_dashboard_page()
+
+ADMIN_LOGIN_PAGE = StaticPage("""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Admin Login - Notes App</title>
+        <style>
+            body { font-family: Arial, sans-serif; max-width: 400px; margin: 100px auto; padding: 20px; }
+            .login-container { background: #f8f9fa; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+            h1 { color: #333; text-align: center; margin-bottom: 30px; }
+            .form-group { margin-bottom: 20px; }
+            label { display: block; margin-bottom: 5px; color: #555; }
+            input[type="text"], input[type="password"] { width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; box-sizing: border-box; }
+            button { width: 100%; padding: 12px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer; font-size: 16px; }
+            button:hover { background: #0056b3; }
+            .info { margin-top: 20px; padding: 10px; background: #e3f2fd; border-radius: 4px; font-size: 14px; }
+        </style>
+    </head>
+    <body>
+        <div class="login-container">
+            <h1>🔐 Admin Login</h1>
+            <form method="post" action="/admin/login">
+                <div class="form-group">
+                    <label for="username">Username:</label>
+                    <input type="text" name="username" id="username" placeholder="Enter admin username" required>
+                </div>
+                <div class="form-group">
+                    <label for="password">Password:</label>
+                    <input type="password" name="password" id="password" placeholder="Enter admin password" required>
+                </div>
+                <button type="submit">Login to Admin Panel</button>
+            </form>
+            <div class="info">
+                <strong>Default Credentials:</strong><br>
+                Username: admin<br>
+                Password: admin123
+            </div>
+        </div>
+    </body>
+    </html>
+""")
+
+ADMIN_LOGIN_ALTERNATIVE_PAGE = StaticPage("""
+    <!DOCTYPE html>
+    <html>
+    <head><title>Admin Login (Alternative)</title></head>
+    <body>
+        <h1>🔧 Admin Login (Alternative Route)</h1>
+        <p>This is a test to see if the issue is with /admin/ paths specifically.</p>
+        <form method="post" action="/admin/login">
+            <input type="text" name="username" placeholder="Username" required><br><br>
+            <input type="password" name="password" placeholder="Password" required><br><br>
+            <button type="submit">Login</button>
+        </form>
+        <p><a href="/admin/login">Try original admin login</a></p>
+    </body>
+    </html>
+""")
 
 # --- Security setup ---
 # Use a simpler hashing approach to avoid bcrypt compatibility issues
@@ -79,13 +236,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
     return hash_password(plain_password) == hashed_password
 
-# Fallback to bcrypt with better error handling
-try:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    use_bcrypt = True
-except Exception as e:
-    print(f"Warning: bcrypt not available, using SHA-256: {e}")
-    use_bcrypt = False
+# Fallback to bcrypt with better error handling. passlib is imported on
+# first use so that SHA-256 accounts never pay for loading it.
+use_bcrypt = True
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context, use_bcrypt
+    if _pwd_context is None and use_bcrypt:
+        try:
+            from passlib.context import CryptContext
+            _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        except Exception as e:
+            print(f"Warning: bcrypt not available, using SHA-256: {e}")
+            use_bcrypt = False
+    return _pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
@@ -103,6 +268,75 @@ class Note(BaseModel):
 class NoteOut(Note):
     id: int
     created_at: str
+    version: Optional[int] = None
+
+class TextEdit(BaseModel):
+    # Offsets in UTF-16 code units (JavaScript string indices) into the current content
+    start: int = Field(ge=0)
+    end: int = Field(ge=0)
+    text: str = ""
+
+class NotePatch(BaseModel):
+    version: Optional[int] = None  # alternatively sent as If-Match
+    title: Optional[str] = None
+    edits: list[TextEdit] = []
+
+class NotePatchResult(BaseModel):
+    id: int
+    title: str
+    version: int
+    content_length: int  # UTF-16 code units, like TextEdit offsets
+
+class UserSummary(BaseModel):
+    user_id: int
+    username: str
+    note_count: int
+    total_content_bytes: int
+    last_note_at: Optional[str] = None
+
+class NoteListItem(BaseModel):
+    id: int
+    title: Optional[str] = None
+    content: Optional[str] = None
+    created_at: Optional[str] = None
+
+class AdminNoteListItem(NoteListItem):
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+
+class AdminNotePage(BaseModel):
+    items: list[AdminNoteListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None  # only on the first page
+
+class AdminUserListItem(BaseModel):
+    id: int
+    username: str
+    is_admin: bool
+    note_count: int
+    total_content_bytes: int
+    last_note_at: Optional[str] = None
+    created_at: str = "N/A"  # Add if you have user creation date
+
+class AdminUserPage(BaseModel):
+    items: list[AdminUserListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None  # only on the first page
+
+class NoteRevisionInfo(BaseModel):
+    id: int
+    revision: int
+    title: str
+    is_snapshot: bool
+    stored_bytes: int
+    created_at: str
+
+class NoteRevisionOut(BaseModel):
+    id: int
+    revision: int
+    title: str
+    content: str
+    created_at: str
 
 class DeleteResponse(BaseModel):
     message: str
@@ -115,29 +349,60 @@ from database import (
     get_note as db_get_note,
     update_note as db_update_note,
     delete_note as db_delete_note,
-    get_users as db_get_users,
+    create_import_job as db_create_import_job,
+    get_import_job as db_get_import_job,
+    claim_import_job as db_claim_import_job,
+    save_import_job as db_save_import_job,
+    interrupt_import_jobs as db_interrupt_import_jobs,
     delete_user as db_delete_user,
-    delete_user_notes as db_delete_user_notes,
-    get_all_notes as db_get_all_notes
+    mark_user_deleted as db_mark_user_deleted,
+    list_deleted_users as db_list_deleted_users,
+    count_user_notes as db_count_user_notes,
+    delete_user_notes_batch as db_delete_user_notes_batch,
+    get_user_stats as db_get_user_stats,
+    get_user_stats_many as db_get_user_stats_many,
+    get_user_ids as db_get_user_ids,
+    list_users as db_list_users,
+    iter_notes_with_usernames as db_iter_notes_with_usernames,
+    list_users_page as db_list_users_page,
+    count_users as db_count_users,
+    list_notes_page as db_list_notes_page,
+    count_notes as db_count_notes,
+    USER_SORT_KEYS,
+    NOTE_SORT_KEYS,
+    get_all_user_stats as db_get_all_user_stats,
+    get_all_notes as db_get_all_notes,
+    list_note_revisions as db_list_note_revisions,
+    get_note_revision as db_get_note_revision,
+    patch_note as db_patch_note,
+    VersionConflict,
+)
+from rate_limit import (
+    RateLimiter,
+    RateLimited,
+    MAX_INFLIGHT,
+    client_ip,
+    retry_after_header,
+    store_from_env as rate_limit_store_from_env,
 )
 
 # --- Helper functions ---
 def hash_password_safe(password: str) -> str:
     """Safe password hashing with fallback"""
-    if use_bcrypt:
+    if use_bcrypt and get_pwd_context():
         try:
             truncated = password.encode("utf-8")[:72].decode("utf-8", "ignore")
-            return pwd_context.hash(truncated)
+            return get_pwd_context().hash(truncated)
         except Exception:
             pass
     return hash_password(password)
 
 def verify_password_safe(plain_password: str, hashed_password: str) -> bool:
     """Safe password verification with fallback"""
-    if use_bcrypt and hashed_password.startswith('$'):
+    if hashed_password.startswith('$') and get_pwd_context():
         try:
             truncated = plain_password.encode("utf-8")[:72].decode("utf-8", "ignore")
-            return pwd_context.verify(truncated, hashed_password)
+            return get_pwd_context().verify(truncated, hashed_password)
         except Exception:
             pass
     return verify_password(plain_password, hashed_password)
@@ -152,36 +417,59 @@ def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt  # imported lazily to keep cold start fast
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# --- Decoded token cache ---
+# Verifying a JWT costs base64 + JSON parsing + HMAC on every request; the
+# decoded payload is cached per raw token until its exp claim passes.
+TOKEN_CACHE_SIZE = int(os.environ.get("NOTES_APP_TOKEN_CACHE_SIZE", "1024"))
+_token_cache = OrderedDict()  # raw token -> (payload, exp timestamp)
+
+def decode_token(token: str):
+    """Decode and verify a JWT, returning its payload or None if invalid/expired"""
+    if not token or token == "null":
+        return None
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        payload, exp = cached
+        if exp is None or exp > now:
+            _token_cache.move_to_end(token)
+            return payload
+        del _token_cache[token]
+    from jose import jwt, JWTError  # imported lazily to keep cold start fast
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    exp = payload.get("exp")
+    _token_cache[token] = (payload, float(exp) if exp is not None else None)
+    if len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+    return payload
+
+def resolve_user(request: Request = None, token: str = None, use_cookie: bool = True):
+    """Resolve the user from a bearer token, falling back to the access_token cookie"""
+    candidates = [token]
+    if use_cookie and request is not None:
+        cookie_token = request.cookies.get("access_token")
+        if cookie_token != token:
+            candidates.append(cookie_token)
+    for candidate in candidates:
+        payload = decode_token(candidate)
+        username = payload.get("sub") if payload else None
+        if username:
+            user = db_get_user(username)
+            if user:
+                return user
+    return None
+
 async def get_current_user(request: Request = None, token: str = Depends(oauth2_scheme)):
     """Get current user from token (either Authorization header or cookie)"""
-    # First try the Authorization header (for API calls)
-    if token and token != "null":
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username = payload.get("sub")
-            if username:
-                user = db_get_user(username)
-                if user:
-                    return user
-        except JWTError:
-            pass
-    
-    # If header token failed, try cookie (for web interface) if request is available
-    if request:
-        cookie_token = request.cookies.get("access_token")
-        if cookie_token:
-            try:
-                payload = jwt.decode(cookie_token, SECRET_KEY, algorithms=[ALGORITHM])
-                username = payload.get("sub")
-                if username:
-                    user = db_get_user(username)
-                    if user:
-                        return user
-            except JWTError:
-                pass
-    
+    user = resolve_user(request, token)
+    if user:
+        return user
     raise HTTPException(status_code=401, detail="Invalid authentication")
 
 # Create a wrapper for web endpoints that need request context
@@ -195,23 +483,94 @@ def verify_admin_auth(request: Request):
     if not cookie_token:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    try:
-        payload = jwt.decode(cookie_token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        user = db_get_user(username)
-        if not user or not is_admin_user(user):
-            raise HTTPException(status_code=403, detail="Admin access required")
-        
-        return user
-    except JWTError:
+    user = resolve_user(token=cookie_token, use_cookie=False)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if not is_admin_user(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+async def require_admin(request: Request):
+    """Dependency form of verify_admin_auth, for handlers that need the admin before their body runs"""
+    return verify_admin_auth(request)
 
 def is_admin_user(user):
     return user and len(user) > 3 and user[3] == 1
 
+NOTE_LIST_FIELDS = ("id", "title", "content", "created_at")
+ADMIN_NOTE_LIST_FIELDS = NOTE_LIST_FIELDS + ("user_id", "username")
+
+def parse_fields(fields: Optional[str], allowed: tuple):
+    """Parse a comma separated `fields=` parameter; id is always returned"""
+    if not fields:
+        return set(allowed)
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested | {"id"}
+
+def encode_cursor(sort: str, row: tuple, sort_index: int) -> str:
+    """Opaque cursor continuing after `row` in a listing ordered by `sort`"""
+    data = json.dumps([sort, row[sort_index], row[0]]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], sort: str):
+    """(sort value, id) from a cursor made by encode_cursor, or None for the first page"""
+    if not cursor:
+        return None
+    try:
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different sort order")
+    return value, row_id
+
+def check_sort(sort: str, allowed: tuple):
+    if sort not in allowed:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(allowed)}")
+
+# --- Rate limiting and admission control ---
+rate_limiter = RateLimiter(rate_limit_store_from_env())
+_inflight_requests = 0
+
+def _too_many_requests(error: RateLimited):
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests",
+        headers={"Retry-After": retry_after_header(error.retry_after)},
+    )
+
+def limit_by_ip(route: str):
+    """Dependency that rate limits a route per client IP"""
+    def dependency(request: Request):
+        try:
+            rate_limiter.check(route, client_ip(request))
+        except RateLimited as e:
+            raise _too_many_requests(e)
+    return dependency
+
+def limit_by_user(route: str):
+    """Dependency that authenticates, rate limits per user and caps requests in flight"""
+    async def dependency(user=Depends(get_current_user)):
+        global _inflight_requests
+        try:
+            await rate_limiter.acheck(route, f"user:{user[0]}")
+        except RateLimited as e:
+            raise _too_many_requests(e)
+        if _inflight_requests >= MAX_INFLIGHT:
+            metrics.incr("admission.rejected")
+            raise HTTPException(status_code=503, detail="Server busy", headers={"Retry-After": "1"})
+        _inflight_requests += 1
+        metrics.set_gauge("admission.inflight", _inflight_requests)
+        try:
+            yield user
+        finally:
+            _inflight_requests -= 1
+            metrics.set_gauge("admission.inflight", _inflight_requests)
+    return dependency
+
 # --- Routes (examples) ---
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -220,18 +579,19 @@ async def read_root():
         status_code=200
     )
 
-@app.post("/register")
+@app.post("/register", dependencies=[Depends(limit_by_ip("register"))])
 async def register(user: User):
-    hashed_password = hash_password_safe(user.password)
+    hashed_password = await pools.run_hashing(hash_password_safe, user.password)
     user_id = db_create_user(user.username, hashed_password)
     if user_id:
+        event_bus.publish("user.created", {"user_id": user_id})
         access_token = create_access_token(data={"sub": user.username})
         return {"access_token": access_token, "token_type": "bearer"}
     raise HTTPException(status_code=400, detail="Username already exists")
 
-@app.post("/token")
+@app.post("/token", dependencies=[Depends(limit_by_ip("login"))])
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await pools.run_hashing(authenticate_user, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = create_access_token({"sub": user[1]})
@@ -242,24 +602,145 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
           response_model=NoteOut,
           summary="Create Note",
           description="Create a new note for the authenticated user")
-async def create_note(note: Note, user=Depends(get_current_user)):
+async def create_note(note: Note, user=Depends(limit_by_user("notes_write"))):
     """Create a new note for the authenticated user"""
     user_id = user[0]  # user[0] is the user ID from the database
     row = db_create_note(note.title, note.content, user_id)
-    return NoteOut(id=row[0], title=row[1], content=row[2], created_at=row[3])
+    event_bus.publish("note.created", {"note_id": row[0], "user_id": user_id, "version": row[5]})
+    return NoteOut(id=row[0], title=row[1], content=row[2], created_at=row[3], version=row[5])
+
+# --- Bulk import ---
+# Three steps, so the client has the job id before the upload starts:
+# POST /notes/import creates the job, PUT /notes/import/{id} streams the
+# body into it, and GET /notes/import/{id} reports progress meanwhile.
+# Jobs are rows in import_jobs, so an id handed out before a worker restart
+# (gunicorn --max-requests) can still be uploaded to afterwards. An upload
+# in flight when the worker stops is lost: its job becomes "interrupted"
+# and PUT answers 410, as it does for a job that expired unused.
+IMPORT_UPLOAD_TIMEOUT_SECONDS = int(os.environ.get("NOTES_IMPORT_UPLOAD_TIMEOUT_SECONDS", "600"))
+import_jobs = JobManager()  # uploads running on this worker, keyed by import_jobs id
+
+def user_import(job_id: int, user) -> dict:
+    """One of the user's imports: live progress if it is running here, otherwise as last saved"""
+    job = import_jobs.get(job_id)
+    if job and job.target == user[0]:
+        return job.as_dict()
+    saved = db_get_import_job(job_id)
+    if not saved or saved["user_id"] != user[0]:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return {"id": saved["id"], "kind": "import", "target": saved["user_id"],
+            **{k: v for k, v in saved.items() if k not in ("id", "user_id")}}
+
+def interrupt_imports():
+    """Mark uploads cut off by the last shutdown (one worker per database, see start.sh)"""
+    try:
+        interrupted = db_interrupt_import_jobs()
+    except Exception as e:
+        print(f"Could not check for interrupted imports: {e}")
+        return
+    if interrupted:
+        print(f"Marked {interrupted} interrupted import job(s)")
+
+@app.post("/notes/import", status_code=201,
+          summary="Start Import",
+          description="Create an import job for bulk-creating notes. Upload the data to the returned "
+                      "`upload_url` with PUT: NDJSON (`application/x-ndjson`, one "
+                      "`{\"title\", \"content\"}` object per line) or a zip of Markdown files "
+                      "(`application/zip`). Poll `/notes/import/{job_id}` to follow progress.")
+async def start_import(user=Depends(limit_by_user("notes_write"))):
+    """Create an import job that waits for its upload"""
+    job_id, open_id = await asyncio.get_running_loop().run_in_executor(
+        None, db_create_import_job, user[0], time.time() - IMPORT_UPLOAD_TIMEOUT_SECONDS
+    )
+    if job_id is None:
+        raise HTTPException(status_code=409, detail=f"Import {open_id} is already open for this user")
+    return {"job_id": job_id, "upload_url": f"/notes/import/{job_id}"}
+
+@app.put("/notes/import/{job_id}",
+         summary="Upload Import",
+         description="Stream the NDJSON or zip body for an import created with POST /notes/import. "
+                     "Returns the finished job with per-record errors. 410 if the job expired or "
+                     "was interrupted by a restart; start a new import then.")
+async def upload_import(
+    job_id: int,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|zip)$", description="Overrides the Content-Type"),
+    user=Depends(limit_by_user("notes_write")),
+):
+    """Stream an NDJSON or zipped Markdown upload into the user's notes"""
+    loop = asyncio.get_running_loop()
+    saved = user_import(job_id, user)
+    if saved["status"] in ("expired", "interrupted"):
+        raise HTTPException(status_code=410, detail=f"Import {job_id} is {saved['status']}; start a new one")
+    if saved["status"] != "queued":
+        raise HTTPException(status_code=409, detail=f"Import {job_id} is {saved['status']}")
+    fmt = format or importer.format_for(request.headers.get("content-type", ""))
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or application/zip, or pass ?format=")
+    if not await loop.run_in_executor(None, db_claim_import_job, job_id, user[0]):
+        raise HTTPException(status_code=409, detail=f"Import {job_id} is no longer waiting for an upload")
+    length = request.headers.get("content-length")
+
+    def announce(ids):
+        event_bus.publish("note.imported", {"user_id": user[0], "count": len(ids)})
+
+    async def work(job):
+        job.total = int(length) if length and length.isdigit() else None
+        await importer.run_import(fmt, request.stream(), user[0], job, on_batch=announce)
+
+    job = import_jobs.create("import", target=user[0], job_id=job_id)
+    job.created_at = saved["created_at"]
+    try:
+        # Runs in this request's task: a client that goes away fails or cancels the job with it
+        await import_jobs.run(job, work)
+    finally:
+        await loop.run_in_executor(None, db_save_import_job, job.as_dict())
+    if job.status == "failed":
+        raise HTTPException(status_code=400, detail=job.as_dict())
+    return job.as_dict()
+
+@app.get("/notes/import/{job_id}")
+async def get_import(job_id: int, user=Depends(limit_by_user("notes_read"))):
+    """Progress of one of the user's imports: bytes received and notes imported so far"""
+    return user_import(job_id, user)
 
 @app.get("/notes", 
-         response_model=list[NoteOut],
+         response_model=list[NoteListItem],
+         response_model_exclude_none=True,
          summary="Get User Notes",
-         description="Get all notes for the authenticated user only")
-async def get_notes(user=Depends(get_current_user)):
+         description="Get all notes for the authenticated user only. Use `fields=id,title` to "
+                     "leave out content or `preview=N` to truncate content to N characters.")
+@cached("notes.list", tags=lambda user, **_: [f"user:{user[0]}:notes"], exclude_none=True, model=list[NoteListItem])
+async def get_notes(
+    fields: Optional[str] = None,
+    preview: Optional[int] = Query(None, ge=1),
+    user=Depends(limit_by_user("notes_read")),
+):
     """Get all notes for the authenticated user only"""
     user_id = user[0]  # user[0] is the user ID from the database
-    rows = db_get_notes(user_id)
-    return [NoteOut(id=row[0], title=row[1], content=row[2], created_at=row[3]) for row in rows]
+    wanted = parse_fields(fields, NOTE_LIST_FIELDS)
+    rows = db_get_notes(user_id, preview=preview, include_content="content" in wanted)
+    return [
+        {k: v for k, v in zip(NOTE_LIST_FIELDS, row) if k in wanted}
+        for row in rows
+    ]
+
+@app.get("/me/summary", response_model=UserSummary)
+@cached("me.summary", tags=lambda user, **_: [f"user:{user[0]}:notes"], model=UserSummary)
+async def get_my_summary(user=Depends(limit_by_user("notes_read"))):
+    """Note count, content size (UTF-8 bytes, before compression) and latest note time for the authenticated user"""
+    note_count, content_bytes, last_note_at = db_get_user_stats(user[0])
+    return UserSummary(
+        user_id=user[0],
+        username=user[1],
+        note_count=note_count,
+        total_content_bytes=content_bytes,
+        last_note_at=last_note_at,
+    )
 
 @app.get("/notes/{note_id}", response_model=NoteOut)
-async def get_note(note_id: int, user=Depends(get_current_user)):
+@cached("notes.get", tags=lambda note_id, **_: [f"note:{note_id}"], model=NoteOut)
+async def get_note(note_id: int, user=Depends(limit_by_user("notes_read"))):
     """Get a specific note if the user owns it"""
     note = db_get_note(note_id)
     if not note:
@@ -269,13 +750,43 @@ async def get_note(note_id: int, user=Depends(get_current_user)):
     if len(note) > 4 and note[4] != user[0] and not is_admin_user(user):  # note[4] is user_id
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return NoteOut(id=note[0], title=note[1], content=note[2], created_at=note[3])
+    return NoteOut(id=note[0], title=note[1], content=note[2], created_at=note[3], version=note[5])
+
+@app.get("/notes/{note_id}/revisions", response_model=list[NoteRevisionInfo])
+async def get_note_revisions(note_id: int, user=Depends(limit_by_user("notes_read"))):
+    """List the revision history of a note, newest first"""
+    note = db_get_note(note_id)
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    if len(note) > 4 and note[4] != user[0] and not is_admin_user(user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return [
+        NoteRevisionInfo(id=r[0], revision=r[1], title=r[2], is_snapshot=bool(r[3]), stored_bytes=r[4], created_at=r[5])
+        for r in db_list_note_revisions(note_id)
+    ]
+
+@app.get("/notes/{note_id}/revisions/{revision_id}", response_model=NoteRevisionOut)
+async def get_note_revision(note_id: int, revision_id: int, user=Depends(limit_by_user("notes_read"))):
+    """Get the full content of one revision of a note"""
+    note = db_get_note(note_id)
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    if len(note) > 4 and note[4] != user[0] and not is_admin_user(user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    revision = db_get_note_revision(note_id, revision_id)
+    if not revision:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return NoteRevisionOut(id=revision[0], revision=revision[1], title=revision[2], content=revision[3], created_at=revision[4])
 
 @app.put("/notes/{note_id}", 
          response_model=NoteOut,
          summary="Update Note",
          description="Update a note if the user owns it")
-async def update_note(note_id: int, note: Note, user=Depends(get_current_user)):
+async def update_note(note_id: int, note: Note, user=Depends(limit_by_user("notes_write"))):
     """Update a note if the user owns it"""
     existing_note = db_get_note(note_id)
     if not existing_note:
@@ -286,7 +797,78 @@ async def update_note(note_id: int, note: Note, user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Access denied")
     
     updated_note = db_update_note(note_id, note.title, note.content)
-    return NoteOut(id=updated_note[0], title=updated_note[1], content=updated_note[2], created_at=updated_note[3])
+    if not updated_note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    event = {"note_id": note_id, "user_id": updated_note[4], "version": updated_note[5], "title": updated_note[1]}
+    if len(updated_note[2]) <= EVENT_CONTENT_LIMIT:
+        event["content"] = updated_note[2]
+    event_bus.publish("note.updated", event)
+    return NoteOut(id=updated_note[0], title=updated_note[1], content=updated_note[2], created_at=updated_note[3], version=updated_note[5])
+
+def parse_if_match(value: Optional[str]):
+    """Parse a note version from an If-Match header such as "3" or W/"3"."""
+    if value is None:
+        return None
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must carry a note version")
+
+@app.patch("/notes/{note_id}",
+           response_model=NotePatchResult,
+           summary="Patch Note",
+           description="Apply text-range edits to a note. Edits are [start, end) ranges of the note at "
+                       "`version` (or the If-Match header), counted in UTF-16 code units like "
+                       "JavaScript string indices, and must not overlap or split a surrogate pair.",
+           responses={
+               412: {"description": "The note changed since that version"},
+               428: {"description": "No version given"},
+           })
+async def patch_note(note_id: int, patch: NotePatch, request: Request, user=Depends(limit_by_user("notes_write"))):
+    """Apply text edits to a note with an optimistic concurrency check"""
+    expected_version = parse_if_match(request.headers.get("if-match"))
+    if expected_version is None:
+        expected_version = patch.version
+    if expected_version is None:
+        raise HTTPException(status_code=428, detail="Send the note version in If-Match or the body")
+    
+    existing_note = db_get_note(note_id)
+    if not existing_note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    # Check if user owns the note or is admin
+    if len(existing_note) > 4 and existing_note[4] != user[0] and not is_admin_user(user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    try:
+        row = db_patch_note(note_id, expected_version, [(e.start, e.end, e.text) for e in patch.edits], patch.title)
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=412,
+            detail=f"Note is at version {e.current_version}",
+            headers={"ETag": f'"{e.current_version}"'},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not row:
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    event_bus.publish("note.patched", {
+        "note_id": note_id,
+        "user_id": row[3],
+        "version": row[4],
+        "base_version": expected_version,
+        "title": row[1],
+        "edits": [e.model_dump() for e in patch.edits],
+    })
+    return Response(
+        content=NotePatchResult(id=row[0], title=row[1], version=row[4], content_length=row[5]).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": f'"{row[4]}"'},
+    )
 
 @app.delete("/notes/{note_id}", 
            response_model=DeleteResponse,
@@ -298,7 +880,7 @@ async def update_note(note_id: int, note: Note, user=Depends(get_current_user)):
                403: {"description": "Access denied - not your note"},
                401: {"description": "Authentication required"}
            })
-async def delete_note(note_id: int, user=Depends(get_current_user)):
+async def delete_note(note_id: int, user=Depends(limit_by_user("notes_write"))):
     """Delete a note if the user owns it"""
     existing_note = db_get_note(note_id)
     if not existing_note:
@@ -310,9 +892,56 @@ async def delete_note(note_id: int, user=Depends(get_current_user)):
     
     deleted = db_delete_note(note_id)
     if deleted:
+        event_bus.publish("note.deleted", {"note_id": note_id, "user_id": existing_note[4]})
         return {"message": "Note deleted successfully"}
     raise HTTPException(status_code=500, detail="Failed to delete note")
 
+# --- Realtime updates ---
+# Note events reach the hub through the event bus, so subscribers connected
+# to any worker see edits made on every other worker.
+EVENT_CONTENT_LIMIT = 64 * 1024  # larger bodies are announced as a resync
+
+def push_note_event(topic: str, payload: dict):
+    if "note_id" not in payload:
+        return  # bulk events (note.imported) have no single note to push to
+    event = {k: v for k, v in payload.items() if k not in ("note_id", "user_id")}
+    if topic == "note.updated" and "content" not in event:
+        topic = "note.resync"
+    note_hub.publish(payload["note_id"], {"type": topic, **event})
+
+event_bus.subscribe("note.", push_note_event)
+
+@app.websocket("/ws/notes/{note_id}")
+async def note_updates_ws(websocket: WebSocket, note_id: int, token: Optional[str] = None):
+    """Push changes of a note to the client. Authenticate with an Authorization
+    header, the access_token cookie or ?token= (browsers cannot set headers)."""
+    header = websocket.headers.get("authorization", "")
+    bearer = header[7:] if header.lower().startswith("bearer ") else None
+    user = resolve_user(websocket, bearer or token)
+    if not user:
+        await websocket.close(code=1008)
+        return
+    
+    note = db_get_note(note_id)
+    if not note or (len(note) > 4 and note[4] != user[0] and not is_admin_user(user)):
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    subscriber = note_hub.subscribe(note_id, websocket)
+    sender = asyncio.create_task(subscriber.run_sender())
+    try:
+        await websocket.send_json({"type": "subscribed", "note_id": note_id, "version": note[5]})
+        while True:
+            message = await websocket.receive_text()
+            if message == "ping":
+                await websocket.send_text("pong")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        note_hub.unsubscribe(subscriber)
+        sender.cancel()
+
 # --- Admin endpoints ---
 @app.get("/admin", response_class=HTMLResponse)
 async def admin_dashboard_redirect():
@@ -327,72 +956,23 @@ async def admin_dashboard_page(request: Request):
     if not cookie_token:
         return RedirectResponse(url="/admin/login")
     
-    try:
-        payload = jwt.decode(cookie_token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if not username:
-            return RedirectResponse(url="/admin/login")
-        
-        user = db_get_user(username)
-        if not user or not is_admin_user(user):
-            return RedirectResponse(url="/admin/login")
-        
-        return templates.TemplateResponse("admin_dashboard.html", {"request": request, "user": user})
-    except JWTError:
+    user = resolve_user(token=cookie_token, use_cookie=False)
+    if not user or not is_admin_user(user):
         return RedirectResponse(url="/admin/login")
+    
+    return get_dashboard_page().response(request)
 
 @app.get("/admin/login", response_class=HTMLResponse) 
 async def admin_login_page(request: Request):
     """Admin login HTML page"""
-    # Simple HTML response without template dependency
-    return HTMLResponse("""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Admin Login - Notes App</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 400px; margin: 100px auto; padding: 20px; }
-            .login-container { background: #f8f9fa; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-            h1 { color: #333; text-align: center; margin-bottom: 30px; }
-            .form-group { margin-bottom: 20px; }
-            label { display: block; margin-bottom: 5px; color: #555; }
-            input[type="text"], input[type="password"] { width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; box-sizing: border-box; }
-            button { width: 100%; padding: 12px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer; font-size: 16px; }
-            button:hover { background: #0056b3; }
-            .info { margin-top: 20px; padding: 10px; background: #e3f2fd; border-radius: 4px; font-size: 14px; }
-        </style>
-    </head>
-    <body>
-        <div class="login-container">
-            <h1>🔐 Admin Login</h1>
-            <form method="post" action="/admin/login">
-                <div class="form-group">
-                    <label for="username">Username:</label>
-                    <input type="text" name="username" id="username" placeholder="Enter admin username" required>
-                </div>
-                <div class="form-group">
-                    <label for="password">Password:</label>
-                    <input type="password" name="password" id="password" placeholder="Enter admin password" required>
-                </div>
-                <button type="submit">Login to Admin Panel</button>
-            </form>
-            <div class="info">
-                <strong>Default Credentials:</strong><br>
-                Username: admin<br>
-                Password: admin123
-            </div>
-        </div>
-    </body>
-    </html>
-    """)
+    # Prebuilt bytes with ETag/Last-Modified, no template dependency
+    return ADMIN_LOGIN_PAGE.response(request)
 
-@app.post("/admin/login")
+@app.post("/admin/login", dependencies=[Depends(limit_by_ip("admin_login"))])
 async def admin_login(request: Request, response: Response, form_data: OAuth2PasswordRequestForm = Depends()):
     """Admin login endpoint"""
     user = db_get_user(form_data.username)
-    if not user or not verify_password_safe(form_data.password, user[2]):
+    if not user or not await pools.run_hashing(verify_password_safe, form_data.password, user[2]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not is_admin_user(user):
@@ -418,46 +998,108 @@ async def admin_login(request: Request, response: Response, form_data: OAuth2Pas
     # This is an AJAX request, return JSON
     return {"access_token": access_token, "token_type": "bearer", "redirect": "/admin/dashboard"}
 
+# --- Coalesced admin reads ---
+# Dashboards poll these; concurrent requests share one scan, and the result
+# is reused for ADMIN_READ_TTL seconds unless a user or note changes first.
+ADMIN_READ_TTL = int(os.environ.get("NOTES_ADMIN_READ_TTL_MS", "1000")) / 1000
+
+# Stats and chart data are snapshots refreshed in the background; a request
+# gets the last computed value (with its age) and never waits for a rescan.
+STATS_REFRESH_SECONDS = float(os.environ.get("NOTES_STATS_REFRESH_SECONDS", "30"))
+CHART_DATA_REFRESH_SECONDS = float(os.environ.get("NOTES_CHART_DATA_REFRESH_SECONDS", "300"))
+
+def with_age(value: dict, age: float, stale: bool) -> dict:
+    return {**value, "age_seconds": round(age, 3), "stale": stale}
+
+async def load_users_and_stats():
+    """All users (without password hashes) plus the per-user note counters, read off the event loop"""
+    loop = asyncio.get_running_loop()
+    users = await loop.run_in_executor(None, db_list_users)
+    stats = await loop.run_in_executor(None, db_get_all_user_stats)
+    return users, stats
+
+def total_note_count(users, stats):
+    return sum(stats[u[0]][0] for u in users if u[0] in stats)
+
 @app.get("/admin/api/stats")
 async def get_admin_stats(request: Request):
     """Admin only: Get system statistics"""
     user = verify_admin_auth(request)
+    return with_age(*await admin_stats_snapshot.get())
+
+async def compute_admin_stats():
+    users, stats = await load_users_and_stats()
     
     # Get user count
-    users = db_get_users()
     user_count = len(users)
-    admin_count = len([u for u in users if u[3] == 1])
+    admin_count = len([u for u in users if u[2] == 1])
     
     # Get notes count
-    notes = db_get_all_notes()
-    total_notes = len(notes)
-    
-    # Get recent activity (last 7 days)
-    recent_notes = [n for n in notes if n[3]]  # Filter notes with created_at
+    total_notes = total_note_count(users, stats)
     
     return {
         "total_users": user_count,
         "admin_users": admin_count, 
         "regular_users": user_count - admin_count,
         "total_notes": total_notes,
-        "recent_notes": len(recent_notes)
+        "recent_notes": total_notes  # every note has created_at
     }
 
+@app.get("/admin/api/metrics")
+async def get_admin_metrics(request: Request):
+    """Admin only: Get in-process counters and gauges"""
+    user = verify_admin_auth(request)
+    return metrics.snapshot()
+
+@app.get("/admin/api/backups")
+async def list_backups_admin(request: Request):
+    """Admin only: Finished backups, newest first"""
+    verify_admin_auth(request)
+    return [{"name": name, "files": files, "bytes": size} for name, files, size in backup.list_backups()]
+
+@app.post("/admin/api/backups", status_code=202)
+async def create_backup_admin(request: Request):
+    """Admin only: Start an online backup in the background"""
+    verify_admin_auth(request)
+    job = job_manager.start("backup", backup.run_backup_job)
+    return {"message": "Backup started", "job_id": job.id}
+
+@app.get("/admin/api/maintenance")
+async def get_maintenance_admin(request: Request):
+    """Admin only: Database file health and recent maintenance runs"""
+    verify_admin_auth(request)
+    return await asyncio.get_running_loop().run_in_executor(None, maintenance.status)
+
+@app.post("/admin/api/maintenance", status_code=202)
+async def run_maintenance_admin(request: Request):
+    """Admin only: Run every maintenance task now, regardless of traffic"""
+    verify_admin_auth(request)
+    job = job_manager.start("maintenance", maintenance.run_maintenance_job)
+    return {"message": "Maintenance started", "job_id": job.id}
+
+@app.get("/admin/api/replication")
+async def get_replication_admin(request: Request):
+    """Admin only: Replica location, last snapshot and current lag"""
+    verify_admin_auth(request)
+    return await asyncio.get_running_loop().run_in_executor(None, replication.status)
+
 @app.get("/admin/api/chart-data")
 async def get_chart_data(request: Request):
     """Admin only: Get detailed data for charts"""
     user = verify_admin_auth(request)
-    
+    return with_age(*await chart_data_snapshot.get())
+
+async def compute_chart_data():
     from datetime import datetime, timedelta
     import calendar
     
     # Get all data
-    users = db_get_users()
-    notes = db_get_all_notes()
+    users, stats = await load_users_and_stats()
+    total_notes = total_note_count(users, stats)
     
     # User distribution
     user_count = len(users)
-    admin_count = len([u for u in users if u[3] == 1])
+    admin_count = len([u for u in users if u[2] == 1])
     regular_count = user_count - admin_count
     
     # Monthly activity (last 6 months)
@@ -473,7 +1115,7 @@ async def get_chart_data(request: Request):
         
         # Simulate monthly growth
         base_users = max(1, regular_count // 6)
-        base_notes = max(1, len(notes) // 6)
+        base_notes = max(1, total_notes // 6)
         monthly_users.append(base_users + (i * 2))
         monthly_notes.append(base_notes + (i * 5))
     
@@ -501,47 +1143,112 @@ async def get_chart_data(request: Request):
         },
         "stats": {
             "total_users": user_count,
-            "total_notes": len(notes),
+            "total_notes": total_notes,
             "active_users": max(1, user_count // 2),
             "growth_rate": "+12%"
         }
     }
 
-@app.get("/admin/api/users")
-async def get_all_users(request: Request):
-    """Admin only: Get all users with their note counts"""
-    user = verify_admin_auth(request)
-    
-    users = db_get_users()
-    notes = db_get_all_notes()
-    
-    # Count notes per user
-    user_note_counts = {}
-    for note in notes:
-        if len(note) > 4:  # Check if note has user_id
-            user_id = note[4]
-            user_note_counts[user_id] = user_note_counts.get(user_id, 0) + 1
+@app.get("/admin/api/users", response_model=AdminUserPage)
+@cached("admin.users", tags=lambda **_: ["admin:users"], model=AdminUserPage)
+async def get_all_users(
+    user=Depends(require_admin),
+    q: Optional[str] = Query(None, description="Username prefix"),
+    is_admin: Optional[bool] = None,
+    sort: str = "id",
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Admin only: One page of users with their note counts"""
+    check_sort(sort, USER_SORT_KEYS)
+    return await compute_user_page(q, is_admin, sort, order, cursor, limit)
+
+@single_flight(ttl=ADMIN_READ_TTL)
+async def compute_user_page(q, is_admin, sort, order, cursor, limit):
+    after = decode_cursor(cursor, sort)
+    loop = asyncio.get_running_loop()
+    rows = await loop.run_in_executor(
+        None, lambda: db_list_users_page(q, is_admin, sort, order == "desc", after, limit + 1)
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    stats = await loop.run_in_executor(None, db_get_user_stats_many, [u[0] for u in rows])
+    total = None if after else await loop.run_in_executor(None, db_count_users, q, is_admin)
     
     result = []
-    for u in users:
+    for u in rows:
+        note_count, content_bytes, last_note_at = stats.get(u[0], (0, 0, None))
         result.append({
             "id": u[0],
             "username": u[1], 
-            "is_admin": u[3] == 1,
-            "note_count": user_note_counts.get(u[0], 0),
-            "created_at": "N/A"  # Add if you have user creation date
+            "is_admin": u[2] == 1,
+            "note_count": note_count,
+            "total_content_bytes": content_bytes,
+            "last_note_at": last_note_at,
         })
     
-    return result
+    next_cursor = encode_cursor(sort, rows[-1], USER_SORT_KEYS.index(sort)) if more else None
+    return {"items": result, "next_cursor": next_cursor, "total": total}
 
-@app.get("/admin/api/notes", response_model=list[NoteOut])
-async def get_all_notes_with_user(request: Request):
-    """Admin only: Get all notes from all users with user info"""
-    user = verify_admin_auth(request)
+admin_stats_snapshot = Snapshot("admin_stats", compute_admin_stats, STATS_REFRESH_SECONDS)
+chart_data_snapshot = Snapshot("chart_data", compute_chart_data, CHART_DATA_REFRESH_SECONDS)
+
+def invalidate_admin_reads(topic: str, payload: dict):
+    compute_user_page.invalidate()
+    admin_stats_snapshot.mark_stale()
+    chart_data_snapshot.mark_stale()
+
+event_bus.subscribe("note.", invalidate_admin_reads)
+event_bus.subscribe("user.", invalidate_admin_reads)
+
+def invalidate_cached_responses(topic: str, payload: dict):
+    """Drop cached reads that a note or user mutation can change"""
+    tags = ["admin:notes", "admin:users"]
+    if payload.get("user_id") is not None:
+        tags.append(f"user:{payload['user_id']}:notes")
+    if payload.get("note_id") is not None:
+        tags.append(f"note:{payload['note_id']}")
+    response_cache.invalidate(tags)
+
+event_bus.subscribe("note.", invalidate_cached_responses)
+event_bus.subscribe("user.", invalidate_cached_responses)
+
+@app.get("/admin/api/notes", response_model=AdminNotePage, response_model_exclude_none=True)
+@cached("admin.notes", tags=lambda **_: ["admin:notes"], exclude_none=True, model=AdminNotePage)
+async def get_all_notes_with_user(
+    user=Depends(require_admin),
+    fields: Optional[str] = None,
+    preview: Optional[int] = Query(None, ge=1),
+    q: Optional[str] = Query(None, description="Text contained in the title"),
+    user_id: Optional[int] = None,
+    username: Optional[str] = None,
+    created_from: Optional[str] = Query(None, description="Inclusive lower bound, e.g. 2025-01-31"),
+    created_to: Optional[str] = Query(None, description="Exclusive upper bound"),
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Admin only: One page of notes from all users with user info"""
+    wanted = parse_fields(fields, ADMIN_NOTE_LIST_FIELDS)
+    check_sort(sort, NOTE_SORT_KEYS)
+    after = decode_cursor(cursor, sort)
+    if username is not None:
+        ids = db_get_user_ids(username)
+        if not ids or (user_id is not None and user_id not in ids):
+            return {"items": [], "next_cursor": None, "total": 0 if after is None else None}
+        user_id = ids[0]
     
-    notes = db_get_all_notes()
-    users = db_get_users()
-    user_map = {u[0]: u[1] for u in users}  # id -> username
+    filters = dict(user_id=user_id, q=q, created_from=created_from, created_to=created_to)
+    loop = asyncio.get_running_loop()
+    notes = await loop.run_in_executor(None, lambda: db_list_notes_page(
+        sort=sort, descending=order == "desc", after=after, limit=limit + 1,
+        preview=preview, include_content="content" in wanted, **filters,
+    ))
+    more = len(notes) > limit
+    notes = notes[:limit]
+    total = None if after else await loop.run_in_executor(None, lambda: db_count_notes(**filters))
     
     result = []
     for row in notes:
@@ -550,41 +1257,113 @@ async def get_all_notes_with_user(request: Request):
             "title": row[1], 
             "content": row[2],
             "created_at": row[3],
-            "user_id": row[4] if len(row) > 4 else None,
-            "username": user_map.get(row[4], "Unknown") if len(row) > 4 else "Unknown"
+            "user_id": row[4],
+            "username": row[5] or "Unknown",
         }
-        result.append(note_data)
+        result.append({k: v for k, v in note_data.items() if k in wanted})
     
-    return result
+    next_cursor = encode_cursor(sort, notes[-1], {"id": 0, "title": 1, "created_at": 3}[sort]) if more else None
+    return {"items": result, "next_cursor": next_cursor, "total": total}
+
+@app.get("/admin/api/notes/export")
+async def export_notes_admin(
+    request: Request,
+    fields: Optional[str] = None,
+    q: Optional[str] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+):
+    """Admin only: Every matching note with its author as newline-delimited JSON, streamed"""
+    user = verify_admin_auth(request)
+    wanted = parse_fields(fields, ADMIN_NOTE_LIST_FIELDS)
+    rows = db_iter_notes_with_usernames(
+        user_id=user_id, q=q, created_from=created_from, created_to=created_to,
+        include_content="content" in wanted,
+    )
+
+    def lines():
+        # Runs in the threadpool; rows arrive from SQLite in batches
+        for row in rows:
+            note_data = dict(zip(ADMIN_NOTE_LIST_FIELDS, row))
+            yield json.dumps({k: v for k, v in note_data.items() if k in wanted}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# --- Background user purges ---
+PURGE_BATCH_SIZE = int(os.environ.get("NOTES_PURGE_BATCH_SIZE", "500"))
+PURGE_PAUSE_SECONDS = int(os.environ.get("NOTES_PURGE_PAUSE_MS", "20")) / 1000
+
+async def purge_user(job):
+    """Delete a soft-deleted user's notes a batch at a time, then the user row"""
+    user_id = job.target
+    loop = asyncio.get_running_loop()
+    job.total = await loop.run_in_executor(None, db_count_user_notes, user_id)
+    while True:
+        deleted = await loop.run_in_executor(None, db_delete_user_notes_batch, user_id, PURGE_BATCH_SIZE)
+        if not deleted:
+            break
+        job.done += deleted
+        metrics.incr("jobs.user_purge.notes_deleted", deleted)
+        # Give other requests a turn at the write lock between batches
+        await asyncio.sleep(PURGE_PAUSE_SECONDS)
+    await loop.run_in_executor(None, db_delete_user, user_id)
+
+def resume_user_purges():
+    """Restart purges interrupted by a shutdown"""
+    try:
+        user_ids = db_list_deleted_users()
+    except Exception as e:
+        print(f"Could not list pending user purges: {e}")
+        return
+    for user_id in user_ids:
+        job_manager.start("user_purge", purge_user, target=user_id)
+    if user_ids:
+        print(f"Resumed {len(user_ids)} user purge job(s)")
 
-@app.delete("/admin/api/users/{user_id}")
+@app.delete("/admin/api/users/{user_id}", status_code=202)
 async def delete_user_admin(user_id: int, request: Request):
-    """Admin only: Delete a user and all their notes"""
+    """Admin only: Delete a user now and purge their notes in the background"""
     current_user = verify_admin_auth(request)
     
     # Don't allow deleting yourself
     if user_id == current_user[0]:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    # Delete user's notes first
-    db_delete_user_notes(user_id)
-    
-    # Delete user
-    success = db_delete_user(user_id)
-    if not success:
+    # Hide the user immediately; their notes go in small batches
+    if not db_mark_user_deleted(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    return {"message": "User and their notes deleted successfully"}
+    job = job_manager.start("user_purge", purge_user, target=user_id)
+    event_bus.publish("user.deleted", {"user_id": user_id})
+    return {"message": "User deleted; their notes are being removed", "job_id": job.id}
+
+@app.get("/admin/api/jobs")
+async def list_jobs_admin(request: Request, kind: Optional[str] = None):
+    """Admin only: Background jobs with their progress"""
+    verify_admin_auth(request)
+    return [job.as_dict() for job in job_manager.list(kind)]
+
+@app.get("/admin/api/jobs/{job_id}")
+async def get_job_admin(job_id: int, request: Request):
+    """Admin only: Status and progress of one background job"""
+    verify_admin_auth(request)
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.as_dict()
 
 @app.delete("/admin/api/notes/{note_id}")
 async def delete_note_admin(note_id: int, request: Request):
     """Admin only: Delete any note by ID"""
     current_user = verify_admin_auth(request)
     
-    success = db_delete_note(note_id)
+    note = db_get_note(note_id)
+    success = note is not None and db_delete_note(note_id)
     if not success:
         raise HTTPException(status_code=404, detail="Note not found")
     
+    event_bus.publish("note.deleted", {"note_id": note_id, "user_id": note[4]})
     return {"message": "Note deleted successfully"}
 
 @app.get("/admin/notes", response_model=list[NoteOut])
@@ -621,6 +1400,17 @@ async def health_check():
         "build_time": datetime.utcnow().isoformat()
     }
 
+@app.get("/livez")
+async def livez():
+    """Liveness: the process is up and serving; no I/O"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness for the load balancer: 200 when every check passes, 503 otherwise (cached briefly)"""
+    ready, report = await health.readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
 @app.get("/test-admin")
 async def test_admin_route():
     """Test if admin-like routes work outside /admin path"""
@@ -631,24 +1421,9 @@ async def test_admin_route():
     }
 
 @app.get("/adminlogin", response_class=HTMLResponse)
-async def admin_login_alternative():
+async def admin_login_alternative(request: Request):
     """Alternative admin login route without /admin/ path"""
-    return HTMLResponse("""
-    <!DOCTYPE html>
-    <html>
-    <head><title>Admin Login (Alternative)</title></head>
-    <body>
-        <h1>🔧 Admin Login (Alternative Route)</h1>
-        <p>This is a test to see if the issue is with /admin/ paths specifically.</p>
-        <form method="post" action="/admin/login">
-            <input type="text" name="username" placeholder="Username" required><br><br>
-            <input type="password" name="password" placeholder="Password" required><br><br>
-            <button type="submit">Login</button>
-        </form>
-        <p><a href="/admin/login">Try original admin login</a></p>
-    </body>
-    </html>
-    """)
+    return ADMIN_LOGIN_ALTERNATIVE_PAGE.response(request)
 
 @app.get("/admin/test")
 async def admin_test():
@@ -671,32 +1446,23 @@ async def admin_simple():
     """Simplest possible admin endpoint"""
     return {"message": "Admin endpoint working"}
 
+@app.get("/static/{filename}")
+async def static_asset(filename: str, request: Request):
+    """Fingerprinted admin dashboard assets, cacheable for a year"""
+    asset = static_assets.get(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return asset.response(request)
+
 @app.get("/favicon.ico")
 async def favicon():
     """Return empty response for favicon requests"""
     return Response(status_code=204)
 
-# --- Initialize database on startup ---
-from contextlib import asynccontextmanager
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    print("Initializing database...")
-    try:
-        from database import create_database
-        create_database()
-        print("Database initialized successfully")
-        print("App started successfully.")
-    except Exception as e:
-        print(f"Database initialization error: {e}")
-    yield
-    # Shutdown
-    print("App shutting down...")
-
-
+metrics.set_gauge("startup.import_seconds", round(time.perf_counter() - _import_started, 4))
 
 # --- Run server ---
 if __name__ == "__main__":
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port)
@@ -0,0 +1,208 @@
+"""
+Background SQLite maintenance for the Notes App.
+
+Every NOTES_MAINTENANCE_INTERVAL_SECONDS the scheduler looks at each
+database file and runs whichever tasks are due:
+
+  checkpoint   WAL over NOTES_MAINTENANCE_WAL_MB: PASSIVE checkpoint at any
+               time; when idle the WAL is checkpointed and truncated
+  vacuum       freelist over NOTES_MAINTENANCE_FREELIST_RATIO of the file:
+               incremental_vacuum in chunks until the step budget is spent.
+               Files created before auto_vacuum was enabled need one full
+               VACUUM, which holds the write lock for as long as it takes
+               and is the one task not capped at the step budget. It is
+               off unless NOTES_MAINTENANCE_FULL_VACUUM_MB is set, and then
+               runs only on files up to that size, inside the maintenance
+               window or on a forced run
+  optimize     while idle, at most every NOTES_MAINTENANCE_ANALYZE_HOURS:
+               ANALYZE on first run, PRAGMA optimize afterwards, both with
+               analysis_limit so they only sample each index
+
+"Idle" means inside the NOTES_MAINTENANCE_WINDOW (UTC, e.g. "02:00-05:00")
+or fewer than NOTES_MAINTENANCE_IDLE_RPM requests in the last minute.
+Apart from that full VACUUM, each task is capped at NOTES_MAINTENANCE_STEP_MS
+and gives up quickly if the database is locked, so maintenance never queues behind foreground writers
+for long. What ran is kept in a short history for /admin/api/maintenance.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from collections import deque
+
+import database
+import metrics
+
+INTERVAL_SECONDS = int(os.environ.get("NOTES_MAINTENANCE_INTERVAL_SECONDS", "300"))  # 0 = disabled
+WINDOW = os.environ.get("NOTES_MAINTENANCE_WINDOW", "")
+IDLE_RPM = int(os.environ.get("NOTES_MAINTENANCE_IDLE_RPM", "30"))
+STEP_SECONDS = int(os.environ.get("NOTES_MAINTENANCE_STEP_MS", "200")) / 1000
+WAL_THRESHOLD_BYTES = int(os.environ.get("NOTES_MAINTENANCE_WAL_MB", "64")) * 1048576
+FREELIST_RATIO = float(os.environ.get("NOTES_MAINTENANCE_FREELIST_RATIO", "0.2"))
+FULL_VACUUM_MAX_BYTES = int(os.environ.get("NOTES_MAINTENANCE_FULL_VACUUM_MB", "0")) * 1048576  # 0 = never
+ANALYZE_INTERVAL_SECONDS = float(os.environ.get("NOTES_MAINTENANCE_ANALYZE_HOURS", "24")) * 3600
+ANALYSIS_LIMIT = 400
+VACUUM_CHUNK_PAGES = 256
+
+_history = deque(maxlen=50)
+_last_optimized = {}  # path -> time.time() of the last ANALYZE/optimize
+_last_run = None
+
+
+def _in_window(now=None):
+    if not WINDOW:
+        return False
+    start, _, end = WINDOW.partition("-")
+    now = time.gmtime(now)
+    minutes = now.tm_hour * 60 + now.tm_min
+    start_h, start_m = (int(x) for x in start.split(":"))
+    end_h, end_m = (int(x) for x in end.split(":"))
+    start, end = start_h * 60 + start_m, end_h * 60 + end_m
+    return start <= minutes < end if start <= end else minutes >= start or minutes < end
+
+
+def is_idle():
+    return _in_window() or metrics.sample_count("http.request_seconds", 60) < IDLE_RPM
+
+
+def file_stats(path: str) -> dict:
+    conn = database.connect(path, timeout=STEP_SECONDS)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+    wal_path = path + "-wal"
+    return {
+        "path": path,
+        "bytes": page_size * page_count,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "freelist_ratio": round(freelist / page_count, 4) if page_count else 0.0,
+        "auto_vacuum": ("none", "full", "incremental")[auto_vacuum],
+        "journal_mode": journal_mode,
+        "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+    }
+
+
+def _record(path: str, task: str, started: float, detail):
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    _history.append({"path": path, "task": task, "at": time.time(), "duration_ms": duration_ms, "detail": detail})
+    metrics.incr(f"maintenance.{task}")
+    print(f"Maintenance: {task} on {path} took {duration_ms} ms ({detail})")
+
+
+def _checkpoint(conn, path: str, stats: dict, idle: bool):
+    if stats["journal_mode"] != "wal":
+        return
+    if stats["wal_bytes"] > WAL_THRESHOLD_BYTES:
+        mode = "TRUNCATE" if idle else "PASSIVE"
+    elif idle and stats["wal_bytes"] > 0:
+        mode = "TRUNCATE"
+    else:
+        return
+    started = time.perf_counter()
+    busy, wal_pages, moved = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    _record(path, "checkpoint", started, f"{mode.lower()}: {moved}/{wal_pages} pages{', busy' if busy else ''}")
+
+
+def _vacuum(conn, path: str, stats: dict, in_window: bool):
+    if stats["freelist_ratio"] < FREELIST_RATIO:
+        return
+    started = time.perf_counter()
+    if stats["auto_vacuum"] == "none":
+        # One-off conversion: VACUUM rebuilds the file in one uncapped step, so only
+        # when opted in, for modest files, and never on low traffic alone
+        if not in_window or stats["bytes"] > FULL_VACUUM_MAX_BYTES:
+            return
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        _record(path, "vacuum", started, f"full, freed {stats['freelist_count']} pages, auto_vacuum now incremental")
+        return
+    deadline = started + STEP_SECONDS
+    freed = 0
+    while time.perf_counter() < deadline:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not before:
+            break
+        conn.execute(f"PRAGMA incremental_vacuum({VACUUM_CHUNK_PAGES})")
+        freed += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    _record(path, "vacuum", started, f"incremental, freed {freed} of {stats['freelist_count']} pages")
+
+
+def _optimize(conn, path: str, idle: bool, force: bool):
+    if not (idle or force):
+        return
+    if not force and time.time() - _last_optimized.get(path, 0) < ANALYZE_INTERVAL_SECONDS:
+        return
+    started = time.perf_counter()
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    if has_stats:
+        conn.execute("PRAGMA optimize")
+        task = "optimize"
+    else:
+        conn.execute("ANALYZE")
+        task = "analyze"
+    _last_optimized[path] = time.time()
+    _record(path, task, started, f"analysis_limit={ANALYSIS_LIMIT}")
+
+
+def run_maintenance(force: bool = False):
+    """Run every due task on every database file; force treats the app as idle"""
+    global _last_run
+    idle = force or is_idle()
+    for path in database.database_files():
+        if not os.path.exists(path):
+            continue
+        try:
+            stats = file_stats(path)
+            # isolation_level=None: VACUUM and the PRAGMAs must run outside a transaction
+            conn = database.connect(path, timeout=STEP_SECONDS, isolation_level=None)
+            try:
+                _checkpoint(conn, path, stats, idle)
+                _vacuum(conn, path, stats, force or _in_window())
+                _optimize(conn, path, idle, force)
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            # Usually "database is locked": foreground traffic wins, retry next round
+            metrics.incr("maintenance.skipped_busy")
+            _history.append({"path": path, "task": "skipped", "at": time.time(), "duration_ms": 0, "detail": str(e)})
+    _last_run = time.time()
+    metrics.set_gauge("maintenance.last_run", _last_run)
+
+
+def status() -> dict:
+    files = []
+    for path in database.database_files():
+        if os.path.exists(path):
+            try:
+                files.append(file_stats(path))
+            except sqlite3.Error as e:
+                files.append({"path": path, "error": str(e)})
+    return {
+        "interval_seconds": INTERVAL_SECONDS,
+        "idle": is_idle(),
+        "last_run": _last_run,
+        "files": files,
+        "history": list(reversed(_history)),
+    }
+
+
+async def run_maintenance_job(job):
+    """Job body for JobManager: one forced maintenance pass"""
+    await asyncio.get_running_loop().run_in_executor(None, run_maintenance, True)
+
+
+async def maintenance_scheduler():
+    while True:
+        await asyncio.sleep(INTERVAL_SECONDS)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, run_maintenance)
+        except Exception as e:
+            metrics.incr("maintenance.failed")
+            print(f"Maintenance error: {e}")
@@ -0,0 +1,101 @@
+"""
+In-process counters and gauges for the Notes App.
+Exposed to admins through /admin/api/metrics.
+"""
+import threading
+import time
+from collections import deque
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_samples = {}  # name -> deque of (timestamp, value), newest last
+
+SAMPLE_WINDOW = 2048
+
+
+def incr(name: str, value: int = 1):
+    """Increment a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value):
+    """Set a gauge to its latest value"""
+    with _lock:
+        _gauges[name] = value
+
+
+def get_counter(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def observe(name: str, value: float):
+    """Record a sample (e.g. a latency in seconds) for percentile queries"""
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=SAMPLE_WINDOW)
+        samples.append((time.monotonic(), value))
+
+
+def percentile(name: str, q: float, window_seconds: float = None):
+    """q-th quantile (0..1) of recent samples, or None when there are none"""
+    with _lock:
+        samples = _samples.get(name)
+        if not samples:
+            return None
+        if window_seconds is None:
+            values = [v for _, v in samples]
+        else:
+            cutoff = time.monotonic() - window_seconds
+            values = [v for t, v in samples if t >= cutoff]
+    if not values:
+        return None
+    values.sort()
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def sample_count(name: str, window_seconds: float) -> int:
+    """Number of samples recorded in the last window_seconds"""
+    cutoff = time.monotonic() - window_seconds
+    with _lock:
+        return sum(1 for t, _ in _samples.get(name, ()) if t >= cutoff)
+
+
+def snapshot():
+    """Return a copy of all counters and gauges"""
+    with _lock:
+        names = list(_samples)
+        data = {"counters": dict(_counters), "gauges": dict(_gauges)}
+    data["latency"] = {
+        name: {"p50": percentile(name, 0.5), "p99": percentile(name, 0.99)} for name in names
+    }
+    return data
+
+
+def reset():
+    """Clear all metrics (used by tests and benchmarks)"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _samples.clear()
+
+
+class RequestTimingMiddleware:
+    """Record the duration of every HTTP request (except `exclude` paths) as the `http.request_seconds` sample"""
+
+    def __init__(self, app, exclude=()):
+        self.app = app
+        self.exclude = frozenset(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            observe("http.request_seconds", time.perf_counter() - started)
@@ -0,0 +1,84 @@
+"""
+Thread pools for blocking work, with queue and saturation counts.
+
+  default   the event loop's default executor: database calls and other
+            run_in_executor(None, ...) work (installed from the lifespan)
+  hash      bcrypt hashing and verification, kept apart so a burst of
+            logins queues behind itself instead of behind database reads
+
+Both are TrackedExecutors, so /readyz can tell a pool that is busy from
+one that is backed up.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_WORKERS = int(os.environ.get("NOTES_HASH_WORKERS", "2"))
+
+
+class TrackedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that counts queued and running work"""
+
+    def __init__(self, max_workers: int = None, thread_name_prefix: str = ""):
+        super().__init__(max_workers, thread_name_prefix)
+        self.max_workers = self._max_workers
+        self.queued = 0
+        self.running = 0
+        self._count_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._count_lock:
+            self.queued += 1
+
+        def run():
+            with self._count_lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._count_lock:
+                    self.running -= 1
+
+        future = super().submit(run)
+        # A future cancelled while still queued never runs, so uncount it here
+        future.add_done_callback(self._uncount_cancelled)
+        return future
+
+    def _uncount_cancelled(self, future):
+        if future.cancelled():
+            with self._count_lock:
+                self.queued -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "running": self.running,
+            "queued": self.queued,
+            "saturation": round(self.running / self.max_workers, 3),
+        }
+
+
+default_pool = None
+hash_pool = TrackedExecutor(HASH_WORKERS, thread_name_prefix="hash")
+
+
+def install_default_pool(loop):
+    """Lifespan: replace the loop's default executor with a tracked one of the same size"""
+    global default_pool
+    default_pool = TrackedExecutor(thread_name_prefix="blocking")
+    loop.set_default_executor(default_pool)
+    return default_pool
+
+
+async def run_hashing(func, *args):
+    """Run a password hash or check on the hash pool"""
+    return await asyncio.get_running_loop().run_in_executor(hash_pool, func, *args)
+
+
+def stats() -> dict:
+    result = {"hash": hash_pool.stats()}
+    if default_pool is not None:
+        result["default"] = default_pool.stats()
+    return result
@@ -0,0 +1,182 @@
+"""
+Token-bucket rate limiting for the Notes App.
+
+Buckets are keyed by route name plus a client key (user id or client IP).
+State lives in-process by default; set NOTES_RATE_LIMIT_BACKEND=sqlite:<path>
+to share buckets between gunicorn workers through a small SQLite file.
+That store costs a transaction on the file per check, so async callers use
+RateLimiter.acheck(), which runs it on the default executor.
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# route -> (requests, per seconds). Override with NOTES_RATE_LIMIT_<ROUTE>="10/60"
+DEFAULT_LIMITS = {
+    "login": (10, 60),
+    "register": (5, 60),
+    "admin_login": (10, 60),
+    "notes_read": (120, 60),
+    "notes_write": (60, 60),
+}
+
+# Maximum note requests being processed at once before new ones get a 503
+MAX_INFLIGHT = int(os.environ.get("NOTES_MAX_INFLIGHT", "64"))
+
+
+class RateLimited(Exception):
+    """Raised when a bucket has no tokens left"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class MemoryBucketStore:
+    """Per-process bucket state, bounded to max_keys least recently used buckets"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_rate: float, now: float) -> float:
+        """Take one token; return 0 if allowed, otherwise seconds until one is available"""
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SQLiteBucketStore:
+    """Bucket state shared between processes through a SQLite file.
+
+    Each thread keeps one connection open. Buckets idle for longer than the
+    longest refill window are full again, so they are deleted at most once
+    per prune_interval seconds.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, prune_interval: float = 60):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._window = 0.0  # longest capacity / refill_rate seen
+        self._pruned_at = 0.0
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_buckets_updated ON rate_buckets(updated_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        return conn
+
+    def take(self, key: str, capacity: float, refill_rate: float, now: float) -> float:
+        conn = self._connection()
+        self._window = max(self._window, capacity / refill_rate)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / refill_rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            if now - self._pruned_at >= self.prune_interval:
+                self._pruned_at = now
+                conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - self._window,))
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+
+def _parse_limit(value: str):
+    count, _, period = value.partition("/")
+    return int(count), float(period or 60)
+
+
+class RateLimiter:
+    def __init__(self, store=None, limits=None):
+        self.store = store or MemoryBucketStore()
+        self.limits = dict(limits or DEFAULT_LIMITS)
+        for route in list(self.limits):
+            override = os.environ.get(f"NOTES_RATE_LIMIT_{route.upper()}")
+            if override:
+                self.limits[route] = _parse_limit(override)
+
+    def check(self, route: str, client_key: str):
+        """Consume a token for client_key on route, raising RateLimited when exhausted"""
+        limit = self.limits.get(route)
+        if not limit:
+            return
+        count, period = limit
+        wait = self.store.take(f"{route}:{client_key}", count, count / period, time.time())
+        if wait > 0:
+            metrics.incr(f"rate_limit.rejected.{route}")
+            raise RateLimited(wait)
+        metrics.incr(f"rate_limit.allowed.{route}")
+
+    async def acheck(self, route: str, client_key: str):
+        """check() for async callers; a blocking store runs on the default executor"""
+        if getattr(self.store, "blocking", False):
+            await asyncio.get_running_loop().run_in_executor(None, self.check, route, client_key)
+        else:
+            self.check(route, client_key)
+
+
+def store_from_env():
+    backend = os.environ.get("NOTES_RATE_LIMIT_BACKEND", "memory")
+    if backend.startswith("sqlite:"):
+        return SQLiteBucketStore(backend[len("sqlite:"):])
+    return MemoryBucketStore()
+
+
+def client_ip(request) -> str:
+    """Client IP, taking the address appended by the App Service front end when present"""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        last = forwarded.split(",")[-1].strip()
+        if last.count(":") == 1:  # "ip:port" form, IPv6 addresses are left alone
+            last = last.split(":")[0]
+        return last
+    return request.client.host if request.client else "unknown"
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
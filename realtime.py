@@ -0,0 +1,115 @@
+"""
+In-process fan-out of note changes to WebSocket subscribers.
+
+Each connection gets a Subscriber with a small pending queue. Rapid edits
+are coalesced: a full update or delete supersedes anything still pending,
+and when a slow client falls more than MAX_PENDING patches behind, its
+queue collapses into a single "resync" notice telling it to refetch. A
+subscriber costs one sleeping sender coroutine while idle.
+"""
+import asyncio
+import json
+import os
+
+import metrics
+
+COALESCE_SECONDS = int(os.environ.get("NOTES_WS_COALESCE_MS", "50")) / 1000
+MAX_PENDING = int(os.environ.get("NOTES_WS_MAX_PENDING", "32"))
+SEND_TIMEOUT = float(os.environ.get("NOTES_WS_SEND_TIMEOUT", "10"))
+
+
+class Subscriber:
+    __slots__ = ("websocket", "note_id", "pending", "wakeup", "closed")
+
+    def __init__(self, websocket, note_id: int):
+        self.websocket = websocket
+        self.note_id = note_id
+        self.pending = []
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def offer(self, event: dict, max_pending: int = MAX_PENDING):
+        """Queue an event, coalescing with whatever the client has not received yet"""
+        if self.closed:
+            return
+        if event["type"] in ("note.updated", "note.deleted") or not self.pending:
+            if self.pending:
+                metrics.incr("ws.coalesced", len(self.pending))
+            self.pending = [event]
+        elif self.pending[-1]["type"] == "note.resync":
+            self.pending[-1] = {**self.pending[-1], "version": event.get("version")}
+            metrics.incr("ws.coalesced")
+        elif len(self.pending) >= max_pending or self.pending[-1]["type"] not in ("note.patched", "note.updated"):
+            metrics.incr("ws.coalesced", len(self.pending))
+            self.pending = [{"type": "note.resync", "note_id": self.note_id, "version": event.get("version")}]
+        else:
+            self.pending.append(event)
+        self.wakeup.set()
+
+    async def run_sender(self):
+        """Send queued events until the connection closes"""
+        while not self.closed:
+            await self.wakeup.wait()
+            # Let a burst of edits accumulate before flushing
+            await asyncio.sleep(COALESCE_SECONDS)
+            self.wakeup.clear()
+            batch, self.pending = self.pending, []
+            if not batch:
+                continue
+            payload = json.dumps(batch[0] if len(batch) == 1 else {"type": "batch", "events": batch})
+            try:
+                await asyncio.wait_for(self.websocket.send_text(payload), SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                metrics.incr("ws.slow_disconnects")
+                self.closed = True
+                await self.websocket.close(code=1013)
+                return
+            except Exception:
+                self.closed = True
+                return
+            metrics.incr("ws.messages_sent")
+            if batch[-1]["type"] == "note.deleted":
+                self.closed = True
+                await self.websocket.close(code=1000)
+                return
+
+
+class NoteHub:
+    def __init__(self):
+        self._subscribers = {}  # note_id -> set of Subscriber
+        self._count = 0
+
+    def subscribe(self, note_id: int, websocket) -> Subscriber:
+        subscriber = Subscriber(websocket, note_id)
+        self._subscribers.setdefault(note_id, set()).add(subscriber)
+        self._count += 1
+        metrics.set_gauge("ws.connections", self._count)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.closed = True
+        subscriber.wakeup.set()
+        subscribers = self._subscribers.get(subscriber.note_id)
+        if subscribers and subscriber in subscribers:
+            subscribers.discard(subscriber)
+            self._count -= 1
+            if not subscribers:
+                del self._subscribers[subscriber.note_id]
+            metrics.set_gauge("ws.connections", self._count)
+
+    def publish(self, note_id: int, event: dict):
+        """Fan an event out to every subscriber of the note; never blocks"""
+        subscribers = self._subscribers.get(note_id)
+        if not subscribers:
+            return
+        event = {**event, "note_id": note_id}
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def subscriber_count(self, note_id: int = None) -> int:
+        if note_id is None:
+            return self._count
+        return len(self._subscribers.get(note_id, ()))
+
+
+note_hub = NoteHub()
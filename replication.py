@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Replication of a local-disk database to persistent storage.
+
+Where persistent storage is a network share (Azure App Service's /home),
+SQLite's fsyncs and locks are slow. Put the live database on local disk
+with NOTES_DB_PATH (or :memory:) and point NOTES_REPLICA_DIR at the share:
+
+  boot      if the local database is missing (a fresh instance, or
+            :memory:), the replica is copied into place before the schema
+            check
+  running   every NOTES_REPLICA_INTERVAL_SECONDS, if any database changed,
+            each file is snapshotted with the online backup API (throttled
+            like backups) to local temp space, then copied to the replica
+            directory and renamed into place, manifest last
+  shutdown  one final snapshot
+
+replication.lag_seconds is how far the replica may be behind: 0 when
+nothing was written since the last snapshot began, otherwise the time
+since it began. A crash loses at most that window. Run a single worker
+per replica directory.
+
+Try it locally with two directories:
+    NOTES_DB_PATH=/tmp/local/notes_app.db NOTES_REPLICA_DIR=/tmp/replica uvicorn main:app
+    python replication.py status|sync|restore
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import backup
+import database
+import metrics
+
+REPLICA_DIR = os.environ.get("NOTES_REPLICA_DIR", "")  # empty = replication off
+INTERVAL_SECONDS = float(os.environ.get("NOTES_REPLICA_INTERVAL_SECONDS", "10"))
+MANIFEST = "replica.json"
+
+_lock = threading.Lock()
+_watchers = {}  # path -> connection used only to read PRAGMA data_version, under _lock
+_synced = None  # data versions captured when the last snapshot began
+_synced_at = None
+_started_at = time.time()
+
+
+def _replica_name(index: int) -> str:
+    # By position rather than file name, so a replica of notes_app.db can be restored into :memory:
+    return "main.db" if index == 0 else f"shard{index - 1}.db"
+
+
+def _versions():
+    """PRAGMA data_version of every database; it changes whenever another connection commits"""
+    versions = []
+    for path in database.database_files():
+        conn = _watchers.get(path)
+        if conn is None:
+            conn = _watchers[path] = database.connect(path, check_same_thread=False)
+        versions.append(conn.execute("PRAGMA data_version").fetchone()[0])
+    return versions
+
+
+def _fsync(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_manifest(replica_dir: str = None):
+    path = os.path.join(replica_dir or REPLICA_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def lag() -> float:
+    # The watcher connections are shared, so only one thread may use them at a time
+    with _lock:
+        if _synced is not None and _versions() == _synced:
+            return 0.0
+        return time.time() - (_synced_at or _started_at)
+
+
+def sync(force: bool = False) -> bool:
+    """Snapshot every database into REPLICA_DIR if anything changed; returns True if it copied"""
+    global _synced, _synced_at
+    with _lock:
+        versions = _versions()
+        if versions == _synced and not force:
+            return False
+        started_at = time.time()
+        started = time.perf_counter()
+        os.makedirs(REPLICA_DIR, exist_ok=True)
+        copied = 0
+        files = []
+        for index, path in enumerate(database.database_files()):
+            name = _replica_name(index)
+            # Snapshot on local disk, then one sequential copy to the share: no SQLite locking over the network
+            fd, local = tempfile.mkstemp(suffix=".db")
+            os.close(fd)
+            try:
+                copied += backup.copy_database(path, local)
+                # A single self-contained file (no -wal), restorable into :memory: as well
+                conn = database.connect(local)
+                conn.execute("PRAGMA journal_mode = DELETE")
+                conn.close()
+                staged = os.path.join(REPLICA_DIR, name + ".sync")
+                shutil.copyfile(local, staged)
+                _fsync(staged)
+                os.replace(staged, os.path.join(REPLICA_DIR, name))
+            finally:
+                os.remove(local)
+            files.append(name)
+        staged = os.path.join(REPLICA_DIR, MANIFEST + ".sync")
+        with open(staged, "w") as f:
+            json.dump({"synced_at": started_at, "files": files}, f)
+        _fsync(staged)
+        os.replace(staged, os.path.join(REPLICA_DIR, MANIFEST))
+        _synced, _synced_at = versions, started_at
+
+    seconds = time.perf_counter() - started
+    metrics.incr("replication.syncs")
+    metrics.incr("replication.bytes", copied)
+    metrics.set_gauge("replication.last_sync", started_at)
+    metrics.set_gauge("replication.last_duration_seconds", round(seconds, 3))
+    return True
+
+
+def restore(force: bool = False):
+    """Copy the replica into place if the local database is missing (or force); returns restored paths"""
+    global _synced, _synced_at
+    if not REPLICA_DIR:
+        return []
+    manifest = read_manifest()
+    if manifest is None:
+        print(f"Replica: nothing in {REPLICA_DIR} yet, starting empty")
+        return []
+    if not force and not database.is_memory() and os.path.exists(database.DB_NAME):
+        print(f"Replica: keeping existing local database {database.DB_NAME}")
+        return []
+    targets = database.database_files()
+    if len(manifest["files"]) != len(targets):
+        raise RuntimeError(
+            f"Replica in {REPLICA_DIR} has {len(manifest['files'])} database file(s), "
+            f"this configuration expects {len(targets)} (check NOTES_SHARDS)"
+        )
+    started = time.perf_counter()
+    for name, target in zip(manifest["files"], targets):
+        if not database.is_memory(target):
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        backup.copy_database(os.path.join(REPLICA_DIR, name), target, backup.Throttle(budget=float("inf"), pause=0))
+        if not database.is_memory(target):
+            # Replicas are stored in rollback mode; the live file goes back to the configured mode
+            conn = database.connect(target)
+            conn.execute(f"PRAGMA journal_mode = {database.JOURNAL_MODE}")
+            conn.close()
+    with _lock:
+        _synced, _synced_at = _versions(), manifest["synced_at"]
+    metrics.incr("replication.restores")
+    print(f"Replica: restored {len(targets)} file(s) from {REPLICA_DIR} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return targets
+
+
+def status() -> dict:
+    manifest = read_manifest() if REPLICA_DIR else None
+    return {
+        "replica_dir": REPLICA_DIR or None,
+        "interval_seconds": INTERVAL_SECONDS,
+        "last_sync": manifest["synced_at"] if manifest else None,
+        "lag_seconds": round(lag(), 3) if REPLICA_DIR else None,
+        "files": manifest["files"] if manifest else [],
+    }
+
+
+async def replicator():
+    """Lifespan task: snapshot to the replica every INTERVAL_SECONDS while there are changes"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(INTERVAL_SECONDS)
+        try:
+            await loop.run_in_executor(None, sync)
+        except Exception as e:
+            metrics.incr("replication.failed")
+            print(f"Replication error: {e}")
+        metrics.set_gauge("replication.lag_seconds", round(await loop.run_in_executor(None, lag), 3))
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if not REPLICA_DIR:
+        print("Set NOTES_REPLICA_DIR (and NOTES_DB_PATH for the local database)")
+        sys.exit(1)
+    if command == "sync":
+        sync(force=True)
+        print(f"✅ Replicated {database.DB_NAME} to {REPLICA_DIR}")
+    elif command == "restore":
+        for path in restore(force=True):
+            print(f"   restored {path}")
+    elif command == "status":
+        print(json.dumps(status(), indent=2))
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
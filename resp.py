@@ -0,0 +1,30 @@
+"""
+Minimal RESP (Redis protocol) encoding and reply parsing over asyncio streams.
+Shared by the event bus and the response cache Redis backends.
+"""
+
+
+def encode_command(*parts) -> bytes:
+    out = [f"*{len(parts)}\r\n".encode()]
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        out.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(out)
+
+
+async def read_reply(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind in (b"+", b"-", b":"):
+        return rest
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        return [await read_reply(reader) for _ in range(int(rest))]
+    raise ConnectionError(f"unexpected RESP reply {line!r}")
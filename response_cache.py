@@ -0,0 +1,337 @@
+"""
+Response cache for read endpoints.
+
+    @cached("notes.list", tags=lambda user, **_: [f"user:{user[0]}:notes"])
+    async def get_notes(..., user=Depends(...)):
+
+Entries are the encoded JSON body, keyed by route, principal (the `user`
+dependency's id) and the handler's query/path parameters. Each entry is
+also keyed by the current version of its tags; invalidate(tags) bumps those
+versions, so every entry depending on them misses from then on and ages
+out of the backend. Handlers that raise or return a Response are not cached.
+
+Backends (NOTES_RESPONSE_CACHE):
+  memory               per-worker LRU bounded by NOTES_RESPONSE_CACHE_MB (default)
+  shm:<path>           SQLite file on a tmpfs such as /dev/shm, shared by workers
+  redis://host:port/0  any RESP-speaking server, shared by workers and hosts
+  off                  no caching
+
+With memory, other workers learn about writes through the event bus, so
+run a cross-worker NOTES_EVENT_BUS when there is more than one worker.
+"""
+import asyncio
+import functools
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+import metrics
+from resp import encode_command, read_reply
+
+CACHE_SPEC = os.environ.get("NOTES_RESPONSE_CACHE", "memory")
+MAX_BYTES = int(os.environ.get("NOTES_RESPONSE_CACHE_MB", "32")) * 1048576
+DEFAULT_TTL = float(os.environ.get("NOTES_RESPONSE_CACHE_TTL", "60"))
+MAX_TAGS = int(os.environ.get("NOTES_RESPONSE_CACHE_TAGS", "100000"))
+
+
+class LRUBackend:
+    """In-process LRU bounded by the total size of cached bodies.
+
+    Tag versions are an LRU of max_tags as well. A tag that is not tracked
+    reads as `_floor`, which is raised past the version of every evicted
+    tag, so a tag's version never goes back to one an old entry was keyed on.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES, max_tags: int = MAX_TAGS):
+        self.max_bytes = max_bytes
+        self.max_tags = max_tags
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._versions = OrderedDict()  # tag -> version
+        self._floor = 0
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, body: bytes, ttl: float):
+        if len(body) > self.max_bytes // 4:
+            return  # one huge response shouldn't flush everything else
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + ttl, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+        metrics.set_gauge("cache.bytes", self.size)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    async def versions(self, tags):
+        result = []
+        for tag in tags:
+            version = self._versions.get(tag)
+            if version is None:
+                version = self._floor
+            else:
+                self._versions.move_to_end(tag)
+            result.append(version)
+        return result
+
+    def bump(self, tags):
+        for tag in tags:
+            self._versions[tag] = self._versions.pop(tag, self._floor) + 1
+        while len(self._versions) > self.max_tags:
+            _, version = self._versions.popitem(last=False)
+            self._floor = max(self._floor, version + 1)
+
+
+class SQLiteBackend:
+    """Shared cache in a SQLite file; put it on tmpfs (/dev/shm) so it lives in memory.
+
+    Each thread keeps one connection open, and the async methods run the
+    queries on the default executor so a locked file never holds up the loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL, body BLOB)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (tag TEXT PRIMARY KEY, version INTEGER)")
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=1)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+        return conn
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _get(self, key: str):
+        row = self._connection().execute(
+            "SELECT body FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, body: bytes, ttl: float):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO cache (key, expires, body) VALUES (?, ?, ?)", (key, time.time() + ttl, body))
+        if random.random() < 0.02:
+            # Occasional trim: expired rows first, then the oldest until under the byte limit
+            conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            size = conn.execute("SELECT COALESCE(SUM(length(body)), 0) FROM cache").fetchone()[0]
+            while size > self.max_bytes:
+                oldest = conn.execute("SELECT rowid, length(body) FROM cache ORDER BY rowid LIMIT 100").fetchall()
+                conn.executemany("DELETE FROM cache WHERE rowid = ?", [(r[0],) for r in oldest])
+                size -= sum(r[1] for r in oldest)
+            metrics.set_gauge("cache.bytes", size)
+        conn.commit()
+
+    def _versions(self, tags):
+        found = dict(self._connection().execute(
+            f"SELECT tag, version FROM cache_versions WHERE tag IN ({', '.join('?' for _ in tags)})", list(tags)
+        ).fetchall())
+        return [found.get(tag, 0) for tag in tags]
+
+    def _bump(self, tags):
+        conn = self._connection()
+        conn.executemany(
+            "INSERT INTO cache_versions (tag, version) VALUES (?, 1) "
+            "ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+            [(tag,) for tag in tags],
+        )
+        conn.commit()
+
+    async def get(self, key: str):
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, body: bytes, ttl: float):
+        await self._run(self._set, key, body, ttl)
+
+    async def versions(self, tags):
+        return await self._run(self._versions, tags)
+
+    async def bump(self, tags):
+        await self._run(self._bump, tags)
+
+
+class RedisBackend:
+    """Shared cache on a RESP server; one pipelined connection per worker"""
+
+    def __init__(self, url: str, prefix: str = "notes-cache:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.prefix = prefix
+        self._conn = None
+        self._lock = None
+
+    async def _call(self, *parts):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._conn is None:
+                        reader, writer = await asyncio.open_connection(self.host, self.port)
+                        if self.db:
+                            writer.write(encode_command("SELECT", self.db))
+                            await read_reply(reader)
+                        self._conn = (reader, writer)
+                    reader, writer = self._conn
+                    writer.write(encode_command(*parts))
+                    await writer.drain()
+                    return await read_reply(reader)
+                except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                    self._conn = None
+                    if attempt == 2:
+                        raise
+
+    async def get(self, key: str):
+        return await self._call("GET", self.prefix + key)
+
+    async def set(self, key: str, body: bytes, ttl: float):
+        await self._call("SET", self.prefix + key, body, "PX", int(ttl * 1000))
+
+    async def versions(self, tags):
+        reply = await self._call("MGET", *[f"{self.prefix}v:{tag}" for tag in tags])
+        return [int(v) if v else 0 for v in reply]
+
+    async def bump(self, tags):
+        for tag in tags:
+            await self._call("INCR", f"{self.prefix}v:{tag}")
+
+
+def backend_from_env():
+    if CACHE_SPEC == "off":
+        return None
+    if CACHE_SPEC.startswith("shm:"):
+        return SQLiteBackend(CACHE_SPEC[len("shm:"):])
+    if CACHE_SPEC.startswith("redis://"):
+        return RedisBackend(CACHE_SPEC)
+    return LRUBackend()
+
+
+def _drop_none(value):
+    if isinstance(value, dict):
+        return {k: _drop_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_none(v) for v in value]
+    return value
+
+
+class ResponseCache:
+    def __init__(self, backend=None, ttl: float = DEFAULT_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats = {}  # route -> [hits, misses]
+        self._bumps = set()  # invalidations still running on async backends
+
+    def _count(self, route: str, hit: bool):
+        stats = self._stats.setdefault(route, [0, 0])
+        stats[0 if hit else 1] += 1
+        metrics.incr(f"cache.{route}.{'hits' if hit else 'misses'}")
+        metrics.set_gauge(f"cache.{route}.hit_ratio", round(stats[0] / (stats[0] + stats[1]), 4))
+
+    def invalidate(self, tags):
+        """Make every entry depending on one of `tags` miss from now on"""
+        if self.backend is None or not tags:
+            return
+        metrics.incr("cache.invalidations", len(tags))
+        pending = self.backend.bump(list(tags))
+        if asyncio.iscoroutine(pending):
+            # Async backends: cached reads on this worker wait for it (see cached())
+            try:
+                task = asyncio.get_running_loop().create_task(pending)
+            except RuntimeError:
+                asyncio.run(pending)
+                return
+            self._bumps.add(task)
+            task.add_done_callback(self._bump_done)
+
+    def _bump_done(self, task):
+        self._bumps.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            metrics.incr("cache.errors")
+            print(f"Response cache invalidation failed: {task.exception()}")
+
+    def cached(self, route: str, tags, ttl: float = None, exclude_none: bool = False, model=None):
+        """Cache a GET handler's JSON body; `tags(**handler_kwargs)` names what it depends on.
+
+        The returned Response skips the route's response_model, so pass the
+        same type as `model` for the body to get its defaults and filtering.
+        """
+        def decorator(func):
+            adapter = TypeAdapter(model) if model is not None else None
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if self.backend is None:
+                    return await func(*args, **kwargs)
+                user = kwargs.get("user")
+                entry_tags = tags(**kwargs)
+                params = sorted(
+                    (k, v) for k, v in kwargs.items()
+                    if k not in ("user", "request") and isinstance(v, (str, int, float, bool, type(None)))
+                )
+                if self._bumps:
+                    # A read after a write on this worker must not see the old versions
+                    await asyncio.wait(list(self._bumps))
+                try:
+                    versions = await self.backend.versions(entry_tags)
+                    key = json.dumps([route, user[0] if user else None, params, versions], separators=(",", ":"))
+                    body = await self.backend.get(key)
+                except (sqlite3.Error, ConnectionError, OSError) as e:
+                    metrics.incr("cache.errors")
+                    print(f"Response cache unavailable: {e}")
+                    return await func(*args, **kwargs)
+                if body is not None:
+                    self._count(route, True)
+                    return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+                self._count(route, False)
+                result = await func(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                if adapter is not None:
+                    result = adapter.validate_python(result)
+                content = jsonable_encoder(result)
+                if exclude_none:
+                    content = _drop_none(content)
+                body = json.dumps(content, separators=(",", ":")).encode()
+                try:
+                    await self.backend.set(key, body, ttl or self.ttl)
+                except (sqlite3.Error, ConnectionError, OSError):
+                    metrics.incr("cache.errors")
+                return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache(backend_from_env())
+cached = response_cache.cached
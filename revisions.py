@@ -0,0 +1,124 @@
+"""
+Delta encoding for note revision history.
+
+A delta is a JSON list of operations applied to the previous revision's
+content: ["=", n] keeps n characters, ["-", n] skips n characters and
+["+", text] inserts text. Every SNAPSHOT_INTERVAL-th revision stores the
+full content instead, so rebuilding any revision applies at most
+SNAPSHOT_INTERVAL - 1 deltas.
+"""
+import difflib
+import json
+import os
+
+SNAPSHOT_INTERVAL = int(os.environ.get("NOTES_REVISION_SNAPSHOT_INTERVAL", "20"))
+
+
+def is_snapshot_revision(revision: int) -> bool:
+    return (revision - 1) % SNAPSHOT_INTERVAL == 0
+
+
+def make_delta(old: str, new: str) -> str:
+    """Encode `new` as edit operations against `old`"""
+    # Trim the common prefix and suffix first: autosave edits usually touch one spot
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_mid = old[prefix:len(old) - suffix]
+    new_mid = new[prefix:len(new) - suffix]
+
+    ops = []
+    if prefix:
+        ops.append(["=", prefix])
+    if old_mid and new_mid and ("\n" in old_mid or "\n" in new_mid):
+        # Several changed regions: line diff the middle part
+        old_lines = old_mid.splitlines(keepends=True)
+        new_lines = new_mid.splitlines(keepends=True)
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            old_len = sum(len(line) for line in old_lines[i1:i2])
+            if tag == "equal":
+                ops.append(["=", old_len])
+                continue
+            if old_len:
+                ops.append(["-", old_len])
+            if j2 > j1:
+                ops.append(["+", "".join(new_lines[j1:j2])])
+    else:
+        if old_mid:
+            ops.append(["-", len(old_mid)])
+        if new_mid:
+            ops.append(["+", new_mid])
+    if suffix:
+        ops.append(["=", suffix])
+    return json.dumps(ops, separators=(",", ":"), ensure_ascii=False)
+
+
+def apply_delta(old: str, delta: str) -> str:
+    """Rebuild content from the previous revision and a delta"""
+    parts = []
+    pos = 0
+    for op, arg in json.loads(delta):
+        if op == "=":
+            parts.append(old[pos:pos + arg])
+            pos += arg
+        elif op == "-":
+            pos += arg
+        elif op == "+":
+            parts.append(arg)
+        else:
+            raise ValueError(f"Unknown delta operation: {op!r}")
+    return "".join(parts)
+
+
+def utf16_length(text: str) -> int:
+    """Length in UTF-16 code units, i.e. JavaScript's String.length"""
+    return len(text) + sum(1 for ch in text if ord(ch) > 0xFFFF)
+
+
+def _utf16_positions(content: str):
+    """UTF-16 offset -> code point index at every character boundary, or None when they are equal"""
+    if content.isascii() or utf16_length(content) == len(content):
+        return None
+    positions = {}
+    offset = 0
+    for index, ch in enumerate(content):
+        positions[offset] = index
+        offset += 2 if ord(ch) > 0xFFFF else 1
+    positions[offset] = len(content)
+    return positions
+
+
+def apply_edits(content: str, edits) -> str:
+    """Apply (start, end, text) replacements whose offsets refer to the original content.
+
+    Offsets count UTF-16 code units like browser string indices, so a
+    character outside the BMP (most emoji) is two units wide. Ranges must not
+    overlap; ValueError is raised for out of range or overlapping edits and
+    for offsets that split a surrogate pair.
+    """
+    positions = _utf16_positions(content)
+    length = len(content) if positions is None else utf16_length(content)
+
+    def index(offset):
+        if positions is None:
+            return offset
+        if offset not in positions:
+            raise ValueError(f"Edit offset {offset} splits a surrogate pair")
+        return positions[offset]
+
+    ordered = sorted(edits, key=lambda e: (e[0], e[1]))
+    parts = []
+    pos = 0
+    for start, end, text in ordered:
+        if start < pos or end < start or end > length:
+            raise ValueError(f"Invalid edit range {start}-{end}")
+        parts.append(content[index(pos):index(start)])
+        parts.append(text)
+        pos = end
+    parts.append(content[index(pos):])
+    return "".join(parts)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline shard maintenance for the Notes App.
+
+Usage:
+    python shard_tool.py status [SHARDS]
+    python shard_tool.py rebalance OLD_SHARDS NEW_SHARDS
+
+Run `rebalance` with the app stopped whenever NOTES_SHARDS changes (for
+example 1 -> 4 to split notes_app.db). Every user's notes and revisions are
+moved to the shard for the new count, and the note directory in the main
+database is rebuilt. Note ids are kept; revision ids of moved notes are
+reassigned by their new shard. Re-running an interrupted rebalance is safe.
+
+A process killed between reserving a note id in the directory and writing
+the note leaves a directory entry with no note; `rebalance N N` rebuilds
+the directory from the shards and drops it.
+"""
+import os
+import sys
+
+import database
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _move_user(src, dst, user_id):
+    note_columns = _columns(src, "notes")
+    revision_columns = [c for c in _columns(src, "note_revisions") if c != "id"]
+    notes = src.execute(f"SELECT {', '.join(note_columns)} FROM notes WHERE user_id = ?", (user_id,)).fetchall()
+    if not notes:
+        return 0
+    note_ids = [row[note_columns.index("id")] for row in notes]
+    marks = ", ".join("?" for _ in note_ids)
+    revisions = src.execute(
+        f"SELECT {', '.join(revision_columns)} FROM note_revisions WHERE note_id IN ({marks})", note_ids
+    ).fetchall()
+
+    dst.execute("BEGIN IMMEDIATE")
+    dst.executemany(
+        f"INSERT OR REPLACE INTO notes ({', '.join(note_columns)}) VALUES ({', '.join('?' for _ in note_columns)})",
+        notes,
+    )
+    dst.execute(f"DELETE FROM note_revisions WHERE note_id IN ({marks})", note_ids)
+    dst.executemany(
+        f"INSERT INTO note_revisions ({', '.join(revision_columns)}) VALUES ({', '.join('?' for _ in revision_columns)})",
+        revisions,
+    )
+    # INSERT OR REPLACE of a note left by an interrupted run skips the delete trigger
+    database.rebuild_user_stats(dst.cursor(), user_id)
+    dst.execute("COMMIT")
+
+    src.execute("BEGIN IMMEDIATE")
+    src.execute(f"DELETE FROM note_revisions WHERE note_id IN ({marks})", note_ids)
+    src.execute("DELETE FROM notes WHERE user_id = ?", (user_id,))
+    src.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,))
+    src.execute("COMMIT")
+    return len(notes)
+
+
+def rebalance(old_shards: int, new_shards: int):
+    database.NOTE_SHARDS = new_shards
+    database.create_database()
+
+    moved = 0
+    for index in range(old_shards):
+        src_path = database.shard_path(index, old_shards)
+        if not os.path.exists(src_path):
+            continue
+        src = database.connect(src_path, isolation_level=None)
+        user_ids = [row[0] for row in src.execute("SELECT DISTINCT user_id FROM notes")]
+        for user_id in user_ids:
+            dst_path = database.shard_path(database.shard_for_user(user_id, new_shards), new_shards)
+            if dst_path == src_path:
+                continue
+            dst = database.connect(dst_path, isolation_level=None)
+            count = _move_user(src, dst, user_id)
+            dst.close()
+            moved += count
+            print(f"   user {user_id}: {count} notes {os.path.basename(src_path)} -> {os.path.basename(dst_path)}")
+        src.close()
+
+    # Rebuild the note directory (only consulted when there is more than one shard)
+    main = database.connect()
+    main.execute("DELETE FROM note_directory")
+    if new_shards > 1:
+        for index in range(new_shards):
+            shard = database.connect(database.shard_path(index, new_shards))
+            rows = shard.execute("SELECT id, user_id FROM notes").fetchall()
+            shard.close()
+            main.executemany("INSERT INTO note_directory (id, user_id) VALUES (?, ?)", rows)
+        # New ids must continue after every id ever handed out by the unsharded notes table
+        seq = main.execute("""
+            SELECT MAX(
+                COALESCE((SELECT MAX(id) FROM note_directory), 0),
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'notes'), 0)
+            )
+        """).fetchone()[0]
+        if main.execute("SELECT 1 FROM sqlite_sequence WHERE name = 'note_directory'").fetchone():
+            main.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'note_directory'", (seq,))
+        else:
+            main.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('note_directory', ?)", (seq,))
+    main.commit()
+    main.close()
+    print(f"✅ Moved {moved} notes from {old_shards} to {new_shards} shard(s)")
+
+
+def status(shards: int):
+    for index in range(shards):
+        path = database.shard_path(index, shards)
+        if not os.path.exists(path):
+            print(f"   {path}: missing")
+            continue
+        conn = database.connect(path)
+        notes, users = conn.execute("SELECT COUNT(*), COUNT(DISTINCT user_id) FROM notes").fetchone()
+        conn.close()
+        print(f"   {path}: {notes} notes, {users} users, {os.path.getsize(path) // 1024} KB")
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "status":
+        status(int(sys.argv[2]) if len(sys.argv) > 2 else database.NOTE_SHARDS)
+    elif len(sys.argv) == 4 and sys.argv[1] == "rebalance":
+        rebalance(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,10 @@
 Simple script to verify the database schema and test user-note associations directly.
 """
 
-import sqlite3
 import hashlib
 
+import database
+
 def hash_password_simple(password):
     """Simple password hashing for testing."""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -15,7 +16,7 @@ def verify_database_schema():
     print("Verifying database schema...")
     
     # Check the schema
-    conn = sqlite3.connect("notes_app.db")
+    conn = database.connect()
     cursor = conn.cursor()
     
     # Check users table
@@ -48,7 +49,7 @@ def test_user_note_association():
     """Test creating users and notes and verify associations."""
     print("\nTesting user-note associations...")
     
-    conn = sqlite3.connect("notes_app.db")
+    conn = database.connect()
     cursor = conn.cursor()
     
     # Create test users if they don't exist
@@ -111,7 +112,7 @@ def check_existing_data():
     """Check what data currently exists in the database."""
     print("\nChecking existing data in database...")
     
-    conn = sqlite3.connect("notes_app.db")
+    conn = database.connect()
     cursor = conn.cursor()
     
     # Check users
@@ -0,0 +1,88 @@
+"""
+Precomputed values served from memory (stale-while-revalidate).
+
+    admin_stats = Snapshot("admin_stats", compute_admin_stats, interval=30)
+    value, age, stale = await admin_stats.get()
+
+refresh_loop(), started from the app lifespan, recomputes each snapshot
+once it is `interval` seconds old or a write marked it stale, so readers normally get the value
+straight from memory. A value that is too old, or that a write marked
+stale, is still returned immediately while a single refresh runs in the
+background. Only a read before the first computation has finished waits.
+"""
+import asyncio
+import time
+
+import metrics
+
+TICK_SECONDS = 1.0
+
+_snapshots = []
+
+
+class Snapshot:
+    def __init__(self, name: str, compute, interval: float):
+        self.name = name
+        self.compute = compute
+        self.interval = interval
+        self.value = None
+        self.computed_at = None
+        self.stale = False
+        self.error = None
+        self._refresh = None
+        _snapshots.append(self)
+
+    def age(self):
+        return None if self.computed_at is None else time.time() - self.computed_at
+
+    def is_fresh(self) -> bool:
+        return self.computed_at is not None and not self.stale and self.age() < self.interval
+
+    def mark_stale(self):
+        """The next read (or loop tick) starts a refresh; readers keep the old value until it lands"""
+        self.stale = True
+
+    def refresh(self):
+        """Start a refresh unless one is already running; returns its task"""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._run())
+        return self._refresh
+
+    async def _run(self):
+        # Cleared first, so a write landing mid-computation marks the new value stale again
+        self.stale = False
+        started = time.perf_counter()
+        try:
+            value = await self.compute()
+        except Exception as e:
+            self.stale = True
+            self.error = str(e)
+            metrics.incr(f"snapshot.{self.name}.failed")
+            print(f"Snapshot {self.name} refresh failed: {e}")
+            return
+        self.value = value
+        self.computed_at = time.time()
+        self.error = None
+        metrics.observe(f"snapshot.{self.name}.refresh_seconds", time.perf_counter() - started)
+
+    async def get(self):
+        """(value, age in seconds, stale); waits only if nothing has been computed yet"""
+        if self.computed_at is None:
+            await asyncio.shield(self.refresh())
+            if self.computed_at is None:
+                raise RuntimeError(f"{self.name} is unavailable: {self.error}")
+        elif not self.is_fresh():
+            metrics.incr(f"snapshot.{self.name}.stale_reads")
+            self.refresh()
+        return self.value, self.age(), not self.is_fresh()
+
+
+async def refresh_loop():
+    """Lifespan task: compute every snapshot up front, then refresh each once it reaches its interval
+    or a write marks it stale (at most once per tick; after a failure, only at the interval)"""
+    while True:
+        for snapshot in _snapshots:
+            if (snapshot.computed_at is None or snapshot.age() >= snapshot.interval
+                    or (snapshot.stale and snapshot.error is None)):
+                snapshot.refresh()
+        await asyncio.sleep(TICK_SECONDS)
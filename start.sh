@@ -7,13 +7,10 @@ echo "🌐 Port: ${PORT:-8000}"
 echo "📁 Working directory: $(pwd)"
 echo "📄 Files in directory: $(ls -la)"
 
-# Initialize database
-echo "🗄️ Initializing database..."
-python -c "from database import init_db; init_db()" 2>/dev/null || echo "Database already exists"
-
-# Create admin user  
-echo "👤 Creating admin user..."
-python create_simple_admin.py 2>/dev/null || echo "Admin user already exists"
+# Database schema and the default admin user are set up once inside the
+# app process (see lifespan in main.py), so no extra interpreters are started here.
+# Storage is set through NOTES_DB_PATH, NOTES_JOURNAL_MODE (default "delete";
+# only use "wal" on local disk) and NOTES_REPLICA_DIR; see BUILD_DEPLOYMENT_GUIDE.md.
 
 echo "🎊 Starting 3D Admin Dashboard server..."
 
@@ -0,0 +1,747 @@
+// Tab functionality
+function showTab(tabName) {
+    // Hide all tabs
+    document.querySelectorAll('.tab-content').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelectorAll('.nav-item').forEach(nav => {
+        nav.classList.remove('active');
+    });
+
+    // Show selected tab
+    document.getElementById(tabName).classList.add('active');
+    document.querySelector(`[onclick="showTab('${tabName}')"]`).classList.add('active');
+
+    // Load data based on tab
+    if (tabName === 'dashboard') loadStats();
+    if (tabName === 'users') loadUsers();
+    if (tabName === 'notes') loadNotes();
+}
+
+// Load statistics
+async function loadStats(retried = false) {
+    try {
+        const response = await fetch('/admin/api/stats');
+        const stats = await response.json();
+        // Served from a background snapshot; a stale one is being refreshed, so look again shortly
+        if (stats.stale && !retried) setTimeout(() => loadStats(true), 1000);
+
+        // Animate the number changes
+        animateNumberChange('totalUsers', stats.total_users);
+        animateNumberChange('adminUsers', stats.admin_users);
+        animateNumberChange('totalNotes', stats.total_notes);
+        animateNumberChange('recentNotes', stats.recent_notes);
+
+        // Update charts with new data
+        updateCharts(stats);
+    } catch (error) {
+        console.error('Error loading stats:', error);
+    }
+}
+
+// Animate number changes smoothly
+function animateNumberChange(elementId, targetValue) {
+    const element = document.getElementById(elementId);
+    const currentValue = parseInt(element.textContent) || 0;
+
+    // Only animate if there's a significant change
+    if (Math.abs(targetValue - currentValue) < 1) {
+        element.textContent = targetValue;
+        return;
+    }
+
+    const difference = targetValue - currentValue;
+    const steps = Math.min(15, Math.abs(difference));
+    const stepValue = difference / steps;
+
+    let currentStep = 0;
+    const timer = setInterval(() => {
+        currentStep++;
+        const newValue = Math.round(currentValue + (stepValue * currentStep));
+        element.textContent = newValue;
+
+        if (currentStep >= steps) {
+            clearInterval(timer);
+            element.textContent = targetValue;
+        }
+    }, 80);
+}
+
+// Escape text for use inside HTML (and inside quoted attributes)
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+// Table that fetches pages from a cursor-paginated endpoint as it is
+// scrolled and only keeps the visible rows (plus a buffer) in the DOM.
+class VirtualTable {
+    constructor({ scrollId, bodyId, countId, endpoint, columns, renderRow, rowHeight = 56, pageSize = 100 }) {
+        this.scroll = document.getElementById(scrollId);
+        this.tbody = document.getElementById(bodyId);
+        this.count = document.getElementById(countId);
+        this.endpoint = endpoint;
+        this.columns = columns;
+        this.renderRow = renderRow;
+        this.rowHeight = rowHeight;
+        this.pageSize = pageSize;
+        this.buffer = 10;
+        this.params = {};
+        this.generation = 0;
+        this.scheduled = false;
+        this.scroll.addEventListener('scroll', () => this.scheduleRender());
+        window.addEventListener('resize', () => this.scheduleRender());
+    }
+
+    reset(params) {
+        this.params = params;
+        this.rows = [];
+        this.total = null;
+        this.cursor = null;
+        this.done = false;
+        this.loading = false;
+        this.generation++;
+        this.scroll.scrollTop = 0;
+        this.tbody.innerHTML = '';
+        return this.fetchNext();
+    }
+
+    async fetchNext() {
+        if (this.loading || this.done) return;
+        this.loading = true;
+        const generation = this.generation;
+        const query = new URLSearchParams({ ...this.params, limit: this.pageSize });
+        if (this.cursor) query.set('cursor', this.cursor);
+        try {
+            const response = await fetch(`${this.endpoint}?${query}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const page = await response.json();
+            if (generation !== this.generation) return;  // filters changed meanwhile
+            this.rows.push(...page.items);
+            if (page.total !== undefined && page.total !== null) this.total = page.total;
+            this.cursor = page.next_cursor || null;
+            this.done = !this.cursor;
+        } catch (error) {
+            console.error(`Error loading ${this.endpoint}:`, error);
+            this.done = true;
+        } finally {
+            if (generation === this.generation) {
+                this.loading = false;
+                this.render();
+            }
+        }
+    }
+
+    scheduleRender() {
+        if (this.scheduled) return;
+        this.scheduled = true;
+        requestAnimationFrame(() => {
+            this.scheduled = false;
+            this.render();
+        });
+    }
+
+    spacer(height) {
+        return height > 0 ? `<tr class="spacer" style="height:${height}px"><td colspan="${this.columns}"></td></tr>` : '';
+    }
+
+    render() {
+        const rows = this.rows || [];
+        const known = Math.max(rows.length, this.total ?? rows.length);
+        const visible = Math.ceil(this.scroll.clientHeight / this.rowHeight) || 20;
+        const start = Math.max(0, Math.floor(this.scroll.scrollTop / this.rowHeight) - this.buffer);
+        const end = Math.min(rows.length, start + visible + 2 * this.buffer);
+
+        this.tbody.innerHTML =
+            this.spacer(start * this.rowHeight) +
+            rows.slice(start, end).map(this.renderRow).join('') +
+            this.spacer((known - end) * this.rowHeight);
+        if (this.count) {
+            this.count.textContent = this.total === null ? '' : `${rows.length} of ${this.total} loaded`;
+        }
+        // Prefetch before the user reaches the last loaded row
+        if (!this.done && end + this.buffer >= rows.length) this.fetchNext();
+    }
+}
+
+// Re-run a function once input has paused
+function debounce(fn, delay = 300) {
+    let timer;
+    return (...args) => {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn(...args), delay);
+    };
+}
+
+let usersTable, notesTable;
+
+function userFilters() {
+    const [sort, order] = document.getElementById('userSort').value.split(':');
+    const params = { sort, order };
+    const q = document.getElementById('userSearch').value.trim();
+    const role = document.getElementById('userRoleFilter').value;
+    if (q) params.q = q;
+    if (role) params.is_admin = role;
+    return params;
+}
+
+function noteFilters() {
+    const [sort, order] = document.getElementById('noteSort').value.split(':');
+    const params = { sort, order, fields: 'id,title,created_at,username' };
+    const q = document.getElementById('noteSearch').value.trim();
+    const author = document.getElementById('noteAuthor').value.trim();
+    const from = document.getElementById('noteFrom').value;
+    const to = document.getElementById('noteTo').value;
+    if (q) params.q = q;
+    if (author) params.username = author;
+    if (from) params.created_from = from;
+    if (to) {
+        // The date picker is inclusive, created_to is exclusive
+        const next = new Date(to);
+        next.setDate(next.getDate() + 1);
+        params.created_to = next.toISOString().slice(0, 10);
+    }
+    return params;
+}
+
+function initTables() {
+    usersTable = new VirtualTable({
+        scrollId: 'usersScroll',
+        bodyId: 'usersTableBody',
+        countId: 'usersCount',
+        endpoint: '/admin/api/users',
+        columns: 5,
+        renderRow: user => `
+            <tr class="vrow">
+                <td>${user.id}</td>
+                <td>${escapeHtml(user.username)}</td>
+                <td>
+                    <span class="badge ${user.is_admin ? 'badge-admin' : 'badge-user'}">
+                        ${user.is_admin ? 'Admin' : 'User'}
+                    </span>
+                </td>
+                <td>${user.note_count}</td>
+                <td>
+                    <button class="btn btn-danger" onclick="deleteUser(${user.id}, ${escapeHtml(JSON.stringify(user.username))})">
+                        Delete
+                    </button>
+                </td>
+            </tr>`
+    });
+    notesTable = new VirtualTable({
+        scrollId: 'notesScroll',
+        bodyId: 'notesTableBody',
+        countId: 'notesCount',
+        endpoint: '/admin/api/notes',
+        columns: 5,
+        renderRow: note => `
+            <tr class="vrow">
+                <td>${note.id}</td>
+                <td>${escapeHtml(note.title)}</td>
+                <td>${escapeHtml(note.username)}</td>
+                <td>${new Date(note.created_at).toLocaleDateString()}</td>
+                <td>
+                    <button class="btn btn-danger" onclick="deleteNote(${note.id}, ${escapeHtml(JSON.stringify(note.title))})">
+                        Delete
+                    </button>
+                </td>
+            </tr>`
+    });
+
+    const reloadUsers = debounce(loadUsers);
+    ['userSearch', 'userRoleFilter', 'userSort'].forEach(id =>
+        document.getElementById(id).addEventListener('input', reloadUsers));
+    const reloadNotes = debounce(loadNotes);
+    ['noteSearch', 'noteAuthor', 'noteFrom', 'noteTo', 'noteSort'].forEach(id =>
+        document.getElementById(id).addEventListener('input', reloadNotes));
+}
+
+// Load users (first page; more pages load while scrolling)
+function loadUsers() {
+    return usersTable.reset(userFilters());
+}
+
+// Load notes (first page; more pages load while scrolling)
+function loadNotes() {
+    return notesTable.reset(noteFilters());
+}
+
+// Delete user
+async function deleteUser(userId, username) {
+    if (!confirm(`Are you sure you want to delete user "${username}" and all their notes?`)) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/admin/api/users/${userId}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            const result = await response.json();
+            alert(result.message || 'User deleted successfully');
+            loadUsers();
+            loadStats(); // Refresh stats
+        } else {
+            const error = await response.json();
+            alert('Error: ' + error.detail);
+        }
+    } catch (error) {
+        console.error('Error deleting user:', error);
+        alert('Error deleting user');
+    }
+}
+
+// Delete note
+async function deleteNote(noteId, title) {
+    if (!confirm(`Are you sure you want to delete note "${title}"?`)) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/admin/api/notes/${noteId}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            alert('Note deleted successfully');
+            loadNotes();
+            loadStats(); // Refresh stats
+        } else {
+            const error = await response.json();
+            alert('Error: ' + error.detail);
+        }
+    } catch (error) {
+        console.error('Error deleting note:', error);
+        alert('Error deleting note');
+    }
+}
+
+// Logout
+function logout() {
+    if (confirm('Are you sure you want to logout?')) {
+        // Clear any stored tokens
+        localStorage.removeItem('access_token');
+        sessionStorage.removeItem('access_token');
+        // Redirect to login
+        window.location.href = '/admin/login';
+    }
+}
+
+// Chart instances
+let userDistributionChart, notesActivityChart, activityTimelineChart;
+
+// Initialize charts with animation
+function initializeCharts() {
+    // User Distribution Pie Chart
+    const userCtx = document.getElementById('userDistributionChart').getContext('2d');
+
+    // Create gradients for pie chart
+    const gradient1 = userCtx.createLinearGradient(0, 0, 0, 400);
+    gradient1.addColorStop(0, 'rgba(59, 130, 246, 0.9)');
+    gradient1.addColorStop(1, 'rgba(29, 78, 216, 0.7)');
+
+    const gradient2 = userCtx.createLinearGradient(0, 0, 0, 400);
+    gradient2.addColorStop(0, 'rgba(168, 85, 247, 0.9)');
+    gradient2.addColorStop(1, 'rgba(124, 58, 237, 0.7)');
+
+    userDistributionChart = new Chart(userCtx, {
+        type: 'doughnut',
+        data: {
+            labels: ['Regular Users', 'Admin Users'],
+            datasets: [{
+                data: [0, 0],
+                backgroundColor: [gradient1, gradient2],
+                borderColor: [
+                    'rgba(59, 130, 246, 1)',
+                    'rgba(168, 85, 247, 1)'
+                ],
+                borderWidth: 3,
+                hoverOffset: 15
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: {
+                animateRotate: true,
+                animateScale: false,
+                duration: 1500,
+                easing: 'easeInOutQuart'
+            },
+            plugins: {
+                legend: {
+                    position: 'bottom',
+                    labels: {
+                        padding: 20,
+                        usePointStyle: true
+                    }
+                }
+            }
+        }
+    });
+
+    // Notes Activity Bar Chart
+    const notesCtx = document.getElementById('notesActivityChart').getContext('2d');
+
+    // Create gradients for bar chart
+    const barGradient1 = notesCtx.createLinearGradient(0, 0, 0, 400);
+    barGradient1.addColorStop(0, 'rgba(34, 197, 94, 0.9)');
+    barGradient1.addColorStop(1, 'rgba(21, 128, 61, 0.7)');
+
+    const barGradient2 = notesCtx.createLinearGradient(0, 0, 0, 400);
+    barGradient2.addColorStop(0, 'rgba(251, 191, 36, 0.9)');
+    barGradient2.addColorStop(1, 'rgba(217, 119, 6, 0.7)');
+
+    const barGradient3 = notesCtx.createLinearGradient(0, 0, 0, 400);
+    barGradient3.addColorStop(0, 'rgba(239, 68, 68, 0.9)');
+    barGradient3.addColorStop(1, 'rgba(185, 28, 28, 0.7)');
+
+    notesActivityChart = new Chart(notesCtx, {
+        type: 'bar',
+        data: {
+            labels: ['Total Notes', 'Recent Notes', 'Active Users'],
+            datasets: [{
+                label: 'Count',
+                data: [0, 0, 0],
+                backgroundColor: [barGradient1, barGradient2, barGradient3],
+                borderColor: [
+                    'rgba(34, 197, 94, 1)',
+                    'rgba(251, 191, 36, 1)',
+                    'rgba(239, 68, 68, 1)'
+                ],
+                borderWidth: 3,
+                borderRadius: 12,
+                borderSkipped: false
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: {
+                duration: 1200,
+                easing: 'easeInOutQuad'
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: {
+                        color: 'rgba(0, 0, 0, 0.1)'
+                    }
+                },
+                x: {
+                    grid: {
+                        display: false
+                    }
+                }
+            },
+            plugins: {
+                legend: {
+                    display: false
+                }
+            }
+        }
+    });
+
+    // Activity Timeline Line Chart
+    const timelineCtx = document.getElementById('activityTimelineChart').getContext('2d');
+
+    // Create gradients for line chart
+    const lineGradient1 = timelineCtx.createLinearGradient(0, 0, 0, 400);
+    lineGradient1.addColorStop(0, 'rgba(59, 130, 246, 0.3)');
+    lineGradient1.addColorStop(1, 'rgba(59, 130, 246, 0.05)');
+
+    const lineGradient2 = timelineCtx.createLinearGradient(0, 0, 0, 400);
+    lineGradient2.addColorStop(0, 'rgba(34, 197, 94, 0.3)');
+    lineGradient2.addColorStop(1, 'rgba(34, 197, 94, 0.05)');
+
+    activityTimelineChart = new Chart(timelineCtx, {
+        type: 'line',
+        data: {
+            labels: ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
+            datasets: [{
+                label: 'New Users',
+                data: [10, 15, 25, 20, 30, 35],
+                borderColor: 'rgba(59, 130, 246, 1)',
+                backgroundColor: lineGradient1,
+                borderWidth: 4,
+                fill: true,
+                tension: 0.4,
+                pointBackgroundColor: 'rgba(59, 130, 246, 1)',
+                pointBorderColor: '#fff',
+                pointBorderWidth: 3,
+                pointRadius: 8,
+                pointHoverRadius: 12
+            }, {
+                label: 'New Notes',
+                data: [50, 75, 125, 100, 150, 175],
+                borderColor: 'rgba(34, 197, 94, 1)',
+                backgroundColor: lineGradient2,
+                borderWidth: 4,
+                fill: true,
+                tension: 0.4,
+                pointBackgroundColor: 'rgba(34, 197, 94, 1)',
+                pointBorderColor: '#fff',
+                pointBorderWidth: 3,
+                pointRadius: 8,
+                pointHoverRadius: 12
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: {
+                duration: 1500,
+                easing: 'easeInOutCubic'
+            },
+            interaction: {
+                intersect: false,
+                mode: 'index'
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: {
+                        color: 'rgba(0, 0, 0, 0.1)'
+                    }
+                },
+                x: {
+                    grid: {
+                        color: 'rgba(0, 0, 0, 0.05)'
+                    }
+                }
+            },
+            plugins: {
+                legend: {
+                    position: 'top',
+                    labels: {
+                        padding: 20,
+                        usePointStyle: true
+                    }
+                }
+            }
+        }
+    });
+}
+
+// Load detailed chart data
+async function loadChartData() {
+    try {
+        const response = await fetch('/admin/api/chart-data');
+        if (!response.ok) throw new Error('Failed to load chart data');
+
+        const data = await response.json();
+        updateChartsWithDetailedData(data);
+    } catch (error) {
+        console.log('Chart data loading error:', error);
+        // Fallback to basic stats if detailed data fails
+        const statsResponse = await fetch('/admin/api/stats');
+        if (statsResponse.ok) {
+            const stats = await statsResponse.json();
+            updateChartsWithBasicStats(stats);
+        }
+    }
+}
+
+// Recreate gradients for charts
+function recreateChartGradients() {
+    if (userDistributionChart) {
+        const userCtx = userDistributionChart.canvas.getContext('2d');
+        const gradient1 = userCtx.createLinearGradient(0, 0, 0, 400);
+        gradient1.addColorStop(0, 'rgba(59, 130, 246, 0.9)');
+        gradient1.addColorStop(1, 'rgba(29, 78, 216, 0.7)');
+
+        const gradient2 = userCtx.createLinearGradient(0, 0, 0, 400);
+        gradient2.addColorStop(0, 'rgba(168, 85, 247, 0.9)');
+        gradient2.addColorStop(1, 'rgba(124, 58, 237, 0.7)');
+
+        userDistributionChart.data.datasets[0].backgroundColor = [gradient1, gradient2];
+    }
+
+    if (notesActivityChart) {
+        const notesCtx = notesActivityChart.canvas.getContext('2d');
+        const barGradient1 = notesCtx.createLinearGradient(0, 0, 0, 400);
+        barGradient1.addColorStop(0, 'rgba(34, 197, 94, 0.9)');
+        barGradient1.addColorStop(1, 'rgba(21, 128, 61, 0.7)');
+
+        const barGradient2 = notesCtx.createLinearGradient(0, 0, 0, 400);
+        barGradient2.addColorStop(0, 'rgba(251, 191, 36, 0.9)');
+        barGradient2.addColorStop(1, 'rgba(217, 119, 6, 0.7)');
+
+        const barGradient3 = notesCtx.createLinearGradient(0, 0, 0, 400);
+        barGradient3.addColorStop(0, 'rgba(239, 68, 68, 0.9)');
+        barGradient3.addColorStop(1, 'rgba(185, 28, 28, 0.7)');
+
+        notesActivityChart.data.datasets[0].backgroundColor = [barGradient1, barGradient2, barGradient3];
+    }
+
+    if (activityTimelineChart) {
+        const timelineCtx = activityTimelineChart.canvas.getContext('2d');
+        const lineGradient1 = timelineCtx.createLinearGradient(0, 0, 0, 400);
+        lineGradient1.addColorStop(0, 'rgba(59, 130, 246, 0.3)');
+        lineGradient1.addColorStop(1, 'rgba(59, 130, 246, 0.05)');
+
+        const lineGradient2 = timelineCtx.createLinearGradient(0, 0, 0, 400);
+        lineGradient2.addColorStop(0, 'rgba(34, 197, 94, 0.3)');
+        lineGradient2.addColorStop(1, 'rgba(34, 197, 94, 0.05)');
+
+        activityTimelineChart.data.datasets[0].backgroundColor = lineGradient1;
+        activityTimelineChart.data.datasets[1].backgroundColor = lineGradient2;
+    }
+}
+
+// Update charts with detailed data
+function updateChartsWithDetailedData(data) {
+    if (userDistributionChart && data.user_distribution) {
+        userDistributionChart.data.labels = data.user_distribution.labels;
+        userDistributionChart.data.datasets[0].data = data.user_distribution.data;
+        recreateChartGradients();
+        userDistributionChart.update('animate');
+    }
+
+    if (notesActivityChart && data.stats) {
+        notesActivityChart.data.datasets[0].data = [
+            data.stats.total_notes,
+            Math.floor(data.stats.total_notes * 0.3), // Assume 30% are recent
+            data.stats.active_users
+        ];
+        recreateChartGradients();
+        notesActivityChart.update('animate');
+    }
+
+    if (activityTimelineChart && data.monthly_activity) {
+        activityTimelineChart.data.labels = data.monthly_activity.labels;
+        activityTimelineChart.data.datasets[0].data = data.monthly_activity.users;
+        activityTimelineChart.data.datasets[1].data = data.monthly_activity.notes;
+        recreateChartGradients();
+        activityTimelineChart.update('animate');
+    }
+}
+
+// Update charts with basic stats (fallback)
+function updateChartsWithBasicStats(stats) {
+    if (userDistributionChart) {
+        const regularUsers = (stats.total_users || 0) - (stats.admin_users || 0);
+        userDistributionChart.data.datasets[0].data = [regularUsers, stats.admin_users || 0];
+        recreateChartGradients();
+        userDistributionChart.update('animate');
+    }
+
+    if (notesActivityChart) {
+        notesActivityChart.data.datasets[0].data = [
+            stats.total_notes || 0,
+            stats.recent_notes || 0,
+            stats.total_users || 0
+        ];
+        recreateChartGradients();
+        notesActivityChart.update('animate');
+    }
+
+    // Keep existing timeline data or use simulated data
+    if (activityTimelineChart) {
+        const currentMonth = new Date().getMonth();
+        const userData = activityTimelineChart.data.datasets[0].data;
+        const notesData = activityTimelineChart.data.datasets[1].data;
+
+        userData[currentMonth % 6] = Math.max(1, Math.floor(stats.total_users / 3));
+        notesData[currentMonth % 6] = Math.max(1, Math.floor(stats.total_notes / 2));
+
+        recreateChartGradients();
+        activityTimelineChart.update('animate');
+    }
+}
+
+// Update charts with real data (legacy function for compatibility)
+function updateCharts(stats) {
+    updateChartsWithBasicStats(stats);
+}
+
+// Auto-refresh charts every 60 seconds (less frequent to reduce animations)
+function startChartAutoRefresh() {
+    setInterval(async () => {
+        await loadChartData();
+    }, 60000);
+}
+
+// Add 3D glow animation to stat cards
+function animateStatCards() {
+    const statCards = document.querySelectorAll('.stat-card');
+    statCards.forEach((card, index) => {
+        setTimeout(() => {
+            card.style.boxShadow = `
+                0 15px 35px rgba(59, 130, 246, 0.3),
+                0 25px 50px rgba(139, 92, 246, 0.15),
+                inset 0 1px 0 rgba(255,255,255,0.95)`;
+            card.style.transform = 'rotateX(0deg) rotateY(0deg) translateY(-8px) translateZ(15px)';
+            card.style.transition = 'all 0.8s cubic-bezier(0.4, 0, 0.2, 1)';
+
+            setTimeout(() => {
+                card.style.boxShadow = `
+                    0 8px 20px rgba(0,0,0,0.08),
+                    0 15px 35px rgba(0,0,0,0.04),
+                    inset 0 1px 0 rgba(255,255,255,0.9)`;
+                card.style.transform = 'rotateX(3deg) rotateY(-2deg) translateZ(0)';
+            }, 1200);
+        }, index * 400);
+    });
+}
+
+// Add 3D mouse tracking effect
+function add3DMouseTracking() {
+    const containers = document.querySelectorAll('.chart-container, .stat-card');
+
+    containers.forEach(container => {
+        container.addEventListener('mousemove', (e) => {
+            const rect = container.getBoundingClientRect();
+            const x = e.clientX - rect.left;
+            const y = e.clientY - rect.top;
+
+            const centerX = rect.width / 2;
+            const centerY = rect.height / 2;
+
+            const rotateX = (y - centerY) / 10;
+            const rotateY = (centerX - x) / 10;
+
+            container.style.transform = `
+                rotateX(${rotateX}deg) 
+                rotateY(${rotateY}deg) 
+                translateZ(10px)
+                scale3d(1.02, 1.02, 1.02)`;
+        });
+
+        container.addEventListener('mouseleave', () => {
+            container.style.transform = 'rotateX(2deg) rotateY(-1deg) translateZ(0) scale3d(1, 1, 1)';
+        });
+    });
+}
+
+// Initialize dashboard with 3D effects
+document.addEventListener('DOMContentLoaded', function() {
+    initTables();
+    loadStats();
+    initializeCharts();
+
+    // Load detailed chart data after a short delay
+    setTimeout(() => {
+        loadChartData();
+        animateStatCards();
+        add3DMouseTracking();
+    }, 1000);
+
+    startChartAutoRefresh();
+
+    // Add entrance animation
+    setTimeout(() => {
+        document.querySelectorAll('.chart-container').forEach((chart, index) => {
+            chart.style.opacity = '0';
+            chart.style.transform = 'rotateX(90deg) translateY(50px)';
+            chart.style.transition = 'all 1s cubic-bezier(0.4, 0, 0.2, 1)';
+
+            setTimeout(() => {
+                chart.style.opacity = '1';
+                chart.style.transform = 'rotateX(2deg) rotateY(-1deg) translateY(0)';
+            }, index * 200);
+        });
+    }, 500);
+});
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for online backups: unique names, listing and restore.
+
+Works on its own throwaway database and backup directory (no server needed).
+"""
+
+import os
+import tempfile
+import threading
+
+import database
+
+database.configure(database.TEMP)
+
+import backup
+
+def test_backup_and_restore():
+    print("Testing backup create, list and restore...")
+    previous = database.DB_NAME
+    database.configure(database.TEMP)
+    backup_dir = os.path.join(tempfile.mkdtemp(), "backups")
+    try:
+        database.create_database()
+        user_id = database.create_user("backup_user", "x")
+        kept = database.create_note("Kept", "in the backup", user_id)
+
+        # Backups started in the same second used to share a directory name
+        names = []
+        threads = [threading.Thread(target=lambda: names.append(backup.create_backup(backup_dir))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(names)) == 3, names
+        listed = backup.list_backups(backup_dir)
+        assert sorted(name for name, _, _ in listed) == sorted(names)
+        assert all(files == ["notes_app.db.gz"] for _, files, _ in listed), listed
+        print(f"✓ Concurrent backups got distinct names: {sorted(names)}")
+
+        database.delete_note(kept[0])
+        database.create_note("Later", "not in the backup", user_id)
+        restored = backup.restore_backup(names[0], backup_dir)
+        assert restored == [database.DB_NAME]
+        notes = database.get_notes(user_id)
+        assert [note[1] for note in notes] == ["Kept"], notes
+        assert database.get_note(kept[0])[2] == "in the backup"
+        print("✓ Restore brings the database back to the backup")
+
+        backup.rotate_backups(backup_dir, keep=1)
+        assert len(backup.list_backups(backup_dir)) == 1
+        print("✓ Rotation keeps the newest backups")
+    finally:
+        database.configure(previous)
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_backup_and_restore()
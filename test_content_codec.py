@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test script for the note content codecs (stored compression).
+
+No server or database needed.
+"""
+
+import database
+
+def test_codec_round_trip():
+    print("Testing content encode/decode round trips...")
+    previous = database.CONTENT_CODEC
+    codecs = ["none", "zlib"] + (["zstd"] if database.zstandard is not None else [])
+    samples = ["", "short", "héllo wörld ✓ " * 200, "meeting notes\n" * 500]
+    try:
+        for name in codecs:
+            database.CONTENT_CODEC = database.CODEC_NAMES[name]
+            for content in samples:
+                stored, codec = database.encode_content(content)
+                assert database.decode_content(stored, codec) == content
+                if len(content.encode("utf-8")) < database.CONTENT_COMPRESS_MIN_BYTES or name == "none":
+                    assert codec == database.CODEC_NONE and stored == content
+                else:
+                    assert codec == database.CODEC_NAMES[name] and len(stored) < len(content.encode("utf-8"))
+            # Random bytes don't compress, so they are kept as text
+            noise = "".join(chr(0x4e00 + (i * 7919) % 20000) for i in range(2000))
+            stored, codec = database.encode_content(noise)
+            assert database.decode_content(stored, codec) == noise
+            print(f"✓ {name}: {len(samples) + 1} samples round trip")
+    finally:
+        database.CONTENT_CODEC = previous
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_codec_round_trip()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite event bus transport between two workers.
+
+No server needed; both "workers" run in one event loop.
+"""
+
+import asyncio
+import os
+import tempfile
+
+import events
+
+def test_sqlite_transport():
+    print("Testing the sqlite: event bus transport...")
+    path = os.path.join(tempfile.mkdtemp(), "bus.db")
+
+    async def scenario():
+        sender, receiver = events.SQLiteTransport(path, poll_interval=0.01), events.SQLiteTransport(path, poll_interval=0.01)
+        received = []
+        await sender.start(lambda data: None)
+        await receiver.start(received.append)
+        try:
+            for i in range(20):
+                sender.send(f"event {i}".encode())
+            assert sender._queue.qsize() == 20, "send() only queues"
+            for _ in range(100):
+                if len(received) == 20:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await sender.stop()
+            await receiver.stop()
+        return received
+
+    received = asyncio.run(scenario())
+    assert received == [f"event {i}".encode() for i in range(20)], received
+    print("✓ Queued events are written off the loop and reach the other worker in order")
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_sqlite_transport()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk note import (NDJSON and zipped Markdown).
+
+Runs the app in-process against a throwaway database (no server needed).
+"""
+
+import io
+import json
+import zipfile
+
+import database
+
+database.configure(database.TEMP)
+
+from fastapi.testclient import TestClient
+
+import main
+
+def register(client, username):
+    token = client.post("/register", json={"username": username, "password": "secret123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def start_import(client, headers):
+    response = client.post("/notes/import", headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def test_ndjson_import():
+    print("Testing NDJSON import with per-record errors...")
+    with TestClient(main.app) as client:
+        headers = register(client, "import_ndjson")
+        created = start_import(client, headers)
+        progress = client.get(f"/notes/import/{created['job_id']}", headers=headers).json()
+        assert progress["status"] == "queued"
+        assert client.post("/notes/import", headers=headers).status_code == 409
+
+        lines = [json.dumps({"title": f"Note {i}", "content": "x" * i}) for i in range(10)]
+        lines += ["not json", "[1]", json.dumps({"title": 1, "content": "a"}), "", json.dumps({"title": "Last", "content": "end"})]
+        body = "\n".join(lines).encode()
+        chunks = (body[i:i + 7] for i in range(0, len(body), 7))
+        response = client.put(created["upload_url"], content=chunks, headers={**headers, "Content-Type": "application/x-ndjson"})
+        job = response.json()
+        assert response.status_code == 200, job
+        assert job["status"] == "done" and job["done"] == len(body)
+        assert job["result"]["imported"] == 11 and job["result"]["failed"] == 3
+        assert [e["record"] for e in job["result"]["errors"]] == [11, 12, 13]
+        assert len(client.get("/notes", headers=headers).json()) == 11
+        assert client.put(created["upload_url"], content=b"", headers=headers).status_code == 409
+        print(f"✓ Imported {job['result']['imported']} notes, rejected {job['result']['failed']} with line numbers")
+
+def test_zip_import():
+    print("Testing zipped Markdown import...")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("one.md", "# First\n\nBody one")
+        z.writestr("dir/two.md", "no heading")
+        z.writestr("notes.txt", "skipped")
+    with TestClient(main.app) as client:
+        headers = register(client, "import_zip")
+        created = start_import(client, headers)
+        job = client.put(created["upload_url"], content=archive.getvalue(),
+                         headers={**headers, "Content-Type": "application/zip"}).json()
+        assert job["result"]["imported"] == 2
+        assert job["result"]["errors"] == [{"record": "notes.txt", "error": "not a Markdown file"}]
+        titles = sorted(note["title"] for note in client.get("/notes", headers=headers).json())
+        assert titles == ["First", "two"], titles
+
+        created = start_import(client, headers)
+        response = client.put(created["upload_url"], content=b"not a zip", headers={**headers, "Content-Type": "application/zip"})
+        assert response.status_code == 400 and response.json()["detail"]["status"] == "failed"
+        response = client.put(start_import(client, headers)["upload_url"], content=b"x", headers={**headers, "Content-Type": "text/csv"})
+        assert response.status_code == 415
+        print("✓ Markdown titles taken from headings or file names; bad uploads rejected")
+
+    print("\nTest completed!")
+
+def test_import_survives_restart():
+    print("Testing import jobs across a worker restart...")
+    ndjson = {"Content-Type": "application/x-ndjson"}
+    body = json.dumps({"title": "After restart", "content": "x"}).encode()
+    # Created directly: /register is rate limited per client IP across the whole test run
+    user_id = database.create_user("import_restart", main.hash_password("secret123"))
+    with TestClient(main.app) as client:
+        token = client.post("/token", data={"username": "import_restart", "password": "secret123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        created = start_import(client, headers)
+    with TestClient(main.app) as client:
+        job = client.put(created["upload_url"], content=body, headers={**headers, **ndjson}).json()
+        assert job["status"] == "done" and job["result"]["imported"] == 1, job
+        assert client.get(created["upload_url"], headers=headers).json()["result"]["imported"] == 1
+        print("✓ An import created before a restart takes its upload afterwards")
+
+        # An upload cut off by the restart, and a job nobody uploaded to
+        running = start_import(client, headers)
+        assert database.claim_import_job(running["job_id"], user_id)
+    with TestClient(main.app) as client:
+        assert client.get(running["upload_url"], headers=headers).json()["status"] == "interrupted"
+        assert client.put(running["upload_url"], content=body, headers={**headers, **ndjson}).status_code == 410
+        stale = start_import(client, headers)
+        conn = database.connect()
+        conn.execute("UPDATE import_jobs SET created_at = created_at - ? WHERE id = ?",
+                     (main.IMPORT_UPLOAD_TIMEOUT_SECONDS + 1, stale["job_id"]))
+        conn.commit()
+        conn.close()
+        fresh = start_import(client, headers)
+        assert fresh["job_id"] > stale["job_id"]
+        assert client.put(stale["upload_url"], content=body, headers={**headers, **ndjson}).status_code == 410
+        print("✓ Interrupted and expired imports answer 410")
+
+if __name__ == "__main__":
+    test_ndjson_import()
+    test_zip_import()
+    test_import_survives_restart()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script for PATCH /notes/{id}: versions, If-Match and UTF-16 offsets.
+
+Runs the app in-process against a throwaway database (no server needed).
+"""
+
+import database
+
+database.configure(database.TEMP)
+
+from fastapi.testclient import TestClient
+
+import main
+
+def test_patch_note():
+    print("Testing note patches...")
+    with TestClient(main.app) as client:
+        token = client.post("/register", json={"username": "patch_user", "password": "secret123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        note = client.post("/notes", json={"title": "Draft", "content": "hello world"}, headers=headers).json()
+        url = f"/notes/{note['id']}"
+
+        assert client.patch(url, json={"edits": []}, headers=headers).status_code == 428
+        response = client.patch(url, json={"edits": [{"start": 0, "end": 5, "text": "howdy"}]},
+                                headers={**headers, "If-Match": 'W/"1"'})
+        assert response.status_code == 200, response.text
+        assert response.headers["ETag"] == '"2"' and response.json()["version"] == 2
+        stale = client.patch(url, json={"version": 1, "edits": []}, headers=headers)
+        assert stale.status_code == 412 and stale.headers["ETag"] == '"2"'
+        overlapping = [{"start": 0, "end": 3, "text": ""}, {"start": 2, "end": 4, "text": ""}]
+        assert client.patch(url, json={"version": 2, "edits": overlapping}, headers=headers).status_code == 422
+        assert client.get(url, headers=headers).json()["content"] == "howdy world"
+        print("✓ 428 without a version, 412 with a stale one, 422 for overlapping edits")
+
+        client.put(url, json={"title": "Draft", "content": "a😀b é"}, headers=headers)
+        # As a browser counts: "a" is 0, the emoji 1-2, "b" 3, " " 4, "é" 5
+        response = client.patch(url, json={"version": 3, "edits": [{"start": 3, "end": 4, "text": "c"},
+                                                                   {"start": 5, "end": 6, "text": "e👍"}]},
+                                headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["content_length"] == 8
+        assert client.get(url, headers=headers).json()["content"] == "a😀c e👍"
+        split = client.patch(url, json={"version": 4, "edits": [{"start": 2, "end": 2, "text": "x"}]}, headers=headers)
+        assert split.status_code == 422 and "surrogate" in split.json()["detail"]
+        past_end = client.patch(url, json={"version": 4, "edits": [{"start": 8, "end": 9, "text": ""}]}, headers=headers)
+        assert past_end.status_code == 422
+        history = client.get(f"{url}/revisions", headers=headers).json()
+        latest = client.get(f"{url}/revisions/{history[0]['id']}", headers=headers).json()
+        assert latest["content"] == "a😀c e👍"
+        print("✓ Offsets are UTF-16 code units; splitting a surrogate pair is rejected")
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_patch_note()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that login attempts are rate limited.
+"""
+
+import os
+import tempfile
+
+import requests
+
+from rate_limit import SQLiteBucketStore
+
+BASE_URL = "http://localhost:8000"
+
+def test_login_rate_limit():
+    print("Testing /token rate limiting...")
+
+    statuses = []
+    retry_after = None
+    try:
+        for _ in range(15):
+            response = requests.post(f"{BASE_URL}/token", data={"username": "nobody", "password": "wrong"})
+            statuses.append(response.status_code)
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                break
+    except requests.exceptions.ConnectionError:
+        print("✗ Cannot connect to server. Make sure the app is running on localhost:8000")
+        return
+
+    print(f"Status codes: {statuses}")
+    if 429 in statuses:
+        print(f"✓ Rate limit kicked in after {len(statuses) - 1} attempts (Retry-After: {retry_after})")
+    else:
+        print("✗ No 429 response received")
+
+    print("\nTest completed!")
+
+def test_sqlite_store_prunes_idle_buckets():
+    print("Testing the shared SQLite bucket store...")
+    path = os.path.join(tempfile.mkdtemp(), "buckets.db")
+    store = SQLiteBucketStore(path, prune_interval=0)
+    now = 1000.0
+    assert store.take("login:a", 2, 2 / 60, now) == 0
+    assert store.take("login:a", 2, 2 / 60, now) == 0
+    assert store.take("login:a", 2, 2 / 60, now) > 0
+    assert store._connection() is store._connection()
+    store.take("login:b", 2, 2 / 60, now + 30)
+    assert store.count() == 2
+    # login:a has been idle for a whole window and is full again, so it is deleted
+    store.take("login:c", 2, 2 / 60, now + 61)
+    assert store.count() == 2
+    assert store.take("login:a", 2, 2 / 60, now + 61) == 0
+    print("✓ Buckets limit, and idle ones are pruned")
+
+if __name__ == "__main__":
+    test_login_rate_limit()
+    test_sqlite_store_prunes_idle_buckets()
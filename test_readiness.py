@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for /livez, /readyz and the tracked thread pools.
+
+Runs the app in-process against a throwaway database (no server needed).
+"""
+
+import threading
+import time
+
+import database
+
+database.configure(database.TEMP)
+
+from fastapi.testclient import TestClient
+
+import health
+import main
+from pools import TrackedExecutor
+
+def test_cancelled_queued_work_is_uncounted():
+    print("Testing TrackedExecutor counts after cancelling queued work...")
+    pool = TrackedExecutor(1)
+    release = threading.Event()
+    busy = pool.submit(release.wait)
+    try:
+        time.sleep(0.05)
+        waiting = pool.submit(time.sleep, 0)
+        assert pool.stats()["queued"] == 1
+        assert waiting.cancel()
+        assert pool.stats() == {"workers": 1, "running": 1, "queued": 0, "saturation": 1.0}, pool.stats()
+    finally:
+        release.set()
+    busy.result()
+    pool.shutdown()
+    assert pool.stats()["running"] == 0
+    print("✓ Cancelled work no longer counts as queued")
+
+def test_readyz():
+    print("Testing /livez and /readyz...")
+    with TestClient(main.app) as client:
+        assert client.get("/livez").json() == {"status": "alive"}
+        response = client.get("/readyz")
+        report = response.json()
+        assert response.status_code == 200, report
+        assert set(report["checks"]) >= {"database", "default_pool", "hash_pool", "event_loop", "shutdown"}
+        assert client.get("/readyz").json()["checked_at"] == report["checked_at"], "readiness should be cached"
+        print(f"✓ Ready, database round trip {report['checks']['database']['latency_ms']} ms")
+
+        health.draining = True
+        time.sleep(health.CACHE_SECONDS + 0.05)
+        response = client.get("/readyz")
+        assert response.status_code == 503 and response.json()["failing"] == ["shutdown"]
+        print("✓ Not ready while draining")
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_cancelled_queued_work_is_uncounted()
+    test_readyz()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for replicating the local database and restoring the replica.
+
+Works on its own throwaway databases and replica directory (no server needed).
+"""
+
+import os
+import tempfile
+import threading
+
+import database
+
+database.configure(database.TEMP)
+
+import replication
+
+def test_replicate_and_restore():
+    print("Testing replica sync, lag and restore...")
+    previous = database.DB_NAME
+    replica_dir = os.path.join(tempfile.mkdtemp(), "replica")
+    replication.REPLICA_DIR = replica_dir
+    replication._synced = replication._synced_at = None
+    try:
+        database.configure(database.TEMP)
+        database.create_database()
+        user_id = database.create_user("replica_user", "x")
+        database.create_note("First", "replicated", user_id)
+        assert replication.lag() > 0
+        assert replication.sync()
+        assert replication.lag() == 0.0 and not replication.sync()
+        database.create_note("Second", "replicated too", user_id)
+        assert replication.lag() > 0
+
+        # lag() and sync() share the watcher connections from different threads
+        errors = []
+        def probe():
+            try:
+                for _ in range(50):
+                    replication.lag()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=probe) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        assert replication.sync()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        assert replication.status()["files"] == ["main.db"]
+        print("✓ Synced on change, lag back to 0 afterwards")
+
+        for target in (database.MEMORY, os.path.join(tempfile.mkdtemp(), "fresh", "notes_app.db")):
+            database.configure(target)
+            assert replication.restore() == [database.DB_NAME]
+            assert not database.init_db(), "a restored replica already has the current schema"
+            titles = sorted(note[1] for note in database.get_notes(user_id))
+            assert titles == ["First", "Second"], titles
+            assert replication.lag() == 0.0
+        assert replication.restore() == [], "an existing local database is kept"
+        print("✓ Restored the replica into :memory: and into a fresh local file")
+    finally:
+        for conn in replication._watchers.values():
+            conn.close()
+        replication._watchers.clear()
+        replication.REPLICA_DIR = ""
+        replication._synced = replication._synced_at = None
+        database.configure(previous)
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_replicate_and_restore()
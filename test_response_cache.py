@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the response cache: hits, invalidation across tags and
+bounded tag versions.
+
+Runs the app in-process against a throwaway database (no server needed).
+"""
+
+import asyncio
+import os
+import tempfile
+
+import database
+
+database.configure(database.TEMP)
+
+from fastapi.testclient import TestClient
+
+import main
+from response_cache import LRUBackend, SQLiteBackend, response_cache
+
+def register(client, username):
+    token = client.post("/register", json={"username": username, "password": "secret123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def get(client, url, headers=None):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.headers.get("X-Cache"), response.json()
+
+def test_invalidation_across_tags():
+    print("Testing cached reads after writes...")
+    with TestClient(main.app) as client:
+        headers = register(client, "cache_owner")
+        note = client.post("/notes", json={"title": "One", "content": "first"}, headers=headers).json()
+
+        assert get(client, "/notes", headers)[0] == "MISS"
+        assert get(client, "/notes", headers)[0] == "HIT"
+        assert get(client, f"/notes/{note['id']}", headers)[0] == "MISS"
+        assert get(client, f"/notes/{note['id']}", headers)[0] == "HIT"
+
+        token = client.post("/token", data={"username": main.DEFAULT_ADMIN_USERNAME, "password": main.DEFAULT_ADMIN_PASSWORD}).json()["access_token"]
+        client.cookies.set("access_token", token)
+        users_url = "/admin/api/users?q=cache_owner"
+        state, page = get(client, users_url)
+        assert state == "MISS" and page["items"][0]["note_count"] == 1
+        state, page = get(client, users_url)
+        assert state == "HIT" and page["items"][0]["created_at"] == "N/A", page
+        print("✓ Cached admin pages keep the response model's defaults")
+
+        # One write has to reach the user's list, the note itself and the admin pages
+        client.put(f"/notes/{note['id']}", json={"title": "One", "content": "second"}, headers=headers)
+        client.post("/notes", json={"title": "Two", "content": "more"}, headers=headers)
+        state, notes = get(client, "/notes", headers)
+        assert state == "MISS" and sorted(n["title"] for n in notes) == ["One", "Two"]
+        state, body = get(client, f"/notes/{note['id']}", headers)
+        assert state == "MISS" and body["content"] == "second"
+        state, page = get(client, users_url)
+        assert state == "MISS" and page["items"][0]["note_count"] == 2
+        client.cookies.clear()
+        print("✓ Writes invalidate the owner's list, the note and the admin pages")
+
+    print("\nTest completed!")
+
+def test_evicted_tags_never_reuse_a_version():
+    print("Testing bounded tag versions...")
+    backend = LRUBackend(max_bytes=1 << 20, max_tags=2)
+    versions = lambda *tags: asyncio.run(backend.versions(list(tags)))
+    backend.bump(["a"])
+    backend.bump(["a"])
+    seen = versions("a")[0]
+    backend.bump(["b"])
+    backend.bump(["c"])
+    assert len(backend._versions) == 2
+    assert versions("a")[0] > seen, "an evicted tag must not read as an older version"
+    backend.bump(["a"])
+    assert versions("a")[0] > seen + 1
+    print("✓ Tag versions stay bounded and only move forward")
+
+def test_shared_sqlite_backend():
+    print("Testing the shm: SQLite backend...")
+    previous = response_cache.backend
+    response_cache.backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "cache.db"))
+    try:
+        with TestClient(main.app) as client:
+            # Created directly: /register is rate limited per client IP across the whole test run
+            database.create_user("cache_shm", main.hash_password("secret123"))
+            token = client.post("/token", data={"username": "cache_shm", "password": "secret123"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            note = client.post("/notes", json={"title": "Shared", "content": "v1"}, headers=headers).json()
+            url = f"/notes/{note['id']}"
+            assert get(client, url, headers)[0] == "MISS"
+            assert get(client, url, headers)[0] == "HIT"
+            # The bump runs on the executor; the next read on this worker waits for it
+            client.put(url, json={"title": "Shared", "content": "v2"}, headers=headers)
+            state, body = get(client, url, headers)
+            assert state == "MISS" and body["content"] == "v2", (state, body)
+            assert not response_cache._bumps, "finished invalidations are not kept"
+        print("✓ Cached through the shared file, and invalidated before the next read")
+    finally:
+        response_cache.backend = previous
+
+if __name__ == "__main__":
+    test_invalidation_across_tags()
+    test_evicted_tags_never_reuse_a_version()
+    test_shared_sqlite_backend()
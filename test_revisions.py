@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for note revision history under concurrent updates.
+
+Runs the app in-process against a throwaway database (no server needed).
+"""
+
+import threading
+
+import database
+
+database.configure(database.TEMP)
+
+from fastapi.testclient import TestClient
+
+import main
+import revisions
+
+def test_concurrent_updates_keep_history():
+    print("Testing revision history with concurrent PUTs...")
+    with TestClient(main.app) as client:
+        token = client.post("/register", json={"username": "revisions_race", "password": "secret123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        note = client.post("/notes", json={"title": "Race", "content": "base " * 50}, headers=headers).json()
+
+        writers, rounds = 4, 2 * revisions.SNAPSHOT_INTERVAL // 4
+        written = set()
+
+        def write(writer):
+            for i in range(rounds):
+                content = f"writer {writer} round {i} " + "body " * (writer + i)
+                written.add(content)
+                assert database.update_note(note["id"], f"w{writer}", content) is not None
+
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        history = client.get(f"/notes/{note['id']}/revisions", headers=headers).json()
+        assert [r["revision"] for r in history] == list(range(writers * rounds + 1, 0, -1))
+        assert any(not r["is_snapshot"] for r in history), "expected delta revisions"
+        contents = [
+            client.get(f"/notes/{note['id']}/revisions/{r['id']}", headers=headers).json()["content"]
+            for r in history
+        ]
+        # Every delta rebuilds to exactly one of the writes, and the newest is the note itself
+        assert set(contents) == written | {note["content"]}
+        assert contents[0] == client.get(f"/notes/{note['id']}", headers=headers).json()["content"]
+        print(f"✓ {len(history)} revisions rebuild to the content each update wrote")
+
+        client.delete(f"/notes/{note['id']}", headers=headers)
+        assert database.update_note(note["id"], "gone", "gone") is None
+        print("✓ Updating a deleted note returns None")
+
+    print("\nTest completed!")
+
+def test_delete_note_without_revisions():
+    print("Testing delete of a note from before revision history...")
+    with TestClient(main.app) as client:
+        # Created directly: /register is rate limited per client IP across the whole test run
+        user_id = database.create_user("revisions_legacy", main.hash_password("secret123"))
+        token = client.post("/token", data={"username": "revisions_legacy", "password": "secret123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        # Written the way notes were stored before revisions existed: no note_revisions rows
+        note_id = database.create_note("Legacy", "never edited", user_id)[0]
+        conn = database.connect(database.shard_path(database.shard_for_user(user_id)))
+        conn.execute("DELETE FROM note_revisions WHERE note_id = ?", (note_id,))
+        conn.commit()
+        conn.close()
+        assert client.get(f"/notes/{note_id}/revisions", headers=headers).json() == []
+
+        response = client.delete(f"/notes/{note_id}", headers=headers)
+        assert response.status_code == 200, response.text
+        assert client.get(f"/notes/{note_id}", headers=headers).status_code == 404
+        assert database.delete_note(note_id) == 0
+        print("✓ Deleting a note with no revisions succeeds")
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_concurrent_updates_keep_history()
+    test_delete_note_without_revisions()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for note shards: routing by user, failed writes and rebalancing.
+
+Works on its own throwaway database files (no server needed).
+"""
+
+import database
+
+database.configure(database.TEMP)
+
+import shard_tool
+
+def directory_size():
+    conn = database.connect()
+    count = conn.execute("SELECT COUNT(*) FROM note_directory").fetchone()[0]
+    conn.close()
+    return count
+
+def shard_note_ids(index, shards):
+    conn = database.connect(database.shard_path(index, shards))
+    ids = {row[0] for row in conn.execute("SELECT id FROM notes")}
+    conn.close()
+    return ids
+
+def test_shards():
+    print("Testing sharded notes...")
+    previous = database.DB_NAME, database.NOTE_SHARDS, database.encode_content
+    database.configure(database.TEMP)
+    database.NOTE_SHARDS = 3
+    try:
+        database.create_database()
+        users = [database.create_user(f"shard_user{i}", "x") for i in range(6)]
+        notes = {}
+        for user_id in users:
+            for i in range(3):
+                note = database.create_note(f"u{user_id} n{i}", f"content {user_id} {i}", user_id)
+                notes[note[0]] = (user_id, note[2])
+            notes.update({
+                note_id: (user_id, f"batch {user_id} {i}")
+                for i, note_id in enumerate(database.create_notes_batch(user_id, [("b", f"batch {user_id} {i}") for i in range(2)]))
+            })
+        assert len(notes) == len(users) * 5, "note ids must be unique across shards"
+        for note_id, (user_id, content) in notes.items():
+            assert note_id in shard_note_ids(database.shard_for_user(user_id), 3)
+            assert database.get_note(note_id)[2] == content
+        print(f"✓ {len(notes)} notes routed to their user's shard and found by id")
+
+        def failing_encode(content):
+            if content == "bad":
+                raise ValueError("cannot store")
+            return previous[2](content)
+        database.encode_content = failing_encode
+        before = directory_size()
+        for attempt in (lambda: database.create_note("t", "bad", users[0]),
+                        lambda: database.create_notes_batch(users[1], [("ok", "fine"), ("t", "bad")])):
+            try:
+                attempt()
+                assert False, "expected the shard write to fail"
+            except ValueError:
+                pass
+        database.encode_content = previous[2]
+        assert directory_size() == before, "a failed shard write must not leave directory rows"
+        assert len(database.get_notes(users[1])) == 5
+        print("✓ Failed shard writes release their directory ids")
+
+        shard_tool.rebalance(3, 2)
+        assert database.NOTE_SHARDS == 2 and directory_size() == len(notes)
+        for note_id, (user_id, content) in notes.items():
+            assert note_id in shard_note_ids(database.shard_for_user(user_id, 2), 2)
+            assert database.get_note(note_id)[2] == content
+        revision = database.list_note_revisions(next(iter(notes)))
+        assert revision, "revisions move with their notes"
+        print("✓ Rebalanced from 3 to 2 shards without losing notes or revisions")
+    finally:
+        database.encode_content = previous[2]
+        database.NOTE_SHARDS = previous[1]
+        database.configure(previous[0])
+
+    print("\nTest completed!")
+
+if __name__ == "__main__":
+    test_shards()
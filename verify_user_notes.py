@@ -3,14 +3,13 @@
 Script to verify the database schema and test user-note associations directly.
 """
 
-import sqlite3
 import sys
 import os
 
 # Add current directory to path
 sys.path.append('.')
 
-from database import create_database, create_user, create_note, get_notes, get_note
+from database import connect as db_connect, create_database, create_user, create_note, get_notes, get_note
 from main import hash_password
 
 def verify_database_schema():
@@ -21,7 +20,7 @@ def verify_database_schema():
     create_database()
     
     # Check the schema
-    conn = sqlite3.connect("notes_app.db")
+    conn = db_connect()
     cursor = conn.cursor()
     
     # Check users table
@@ -63,7 +62,7 @@ def test_user_note_association():
         else:
             print("✗ Failed to create test users (may already exist)")
             # Try to get existing users
-            conn = sqlite3.connect("notes_app.db")
+            conn = db_connect()
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM users WHERE username = ?", ("testuser1",))
             result = cursor.fetchone()
@@ -120,7 +119,7 @@ def check_existing_data():
     """Check what data currently exists in the database."""
     print("\nChecking existing data in database...")
     
-    conn = sqlite3.connect("notes_app.db")
+    conn = db_connect()
     cursor = conn.cursor()
     
     # Check users